@@ -3,22 +3,18 @@ Backfill historical option chain data from Trendlyne SmartOptions API and Index
 This populates a local SQLite database (sos_master_data.db) with 1-minute interval historical data.
 """
 import requests
-import time
 import os
 import argparse
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 from python_engine.utils.symbol_master import MASTER as SymbolMaster
 from data_sourcing.database_manager import DatabaseManager
+from data_sourcing.trendlyne_client import trendlyne_base_url
+from data_sourcing.rate_limiter import get_rate_limiter
 
-# Try importing TVDatafeed
-try:
-    from tvDatafeed import TvDatafeed, Interval
-    TV_AVAILABLE = True
-except ImportError:
-    TV_AVAILABLE = False
-    print("[WARN] tvDatafeed not found. Index Volume backfill will be skipped.")
+from data_sourcing.tvdatafeed_client import TVDatafeedClient
 
 # Keep a cache to avoid repeated API calls
 STOCK_ID_CACHE = {}
@@ -33,10 +29,11 @@ def get_stock_id_for_symbol(symbol):
     if clean_symbol == "NIFTY" and "BANK" not in symbol: clean_symbol = "NIFTY"
     elif "BANK" in clean_symbol: clean_symbol = "BANKNIFTY"
 
-    search_url = "https://smartoptions.trendlyne.com/phoenix/api/search-contract-stock/"
+    search_url = f"{trendlyne_base_url()}/search-contract-stock/"
     params = {'query': clean_symbol.lower()}
 
     try:
+        get_rate_limiter('trendlyne').acquire()
         response = requests.get(search_url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
@@ -57,95 +54,200 @@ def get_stock_id_for_symbol(symbol):
         print(f"[ERROR] Stock Lookup {symbol}: {e}")
         return None
 
-def backfill_from_trendlyne(db_manager, symbol, stock_id, expiry_date_str, timestamp_snapshot, trading_date_override=None):
-    """Fetch and save historical OI data from Trendlyne for a specific timestamp snapshot"""
-
-    url = f"https://smartoptions.trendlyne.com/phoenix/api/live-oi-data/"
+def fetch_live_oi(stock_id, expiry_date_str, max_time, trading_date=None, min_time="09:15"):
+    """Fetch the cumulative Trendlyne OI state from min_time up to max_time ("HH:MM"); returns the response body or None"""
+    url = f"{trendlyne_base_url()}/live-oi-data/"
     params = {
         'stockId': stock_id,
         'expDateList': expiry_date_str,
-        'minTime': "09:15",
-        'maxTime': timestamp_snapshot
+        'minTime': min_time,
+        'maxTime': max_time
+    }
+    if trading_date:
+        params['tradingDate'] = trading_date
+
+    get_rate_limiter('trendlyne').acquire()
+    response = requests.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    if data['head']['status'] != '0':
+        return None
+    return data['body']
+
+def parse_oi_chain(oi_data, expiry_date_str):
+    """Convert Trendlyne oiData into option_chain_data rows plus (total call OI, total put OI)"""
+    chain = []
+    total_call_oi = 0
+    total_put_oi = 0
+
+    for strike_str, strike_data in oi_data.items():
+        c_oi = int(strike_data.get('callOi', 0))
+        p_oi = int(strike_data.get('putOi', 0))
+        total_call_oi += c_oi
+        total_put_oi += p_oi
+
+        chain.append({
+            "strike": float(strike_str),
+            "call_oi": c_oi,
+            "put_oi": p_oi,
+            "call_oi_chg": int(strike_data.get('callOiChange', 0)),
+            "put_oi_chg": int(strike_data.get('putOiChange', 0)),
+            "call_instrument_key": "", # Trendlyne doesn't give this
+            "put_instrument_key": "",
+            "expiry": expiry_date_str # CRITICAL: Needed for ATM resolution
+        })
+    return chain, total_call_oi, total_put_oi
+
+def _stats_row(full_ts, total_call_oi, total_put_oi):
+    return {
+        'timestamp': full_ts,
+        'pcr': round(total_put_oi / total_call_oi, 4) if total_call_oi > 0 else 1.0,
+        'call_oi': total_call_oi,
+        'put_oi': total_put_oi
     }
-    if trading_date_override:
-        params['tradingDate'] = trading_date_override
 
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+def reconstruct_day_snapshots(symbol, stock_id, expiry_date_str, time_slots, trading_date, cadence=1):
+    """
+    Rebuild per-minute option chain snapshots for one (symbol, expiry) from cumulative responses.
 
-        if data['head']['status'] != '0':
-            return False
+    Trendlyne returns the cumulative OI state up to maxTime, so by default every slot is
+    fetched: one request per minute, about 376 per (symbol, expiry) for a full day. An
+    earlier response cannot stand in for a later slot. With cadence > 1 the state is only fetched every `cadence` minutes (plus the
+    first and last slot) and the slots in between carry the latest fetched state forward,
+    i.e. they hold OI that is up to cadence - 1 minutes stale. When a response is identical to the previous
+    one, the parsed rows are reused. A failed fetch ends the unit there, so the checkpoint
+    resumes from the last slot covered.
 
-        body = data['body']
+    Returns (chain_df, stats_df, last_slot); both frames are None if nothing was captured.
+    """
+    if not time_slots:
+        return None, None, None
+    step = max(1, int(cadence))
+    fetch_slots = time_slots[::step]
+    if fetch_slots[-1] != time_slots[-1]:
+        fetch_slots.append(time_slots[-1])
+
+    states = []  # (slot, chain frame, call OI, put OI) per successful fetch
+    prev_oi_data = None
+    requests_made = reused = 0
+    for slot in fetch_slots:
+        try:
+            body = fetch_live_oi(stock_id, expiry_date_str, slot, trading_date)
+        except Exception as e:
+            print(f"[ERROR] Fetch {symbol} {expiry_date_str} @ {slot}: {e}")
+            body = None
+        requests_made += 1
+        if body is None:
+            break
         oi_data = body.get('oiData', {})
-        input_data = body.get('inputData', {})
-
-        trading_date = trading_date_override or input_data.get('tradingDate', date.today().strftime("%Y-%m-%d"))
-        expiry = input_data.get('expDateList', [expiry_date_str])[0]
-
-        chain = []
-        total_call_oi = 0
-        total_put_oi = 0
-
-        for strike_str, strike_data in oi_data.items():
-            c_oi = int(strike_data.get('callOi', 0))
-            p_oi = int(strike_data.get('putOi', 0))
-            total_call_oi += c_oi
-            total_put_oi += p_oi
-
-            chain.append({
-                "strike": float(strike_str),
-                "call_oi": c_oi,
-                "put_oi": p_oi,
-                "call_oi_chg": int(strike_data.get('callOiChange', 0)),
-                "put_oi_chg": int(strike_data.get('putOiChange', 0)),
-                "call_instrument_key": "", # Trendlyne doesn't give this
-                "put_instrument_key": "",
-                "expiry": expiry_date_str # CRITICAL: Needed for ATM resolution
-            })
-        
-        if chain:
-            df = pd.DataFrame(chain)
-            # Add explicit timestamp for accurate historical storage
-            # timestamp_snapshot is "HH:MM"
-            full_ts = f"{trading_date} {timestamp_snapshot}:00"
-            df['timestamp'] = full_ts
-            
-            # Canonicalize symbol for DB storage
-            canonical_symbol = SymbolMaster.get_canonical_ticker(symbol)
-
-            # Store via DatabaseManager
-            db_manager.store_option_chain(canonical_symbol, df, date=trading_date)
-
-            # Calculate and Store PCR in market_stats
-            current_pcr = round(total_put_oi / total_call_oi, 4) if total_call_oi > 0 else 1.0
+        if not oi_data:
+            break
+        if states and oi_data == prev_oi_data:
+            states.append((slot,) + states[-1][1:])
+            reused += 1
+        else:
+            chain, total_call_oi, total_put_oi = parse_oi_chain(oi_data, expiry_date_str)
+            states.append((slot, pd.DataFrame(chain), total_call_oi, total_put_oi))
+        prev_oi_data = oi_data
+
+    if not states:
+        return None, None, None
+
+    # Slots after the last successful fetch are only covered when that fetch was the final slot
+    last_fetched = states[-1][0]
+    covered = [ts for ts in time_slots if ts <= last_fetched] if len(states) < len(fetch_slots) else time_slots
+    state_slots = [slot for slot, *_ in states]
+    frames, stats = [], []
+    k = 0
+    for ts in covered:
+        while k + 1 < len(states) and state_slots[k + 1] <= ts:
+            k += 1
+        _, chain_df, total_call_oi, total_put_oi = states[k]
+        full_ts = f"{trading_date} {ts}:00"
+        frames.append(chain_df.assign(timestamp=full_ts))
+        stats.append(_stats_row(full_ts, total_call_oi, total_put_oi))
+
+    print(f"  [{symbol} {expiry_date_str}] {len(covered)} snapshots from {requests_made} requests ({reused} unchanged responses reused)")
+    return pd.concat(frames, ignore_index=True), pd.DataFrame(stats), covered[-1]
+
+def backfill_options_day(db_manager, symbols_list, trading_date, time_slots, cadence=1, expiries=1, workers=4, resume=True):
+    """
+    Full-day option chain backfill with one bulk write per symbol.
 
-            stats_df = pd.DataFrame([{
-                'timestamp': full_ts,
-                'pcr': current_pcr,
-                'call_oi': total_call_oi,
-                'put_oi': total_put_oi
-            }])
-            db_manager.store_market_stats(canonical_symbol, stats_df)
+    Each (symbol, expiry) unit is reconstructed on its own thread (the shared Trendlyne rate
+    limiter still caps the request rate). With the default cadence=1 a full day costs about 376
+    requests per (symbol, expiry), one per minute slot. With resume, slots at or before the unit's checkpoint
+    in backfill_checkpoints are skipped. Checkpoints only advance once the symbol's chain and
+    stats writes succeeded, so a failed write is refetched on the next run. option_chain_data is keyed on (symbol, timestamp,
+    strike) without the expiry, so when several expiries are fetched the nearest one wins on
+    overlapping strikes and market_stats is computed from the nearest expiry only.
 
-            return True
-            
-        return False
+    Returns {symbol: number of snapshots written}.
+    """
+    units = []
+    for symbol in symbols_list:
+        stock_id = get_stock_id_for_symbol(symbol)
+        if not stock_id:
+            print(f"[SKIP] No Stock ID for {symbol}")
+            continue
+        try:
+            expiry_url = f"{trendlyne_base_url()}/fno/get-expiry-dates/?mtype=options&stock_id={stock_id}"
+            get_rate_limiter('trendlyne').acquire()
+            resp = requests.get(expiry_url, timeout=10)
+            expiry_list = resp.json().get('body', {}).get('expiryDates', [])
+        except Exception as e:
+            print(f"[FAIL] {symbol}: {e}")
+            continue
+        if not expiry_list:
+            print(f"[SKIP] No Expiry for {symbol}")
+            continue
 
-    except Exception as e:
-        print(f"[ERROR] Fetch {symbol} @ {timestamp_snapshot}: {e}")
-        return False
+        canonical_symbol = SymbolMaster.get_canonical_ticker(symbol)
+        checkpoints = db_manager.get_backfill_checkpoints(canonical_symbol, trading_date) if resume else {}
+        for rank, expiry in enumerate(expiry_list[:max(1, expiries)]):
+            last_slot = checkpoints.get(expiry)
+            slots = [ts for ts in time_slots if last_slot is None or ts > last_slot]
+            if not slots:
+                print(f"[SKIP] {symbol} {expiry}: already backfilled up to {last_slot}")
+                continue
+            print(f"Syncing Options {symbol} | Expiry: {expiry} | {len(slots)} slot(s)...")
+            units.append((symbol, canonical_symbol, stock_id, expiry, rank, slots))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(reconstruct_day_snapshots, symbol, stock_id, expiry, slots, trading_date, cadence): (canonical_symbol, expiry, rank)
+                   for symbol, canonical_symbol, stock_id, expiry, rank, slots in units}
+        for future, (canonical_symbol, expiry, rank) in futures.items():
+            try:
+                chain_df, stats_df, last_slot = future.result()
+            except Exception as e:
+                print(f"[FAIL] {canonical_symbol} {expiry}: {e}")
+                continue
+            if chain_df is not None:
+                results.append((canonical_symbol, rank, expiry, chain_df, stats_df, last_slot))
+
+    written = {}
+    for canonical_symbol in dict.fromkeys(r[0] for r in results):
+        unit_results = sorted((r for r in results if r[0] == canonical_symbol), key=lambda r: r[1])
+        # Nearest expiry first: store_option_chain keeps the first row per (timestamp, strike)
+        chain_df = pd.concat([r[3] for r in unit_results], ignore_index=True)
+        nearest = unit_results[0]
+        stored = db_manager.store_option_chain(canonical_symbol, chain_df, date=trading_date)
+        if stored and nearest[1] == 0:
+            stored = db_manager.store_market_stats(canonical_symbol, nearest[4])
+        if not stored:
+            print(f"[FAIL] {canonical_symbol} Options: write failed; checkpoints left unchanged")
+            continue
+        db_manager.store_backfill_checkpoints(canonical_symbol, trading_date, {r[2]: r[5] for r in unit_results})
+        written[canonical_symbol] = len(nearest[4])
+        print(f"[OK] {canonical_symbol} Options: stored {len(nearest[4])} snapshots ({len(chain_df)} rows) in one write")
+    return written
 
 def backfill_index_volume_from_tv(db_manager, symbol, trading_date_str):
     """
     Fetches 1-minute historical data (including VOLUME) from TVDatafeed for the specified date
     and stores it in the database.
     """
-    if not TV_AVAILABLE:
-        return
-
     # CLEAN SYMBOL for TVDatafeed
     clean_symbol = symbol.split('|')[-1] if '|' in symbol else symbol
     if clean_symbol == "NIFTY" and "BANK" not in symbol: clean_symbol = "NIFTY"
@@ -153,8 +255,11 @@ def backfill_index_volume_from_tv(db_manager, symbol, trading_date_str):
 
     print(f"[TVDatafeed] Backfilling volume for {clean_symbol} on {trading_date_str}...")
     try:
-        tv = TvDatafeed()
-        
+        tv = TVDatafeedClient()
+        if not tv.tv:
+            print("[WARN] tvDatafeed not available. Index Volume backfill skipped.")
+            return False
+
         # TV Symbol Mapping
         tv_symbol = clean_symbol
         exchange = "NSE"
@@ -166,12 +271,7 @@ def backfill_index_volume_from_tv(db_manager, symbol, trading_date_str):
         
         print(f"[TVDatafeed] Requesting {n_bars} bars to cover {trading_date_str}...")
         
-        # Note: rongard version might use get_hist or get_historical_data
-        # We try both if needed, or stick to what user suggested if possible.
-        try:
-            df = tv.get_hist(symbol=tv_symbol, exchange=exchange, interval=Interval.in_1_minute, n_bars=n_bars)
-        except AttributeError:
-            df = tv.get_historical_data(tv_symbol, exchange, Interval.in_1_minute, n_bars=n_bars)
+        df = tv.get_historical_data(tv_symbol, exchange, n_bars=n_bars)
         
         if df is not None and not df.empty:
             # Clean and filter for the specific date
@@ -209,7 +309,7 @@ def generate_time_intervals(start_time="09:15", end_time="15:30", interval_minut
         current += timedelta(minutes=interval_minutes)
     return times
 
-def run_backfill(symbols_list=None, full_run=False, date_override=None):
+def run_backfill(symbols_list=None, full_run=False, date_override=None, cadence=1, expiries=1, workers=4, resume=True):
     db_manager = DatabaseManager()
     db_manager.initialize_database()
 
@@ -240,43 +340,21 @@ def run_backfill(symbols_list=None, full_run=False, date_override=None):
         end_time_str = end_dt.strftime("%H:%M")
     
     time_slots = generate_time_intervals(start_time=start_time_str, end_time=end_time_str)
-    
-    for symbol in symbols_list:
-        stock_id = get_stock_id_for_symbol(symbol)
-        if not stock_id:
-            print(f"[SKIP] No Stock ID for {symbol}")
-            continue
-
-        try:
-            # Fetch Expiry
-            expiry_url = f"https://smartoptions.trendlyne.com/phoenix/api/fno/get-expiry-dates/?mtype=options&stock_id={stock_id}"
-            resp = requests.get(expiry_url, timeout=10)
-            expiry_list = resp.json().get('body', {}).get('expiryDates', [])
-            if not expiry_list:
-                print(f"[SKIP] No Expiry for {symbol}")
-                continue
-
-            nearest_expiry = expiry_list[0]
-            print(f"Syncing Options {symbol} | Expiry: {nearest_expiry}...")
-
-            success_count = 0
-            for ts in time_slots:
-                if backfill_from_trendlyne(db_manager, symbol, stock_id, nearest_expiry, ts, trading_date_override=trading_date_str):
-                    success_count += 1
-                if success_count % 10 == 0:
-                    time.sleep(0.1)
-
-            print(f"[OK] {symbol} Options: Captured {success_count}/{len(time_slots)} snapshots")
-        except Exception as e:
-            print(f"[FAIL] {symbol}: {e}")
+    backfill_options_day(db_manager, symbols_list, trading_date_str, time_slots,
+                         cadence=cadence, expiries=expiries, workers=workers, resume=resume)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Data Backfill Script")
     parser.add_argument('--full', action='store_true', help='Perform a full-day backfill.')
     parser.add_argument('--symbol', type=str, help='Symbol to backfill.')
     parser.add_argument('--date', type=str, help='Date to backfill in YYYY-MM-DD format.')
+    parser.add_argument('--cadence', type=int, default=1, help='Minutes between Trendlyne requests; slots in between are forward-filled with stale OI (default 1 = every minute).')
+    parser.add_argument('--expiries', type=int, default=1, help='Number of nearest expiries to fetch in parallel.')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent (symbol, expiry) units.')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore checkpoints and refetch every slot.')
     args = parser.parse_args()
 
     target_symbols = [args.symbol] if args.symbol else ["NSE|INDEX|NIFTY", "NSE|INDEX|BANKNIFTY"]
-    run_backfill(target_symbols, full_run=args.full, date_override=args.date)
+    run_backfill(target_symbols, full_run=args.full, date_override=args.date,
+                 cadence=args.cadence, expiries=args.expiries, workers=args.workers, resume=not args.no_resume)
     print("\n[DB PATH]:", os.path.abspath("sos_master_data.db"))
@@ -0,0 +1,119 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from data_sourcing.database_manager import DatabaseManager
+
+SYMBOL = 'NSE|INDEX|NIFTY'
+
+
+def build_synthetic_db(path, days, strikes):
+    """
+    Fills a fresh database with `days` sessions of 1-minute index candles,
+    option-chain snapshots (every 3 minutes) and market stats.
+
+    Rows go in with plain INSERTs so the ts_min triggers are exercised and
+    no instrument master is needed for symbol resolution.
+    """
+    DatabaseManager(path).initialize_database()
+    rng = np.random.default_rng(7)
+    conn = sqlite3.connect(path)
+    for day in pd.bdate_range('2025-01-01', periods=days):
+        minutes = pd.date_range(day + pd.Timedelta(hours=9, minutes=15), periods=375, freq='min')
+        ts = list(minutes.strftime('%Y-%m-%d %H:%M:%S'))
+        close = 23000 + rng.standard_normal(len(ts)).cumsum() * 5
+        conn.executemany(
+            "INSERT INTO historical_candles (symbol, exchange, interval, timestamp, open, high, low, close, volume, oi) "
+            "VALUES (?, 'NSE', '1m', ?, ?, ?, ?, ?, 1000, 0)",
+            [(SYMBOL, t, c, c + 5, c - 5, c) for t, c in zip(ts, close.tolist())]
+        )
+        expiry = (day + pd.Timedelta(days=7)).strftime('%Y-%m-%d')
+        suffix = day.strftime('%y%m%d')
+        strike_list = [23000 + 50 * (i - strikes // 2) for i in range(strikes)]
+        conn.executemany(
+            "INSERT INTO option_chain_data (symbol, timestamp, strike, expiry, call_instrument_key, put_instrument_key, call_delta, put_delta) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0.5, -0.5)",
+            [(SYMBOL, t, k, expiry, f"NSE_FO|C{k}{suffix}", f"NSE_FO|P{k}{suffix}") for t in ts[::3] for k in strike_list]
+        )
+        conn.executemany("INSERT INTO market_stats (symbol, timestamp, pcr) VALUES (?, ?, 1.0)", [(SYMBOL, t) for t in ts])
+    conn.commit()
+    conn.close()
+
+
+def _time(conn, query, params, repeat):
+    best = float('inf')
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(conn.execute(query, params).fetchall())
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def run(db_path, repeat):
+    db = DatabaseManager(db_path)
+    db.initialize_database()
+    conn = sqlite3.connect(db_path)
+
+    day = conn.execute("SELECT DATE(MAX(timestamp)) FROM option_chain_data WHERE symbol = ?", (SYMBOL,)).fetchone()[0]
+    candle_symbol = conn.execute("SELECT symbol FROM historical_candles ORDER BY rowid DESC LIMIT 1").fetchone()[0]
+    option_key = conn.execute(
+        "SELECT put_instrument_key FROM option_chain_data WHERE symbol = ? ORDER BY rowid DESC LIMIT 1", (SYMBOL,)
+    ).fetchone()[0]
+    start, end = f"{day} 09:15:00", f"{day} 15:30:59"
+    min_lo, min_hi = db._minute_range(start, end)
+    day_lo, day_hi = db._day_minute_range(day)
+
+    cases = [
+        ("candles, one day",
+         "SELECT * FROM historical_candles WHERE symbol = ? AND exchange = 'NSE' AND interval = '1m' AND timestamp BETWEEN ? AND ?",
+         (candle_symbol, start, end),
+         "SELECT * FROM historical_candles WHERE symbol = ? AND ts_min BETWEEN ? AND ? AND exchange = 'NSE' AND interval = '1m'",
+         (candle_symbol, min_lo, min_hi)),
+        ("option chain, DATE()",
+         "SELECT * FROM option_chain_data WHERE symbol = ? AND DATE(timestamp) = ?",
+         (SYMBOL, day),
+         "SELECT * FROM option_chain_data WHERE symbol = ? AND ts_min BETWEEN ? AND ?",
+         (SYMBOL, day_lo, day_hi)),
+        ("market stats, range",
+         "SELECT * FROM market_stats WHERE symbol = ? AND timestamp BETWEEN ? AND ?",
+         (SYMBOL, start, end),
+         "SELECT * FROM market_stats WHERE symbol = ? AND ts_min BETWEEN ? AND ?",
+         (SYMBOL, min_lo, min_hi)),
+        ("option delta, OR",
+         "SELECT call_delta, put_delta FROM option_chain_data WHERE (call_instrument_key = ? OR put_instrument_key = ?) ORDER BY timestamp DESC LIMIT 1",
+         (option_key, option_key),
+         "SELECT call_delta, put_delta FROM option_chain_data WHERE put_instrument_key = ? ORDER BY ts_min DESC LIMIT 1",
+         (option_key,)),
+    ]
+
+    print(f"{'query':<24}{'legacy ms':>12}{'ts_min ms':>12}{'speedup':>10}{'rows':>8}")
+    for name, legacy_sql, legacy_params, new_sql, new_params in cases:
+        legacy, legacy_rows = _time(conn, legacy_sql, legacy_params, repeat)
+        new, new_rows = _time(conn, new_sql, new_params, repeat)
+        if legacy_rows != new_rows:
+            print(f"  [!] {name}: row counts differ ({legacy_rows} vs {new_rows})")
+        print(f"{name:<24}{legacy * 1000:>12.3f}{new * 1000:>12.3f}{legacy / new:>9.1f}x{new_rows:>8}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare legacy TEXT timestamp predicates against ts_min range scans.")
+    parser.add_argument("--db", default="sos_master_data.db", help="Database to benchmark (migrated in place)")
+    parser.add_argument("--synthetic", type=int, metavar="DAYS", help="Benchmark a throwaway database with DAYS synthetic sessions instead")
+    parser.add_argument("--strikes", type=int, default=40, help="Strikes per option-chain snapshot in synthetic mode")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query; the best time is reported")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            print(f"[*] Building {args.synthetic} synthetic session(s)...")
+            build_synthetic_db(path, args.synthetic, args.strikes)
+            run(path, args.repeat)
+            DatabaseManager.close_all_connections()
+    else:
+        run(args.db, args.repeat)
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDBWriter:
+    """
+    Single asyncio task that persists live data in batched commits.
+
+    Producers call submit_candles / submit_market_stats without blocking the
+    event loop. The writer drains up to `batch_size` items, or whatever has
+    arrived within `flush_interval` seconds. It then commits them on one
+    dedicated thread: all candle frames in one transaction and the market
+    stats grouped per symbol.
+
+    Attributes:
+        db_manager (DatabaseManager): Storage backend.
+        batch_size (int): Maximum items per commit.
+        flush_interval (float): Seconds to wait for a batch to fill.
+        latency (Optional[LatencyHistogram]): Records the duration of each commit.
+    """
+
+    def __init__(self, db_manager, batch_size: int = 200, flush_interval: float = 0.5,
+                 max_pending: int = 10000, latency=None):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.latency = latency
+        self._queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts the writer task on the running loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit_candles(self, symbol: str, exchange: str, interval: str, candles_df: pd.DataFrame) -> None:
+        await self._queue.put(('candles', (symbol, exchange, interval, candles_df)))
+
+    async def submit_market_stats(self, symbol: str, stats_df: pd.DataFrame) -> None:
+        await self._queue.put(('stats', (symbol, stats_df)))
+
+    async def close(self) -> None:
+        """Flushes everything queued so far and stops the writer."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        self._executor.shutdown(wait=True)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await loop.run_in_executor(self._executor, self._write, batch)
+
+    def _write(self, batch: List[Tuple[str, tuple]]) -> None:
+        start = time.perf_counter()
+        candles = [payload for kind, payload in batch if kind == 'candles']
+        stats = {}
+        for kind, payload in batch:
+            if kind == 'stats':
+                stats.setdefault(payload[0], []).append(payload[1])
+        try:
+            if candles:
+                self.db_manager.store_historical_candles_batch(candles)
+            for symbol, frames in stats.items():
+                self.db_manager.store_market_stats(symbol, pd.concat(frames, ignore_index=True))
+        except Exception as e:
+            logger.error(f"[AsyncDBWriter] Batch of {len(batch)} failed: {e}")
+        if self.latency is not None:
+            self.latency.record(time.perf_counter() - start)
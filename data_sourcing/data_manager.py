@@ -7,12 +7,19 @@ import pandas as pd
 from datetime import datetime, timedelta
 from python_engine.utils.instrument_loader import InstrumentLoader
 from data_sourcing.database_manager import DatabaseManager
+from python_engine.data.option_candle_cache import OptionCandleCache
+from python_engine.data.atm_table import AtmOptionTable
 from python_engine.models.data_models import VolumeBar, Sentiment
 
 class DataManager:
-    def __init__(self, access_token=None):
+    # Indices whose live sentiment is persisted to market_stats
+    LIVE_STATS_SYMBOLS = ('NSE|INDEX|NIFTY', 'NSE|INDEX|BANKNIFTY')
+
+    def __init__(self, access_token=None, holidays=None):
         self.db_manager = DatabaseManager()
         self.db_manager.initialize_database()
+        self.candle_cache = OptionCandleCache(self.db_manager)
+        self.atm_table = AtmOptionTable(self.db_manager)
         self.instrument_loader = InstrumentLoader()
         self.fno_instruments = {}
         from python_engine.engine_config import Config
@@ -26,6 +33,10 @@ class DataManager:
         self.upstox_client = UpstoxClient(access_token=access_token)
         self.trendlyne_client = TrendlyneClient()
         self.nse_client = NSEClient()
+        if holidays is not None:
+            # Supplied by a parent process (e.g. backtest workers on a read-only DB): no NSE refresh, no writes
+            self.holidays = list(holidays)
+            return
         cached_holidays = self.db_manager.get_holidays()
         if not cached_holidays:
             self.holidays = self.nse_client.get_holiday_list()
@@ -43,7 +54,6 @@ class DataManager:
                         self.holidays.extend(new_holidays)
             except Exception as e:
                 pass 
-        SymbolMaster.initialize()
 
     def get_last_traded_price(self, symbol, mode='backtest'):
         canonical_symbol = SymbolMaster.get_canonical_ticker(symbol)
@@ -74,7 +84,8 @@ class DataManager:
             return candles.iloc[-1]['close']
         return None
 
-    def calculate_atm_strike(self, symbol, spot_price):
+    @staticmethod
+    def calculate_atm_strike(symbol, spot_price):
         if spot_price is None: return None
         strike_step = 100 if "BANKNIFTY" in symbol.upper() else 50
         return round(spot_price / strike_step) * strike_step
@@ -107,7 +118,15 @@ class DataManager:
             print(f"[DataManager] [ERROR] Historical data for {canonical_symbol} not found in DB during backtest.")
             return None
 
-        # Fetch from remote
+        data_to_store = self.fetch_remote_candles(canonical_symbol, exchange, interval, n_bars, from_date, to_date)
+        if data_to_store is not None and not data_to_store.empty:
+            self.db_manager.store_historical_candles(canonical_symbol, exchange, interval, data_to_store)
+            return data_to_store.tail(n_bars)
+
+        return None
+
+    def fetch_remote_candles(self, canonical_symbol, exchange, interval, n_bars, from_date, to_date):
+        """Fetches candles from TVDatafeed (if enabled) or Upstox without storing them."""
         data_to_store = None
         if self.tv_client and self.tv_client.tv:
             from data_sourcing.tvdatafeed_client import Interval
@@ -139,18 +158,19 @@ class DataManager:
                         response = self.upstox_client.get_historical_candle_data(instrument_key, upstox_interval, to_date.strftime('%Y-%m-%d'), from_date.strftime('%Y-%m-%d'))
                     else:
                         response = self.upstox_client.get_intra_day_candle_data(instrument_key, upstox_interval)
-
-                    if response and hasattr(response, 'data') and response.data.candles:
-                        df = pd.DataFrame(response.data.candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
-                        df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
-                        data_to_store = df
+                    data_to_store = self.parse_upstox_candles(response)
             except Exception as e: pass
 
         else: print(f'[DataManager] Failed to fetch remote for {canonical_symbol}')
-        if data_to_store is not None and not data_to_store.empty:
-            self.db_manager.store_historical_candles(canonical_symbol, exchange, interval, data_to_store)
-            return data_to_store.tail(n_bars)
-
+        return data_to_store
+
+    @staticmethod
+    def parse_upstox_candles(response):
+        """Converts an Upstox candle response into a DataFrame with naive timestamps, or None."""
+        if response and hasattr(response, 'data') and response.data.candles:
+            df = pd.DataFrame(response.data.candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
+            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
+            return df
         return None
 
     def get_option_chain(self, symbol, date=None, mode='backtest'):
@@ -224,6 +244,7 @@ class DataManager:
 
         if chain_data is not None and not chain_data.empty:
             self.db_manager.store_option_chain(symbol, chain_data, date=date_str)
+            self.atm_table.invalidate(symbol, date_str)
             return chain_data.to_dict('records')
         return None
 
@@ -250,6 +271,9 @@ class DataManager:
 
     def get_historical_candle_for_timestamp(self, symbol, timestamp):
         dt = datetime.fromtimestamp(timestamp)
+        # Past days are complete, so serve them from the per-day cache; today's candles are still arriving
+        if dt.date() != datetime.now().date():
+            return self.candle_cache.get_candle(symbol, timestamp)
         df = self.get_historical_candles(symbol, n_bars=10, from_date=dt-timedelta(seconds=30), to_date=dt+timedelta(seconds=30))
         if df is not None and not df.empty:
             df['diff'] = (pd.to_datetime(df['timestamp']) - dt).abs()
@@ -259,25 +283,12 @@ class DataManager:
         return None
 
     def get_atm_option_details_for_timestamp(self, underlying_symbol, side, spot_price, timestamp):
-        canonical_symbol = SymbolMaster.get_canonical_ticker(underlying_symbol)
-        symbol_prefix = "BANKNIFTY" if "BANK" in underlying_symbol.upper() else "NIFTY"
-        datetime_str = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        # Contracts do not change intraday, so resolve from the per-day table built on first use,
+        # limited to the strikes stored by the trade time (else the previous stored day's chain)
+        dt = datetime.fromtimestamp(timestamp)
         try:
-            with self.db_manager as db:
-                query = "SELECT * FROM option_chain_data WHERE symbol = ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 500"
-                df = pd.read_sql_query(query, db.conn, params=(canonical_symbol, datetime_str))
-            if df.empty: return None, None
-            expiry_str = df['expiry'].iloc[0]
-            atm_strike_val = self.calculate_atm_strike(symbol_prefix, spot_price)
-            row = df.iloc[(df['strike'] - atm_strike_val).abs().argsort()[:1]].iloc[0]
-            strike_price = int(row['strike'])
-            option_type = "CE" if side.upper() == 'BUY' else "PE"
-            expiry_dt = pd.to_datetime(expiry_str)
-            trading_symbol = f"{symbol_prefix} {strike_price} {option_type} {expiry_dt.strftime('%d %b %y').upper()}"
-            key = row.get('call_instrument_key' if option_type == 'CE' else 'put_instrument_key') or SymbolMaster.get_upstox_key(trading_symbol)
-            if not key: return None, None
-            actual_tsym = SymbolMaster.get_ticker_from_key(key)
-            return key, (actual_tsym if actual_tsym and actual_tsym != key else trading_symbol)
+            return self.atm_table.lookup(underlying_symbol, side, spot_price, dt.strftime('%Y-%m-%d'),
+                                         at_min=DatabaseManager.to_epoch_minute(dt))
         except Exception as e: return None, None
 
     def get_pcr(self, symbol, date=None, timestamp=None, mode='backtest'):
@@ -311,7 +322,7 @@ class DataManager:
 
         return 1.0
 
-    def get_current_sentiment(self, symbol, timestamp=None, mode='backtest'):
+    def get_current_sentiment(self, symbol, timestamp=None, mode='backtest', persist=True):
         pcr = self.get_pcr(symbol, timestamp=timestamp, mode=mode)
         oi_above, oi_below = 0.0, 0.0
         try:
@@ -333,31 +344,42 @@ class DataManager:
         except Exception as e: pass
         sentiment = Sentiment(pcr=pcr, advances=0, declines=0, pcr_velocity=0.0, oi_wall_above=oi_above, oi_wall_below=oi_below, smart_trend=smart_trend)
 
-        # Store live stats in DB for visualization
-        if mode == 'live' and timestamp:
-            if symbol not in ['NSE|INDEX|NIFTY', 'NSE|INDEX|BANKNIFTY']: return sentiment
+        # Store live stats in DB for visualization (callers with their own writer pass persist=False)
+        if mode == 'live' and timestamp and persist:
+            if symbol not in self.LIVE_STATS_SYMBOLS: return sentiment
             try:
-                ts_str = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-                # print(f"[DataManager] Storing live stats for {symbol} at {ts_str}")
-                stats_df = pd.DataFrame([{
-                    'timestamp': ts_str,
-                    'pcr': pcr, 'oi_wall_above': oi_above, 'oi_wall_below': oi_below,
-                    'smart_trend': smart_trend,
-                    'call_oi': 0, 'put_oi': 0, 'pcr_velocity': 0, 'advances': 0, 'declines': 0
-                }])
-                self.db_manager.store_market_stats(symbol, stats_df)
+                self.db_manager.store_market_stats(symbol, self.live_stats_frame(timestamp, sentiment))
             except Exception as e:
                 print(f"[DataManager] Error storing live stats: {e}")
 
         return sentiment
 
+    @staticmethod
+    def live_stats_frame(timestamp, sentiment):
+        """One market_stats row for a live sentiment reading at `timestamp` (epoch seconds)."""
+        return pd.DataFrame([{
+            'timestamp': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+            'pcr': sentiment.pcr, 'oi_wall_above': sentiment.oi_wall_above, 'oi_wall_below': sentiment.oi_wall_below,
+            'smart_trend': sentiment.smart_trend,
+            'call_oi': 0, 'put_oi': 0, 'pcr_velocity': 0, 'advances': 0, 'declines': 0
+        }])
+
     def get_option_delta(self, instrument_key):
         """Returns the delta for the given option instrument key from the DB."""
         try:
             with self.db_manager as db:
-                query = "SELECT call_delta, put_delta FROM option_chain_data WHERE (call_instrument_key = ? OR put_instrument_key = ?) ORDER BY timestamp DESC LIMIT 1"
-                row = db.conn.execute(query, (instrument_key, instrument_key)).fetchone()
-                if row:
+                # One indexed probe per side instead of an OR that forces a full scan
+                rows = [
+                    db.conn.execute(
+                        f"SELECT ts_min, timestamp, call_delta, put_delta FROM option_chain_data "
+                        f"WHERE {column} = ? ORDER BY ts_min DESC, timestamp DESC LIMIT 1",
+                        (instrument_key,)
+                    ).fetchone()
+                    for column in ('call_instrument_key', 'put_instrument_key')
+                ]
+                rows = [r for r in rows if r]
+                if rows:
+                    row = max(rows, key=lambda r: (r[0], r[1]))[2:]
                     return row[0] if row[0] != 0 else row[1]
         except Exception as e: pass
         return 0.5 # Default
@@ -1,13 +1,117 @@
+import os
+import time
+import logging
 import sqlite3
+import numpy as np
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime
+from urllib.request import pathname2url
 import threading
 
-class DatabaseManager:
-    _lock = threading.Lock() # Class-level lock to serialize writes across all instances
 
-    def __init__(self, db_name='sos_master_data.db'):
+class _ConnectionPool:
+    """
+    Long-lived SQLite connections, one per (thread, database file, access mode).
+
+    Writer connections switch the database to WAL so readers never block on
+    the single writer. Connections inherited across fork() are never reused.
+    Every DatabaseManager on a thread shares that thread's connection, so the
+    context-manager nesting depth is tracked here, per connection, rather than
+    per manager.
+    """
+
+    CACHE_SIZE_KB = 65536          # cache_size is given in KiB when negative
+    MMAP_SIZE = 256 * 1024 * 1024
+    BUSY_TIMEOUT_MS = 5000
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._all = []
+        self._all_lock = threading.Lock()
+
+    def get(self, db_name, read_only=False):
+        if self._pid != os.getpid():
+            # Forked child: the parent's connections must not be touched
+            self._reset()
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        path = os.path.abspath(db_name)
+        key = (path, read_only)
+        conn = connections.get(key)
+        if conn is None:
+            conn = connections[key] = self._connect(path, read_only)
+            with self._all_lock:
+                self._all.append(conn)
+        return conn
+
+    def acquire(self, db_name, read_only=False):
+        """Returns this thread's connection and enters one more level of use on it."""
+        conn = self.get(db_name, read_only)
+        depths = getattr(self._local, 'depths', None)
+        if depths is None:
+            depths = self._local.depths = {}
+        depths[conn] = depths.get(conn, 0) + 1
+        return conn
+
+    def release(self, conn):
+        """Leaves one level of use on `conn`; returns how many levels are still open (-1 if closed meanwhile)."""
+        depths = getattr(self._local, 'depths', {})
+        if conn not in depths:
+            # close_all() ran inside the block; the connection is gone
+            return -1
+        depth = depths[conn] - 1
+        if depth:
+            depths[conn] = depth
+        else:
+            del depths[conn]
+        return depth
+
+    def _connect(self, path, read_only):
+        if read_only:
+            conn = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size=-{self.CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def close_all(self):
+        with self._all_lock:
+            connections, self._all = self._all, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+_POOL = _ConnectionPool()
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseManager:
+    _lock = threading.Lock() # Class-level lock: one writer per process; WAL lets readers proceed meanwhile
+    # Backtest worker processes flip this so every manager they create opens the DB read-only
+    default_read_only = False
+    # Cumulative bulk-write throughput per table: {table: [rows, seconds]}
+    _write_stats = {}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, db_name='sos_master_data.db', read_only=None):
         self.db_name = db_name
+        self.read_only = DatabaseManager.default_read_only if read_only is None else read_only
         self._local = threading.local()
 
     @property
@@ -42,14 +146,39 @@ class DatabaseManager:
             # For end of range, we might want to include the whole minute
             return dt.floor('min').replace(second=59).strftime('%Y-%m-%d %H:%M:%S')
 
+    # SQL expression for the epoch minute of a '%Y-%m-%d %H:%M:%S' timestamp column
+    _TS_MIN_SQL = "CAST(strftime('%s', {col}) AS INTEGER) / 60"
+
+    @staticmethod
+    def to_epoch_minute(ts):
+        """Returns the ts_min value (minutes since 1970-01-01, naive) for a timestamp, or None."""
+        if ts is None or ts == '':
+            return None
+        return int(pd.Timestamp(ts).value // 60_000_000_000)
+
+    def _minute_range(self, from_date, to_date):
+        """Normalizes a date/time range exactly like the TEXT queries did and returns ts_min bounds."""
+        return (self.to_epoch_minute(self._normalize_timestamp(from_date)),
+                self.to_epoch_minute(self._normalize_timestamp(to_date, floor=False)))
+
+    def _day_minute_range(self, for_date):
+        """ts_min bounds covering one calendar day (YYYY-MM-DD)."""
+        start = self.to_epoch_minute(pd.Timestamp(for_date).normalize())
+        return start, start + 24 * 60 - 1
+
+    @staticmethod
+    def _epoch_minutes(timestamps):
+        """Vectorized to_epoch_minute for a Series of timestamp strings."""
+        return pd.to_datetime(timestamps).values.astype('datetime64[m]').astype(np.int64)
+
     def __enter__(self):
-        # Re-entrant context manager using thread-local depth tracking
+        # Re-entrant: the thread-local depth only decides when this manager drops its reference
         if not hasattr(self._local, 'depth'):
             self._local.depth = 0
 
         if self._local.depth == 0:
-            # Using check_same_thread=False with thread-local storage provides maximum compatibility
-            self.conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            # Borrow this thread's pooled connection; it stays open after the block
+            self.conn = _POOL.acquire(self.db_name, read_only=self.read_only)
 
         self._local.depth += 1
         return self
@@ -57,9 +186,32 @@ class DatabaseManager:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._local.depth -= 1
         if self._local.depth == 0:
-            if self.conn:
-                self.conn.close()
-                self.conn = None
+            conn, self.conn = self.conn, None
+            # Closing used to discard uncommitted work; only the outermost block on the
+            # shared connection may do that, or it would undo another manager's transaction
+            if _POOL.release(conn) == 0 and conn.in_transaction:
+                conn.rollback()
+
+    @contextmanager
+    def reader(self):
+        """
+        Yields a pooled read-only connection for queries that never write.
+
+        Falls back to the regular connection if the database cannot be opened
+        read-only yet (e.g. the file has not been created).
+        """
+        try:
+            conn = _POOL.get(self.db_name, read_only=True)
+        except sqlite3.OperationalError:
+            with self as db:
+                yield db.conn
+            return
+        yield conn
+
+    @staticmethod
+    def close_all_connections():
+        """Closes every pooled connection opened by this process."""
+        _POOL.close_all()
 
     def _execute_query(self, query, params=(), commit=False):
         with self as db:
@@ -70,6 +222,9 @@ class DatabaseManager:
             return cursor
 
     def initialize_database(self):
+        if self.read_only:
+            # Schema and migrations are the writer's job
+            return
         with self._lock:
             # Create historical_candles table
             self._execute_query('''
@@ -84,6 +239,7 @@ class DatabaseManager:
                     close REAL,
                     volume INTEGER,
                     oi INTEGER,
+                    ts_min INTEGER,
                     PRIMARY KEY (symbol, exchange, interval, timestamp)
                 )
             ''', commit=True)
@@ -111,6 +267,7 @@ class DatabaseManager:
                     put_theta REAL,
                     call_trend TEXT,
                     put_trend TEXT,
+                    ts_min INTEGER,
                     PRIMARY KEY (symbol, timestamp, strike)
                 )
             ''', commit=True)
@@ -146,6 +303,7 @@ class DatabaseManager:
                     call_oi REAL,
                     put_oi REAL,
                     smart_trend TEXT,
+                    ts_min INTEGER,
                     PRIMARY KEY (symbol, timestamp)
                 )
             ''', commit=True)
@@ -156,6 +314,7 @@ class DatabaseManager:
                     trade_id TEXT PRIMARY KEY,
                     pattern_id TEXT,
                     symbol TEXT,
+                    underlying_symbol TEXT,
                     instrument_key TEXT,
                     side TEXT,
                     entry_time DATETIME,
@@ -174,6 +333,18 @@ class DatabaseManager:
                 )
             ''', commit=True)
 
+            # Resume points of the Trendlyne backfill: last slot stored per (symbol, date, expiry)
+            self._execute_query('''
+                CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+                    symbol TEXT,
+                    trading_date TEXT,
+                    expiry TEXT,
+                    last_slot TEXT,
+                    updated_at TEXT,
+                    PRIMARY KEY (symbol, trading_date, expiry)
+                )
+            ''', commit=True)
+
             # Migration: Ensure tables have latest columns
             self._run_migrations()
 
@@ -221,118 +392,239 @@ class DatabaseManager:
                     'tp_price': 'REAL',
                     'quantity': 'INTEGER',
                     'status': "TEXT DEFAULT 'OPEN'",
-                    'exit_reason': 'TEXT'
+                    'exit_reason': 'TEXT',
+                    'underlying_symbol': 'TEXT'
                 }
                 for col, dtype in new_tr_cols.items():
                     if col not in tr_columns:
                         print(f"[DatabaseManager] Migrating trades: adding {col} column")
                         db.conn.execute(f"ALTER TABLE trades ADD COLUMN {col} {dtype}")
 
+                # 4. Integer epoch-minute timestamps (ts_min) with range indexes
+                for table in ('historical_candles', 'option_chain_data', 'market_stats'):
+                    cursor.execute(f"PRAGMA table_info({table})")
+                    if 'ts_min' not in [info[1] for info in cursor.fetchall()]:
+                        print(f"[DatabaseManager] Migrating {table}: adding ts_min column")
+                        db.conn.execute(f"ALTER TABLE {table} ADD COLUMN ts_min INTEGER")
+                    backfilled = db.conn.execute(
+                        f"UPDATE {table} SET ts_min = {self._TS_MIN_SQL.format(col='timestamp')} WHERE ts_min IS NULL"
+                    ).rowcount
+                    if backfilled:
+                        print(f"[DatabaseManager] Backfilled ts_min for {backfilled} rows in {table}")
+                    # Writers other than the bulk upserts (raw INSERTs, ad-hoc copies) get ts_min from the trigger
+                    db.conn.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS trg_{table}_ts_min_insert AFTER INSERT ON {table}
+                        WHEN NEW.ts_min IS NULL
+                        BEGIN
+                            UPDATE {table} SET ts_min = {self._TS_MIN_SQL.format(col='NEW.timestamp')} WHERE rowid = NEW.rowid;
+                        END
+                    """)
+                    db.conn.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS trg_{table}_ts_min_update AFTER UPDATE OF timestamp ON {table}
+                        BEGIN
+                            UPDATE {table} SET ts_min = {self._TS_MIN_SQL.format(col='NEW.timestamp')} WHERE rowid = NEW.rowid;
+                        END
+                    """)
+
+                db.conn.execute("CREATE INDEX IF NOT EXISTS idx_candles_symbol_ts ON historical_candles (symbol, ts_min)")
+                db.conn.execute("CREATE INDEX IF NOT EXISTS idx_option_chain_symbol_ts ON option_chain_data (symbol, ts_min)")
+                db.conn.execute("CREATE INDEX IF NOT EXISTS idx_option_chain_call_key_ts ON option_chain_data (call_instrument_key, ts_min)")
+                db.conn.execute("CREATE INDEX IF NOT EXISTS idx_option_chain_put_key_ts ON option_chain_data (put_instrument_key, ts_min)")
+                db.conn.execute("CREATE INDEX IF NOT EXISTS idx_market_stats_symbol_ts ON market_stats (symbol, ts_min)")
+                db.conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_entry_time ON trades (entry_time)")
+
                 db.conn.commit()
         except Exception as e:
             print(f"[DatabaseManager] Migration failed: {e}")
 
+    @staticmethod
+    def _upsert_query(table, columns, key_cols, keep_cols=()):
+        """
+        Builds an INSERT ... ON CONFLICT DO UPDATE that overwrites every non-key column given.
+
+        A NULL in one of `keep_cols` leaves the stored value in place.
+        """
+        updates = [f"{c} = COALESCE(excluded.{c}, {table}.{c})" if c in keep_cols else f"{c} = excluded.{c}"
+                   for c in columns if c not in key_cols]
+        conflict = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+        return f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT ({', '.join(key_cols)}) {conflict}
+        """
+
+    @staticmethod
+    def _to_db_rows(df, columns):
+        """
+        Converts DataFrame columns to a list of tuples of Python natives for executemany.
+        NaN/NaT become NULL and datetimes become 'YYYY-MM-DD HH:MM:SS' strings.
+        """
+        converted = []
+        for col in columns:
+            series = df[col]
+            # Nullable extension dtypes (Int64, string, ...) take the generic path
+            kind = series.dtype.kind if isinstance(series.dtype, np.dtype) else 'O'
+            if kind == 'M':
+                values = series.dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+                values = [None if isinstance(v, float) else v for v in values]
+            elif kind == 'f':
+                arr = series.to_numpy()
+                values = arr.tolist()
+                for idx in np.flatnonzero(np.isnan(arr)):
+                    values[idx] = None
+            elif kind in 'iub':
+                values = series.to_numpy().tolist()
+            else:
+                values = [
+                    None if v is None or v is pd.NaT or v is pd.NA or (isinstance(v, float) and v != v)
+                    else (v.item() if isinstance(v, np.generic) else v)
+                    for v in series.tolist()
+                ]
+            converted.append(values)
+        return list(zip(*converted))
+
+    def _bulk_write(self, conn, table, query, rows):
+        """Runs one executemany in a single transaction and records its throughput."""
+        if not rows:
+            return
+        start = time.perf_counter()
+        conn.executemany(query, rows)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        with DatabaseManager._stats_lock:
+            totals = DatabaseManager._write_stats.setdefault(table, [0, 0.0])
+            totals[0] += len(rows)
+            totals[1] += elapsed
+        logger.debug(f"[DatabaseManager] {table}: upserted {len(rows)} rows in {elapsed:.3f}s "
+                     f"({len(rows) / elapsed if elapsed > 0 else float('inf'):.0f} rows/s)")
+
+    @classmethod
+    def get_write_stats(cls):
+        """
+        Returns cumulative bulk-write throughput per table for this process.
+
+        Returns:
+            dict: {table: {'rows': int, 'seconds': float, 'rows_per_sec': float}}
+        """
+        with cls._stats_lock:
+            return {
+                table: {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds > 0 else 0.0}
+                for table, (rows, seconds) in cls._write_stats.items()
+            }
+
+    @classmethod
+    def reset_write_stats(cls):
+        with cls._stats_lock:
+            cls._write_stats.clear()
+
+    _TRADE_COLUMNS = ['trade_id', 'pattern_id', 'symbol', 'underlying_symbol', 'instrument_key', 'side',
+                      'entry_time', 'entry_price', 'exit_time', 'exit_price', 'stop_loss', 'take_profit',
+                      'sl_price', 'tp_price', 'quantity', 'status', 'exit_reason', 'outcome', 'pnl']
+    _TRADE_UPSERT = f"""
+        INSERT OR REPLACE INTO trades ({', '.join(_TRADE_COLUMNS)})
+        VALUES ({', '.join('?' * len(_TRADE_COLUMNS))})
+    """
+
     def store_trade(self, trade_data: dict):
         """
         Stores or updates a trade in the database.
         """
-        with self._lock:
-            query = '''
-                INSERT OR REPLACE INTO trades (
-                    trade_id, pattern_id, symbol, instrument_key, side, entry_time, entry_price,
-                    exit_time, exit_price, stop_loss, take_profit, sl_price, tp_price,
-                    quantity, status, exit_reason, outcome, pnl
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            '''
-            params = (
-                trade_data.get('trade_id'),
-                trade_data.get('pattern_id'),
-                trade_data.get('symbol'),
-                trade_data.get('instrument_key'),
-                trade_data.get('side'),
-                trade_data.get('entry_time'),
-                trade_data.get('entry_price'),
-                trade_data.get('exit_time'),
-                trade_data.get('exit_price'),
-                trade_data.get('stop_loss'),
-                trade_data.get('take_profit'),
-                trade_data.get('sl_price'),
-                trade_data.get('tp_price'),
-                trade_data.get('quantity'),
-                trade_data.get('status', 'OPEN'),
-                trade_data.get('exit_reason'),
-                trade_data.get('outcome'),
-                trade_data.get('pnl')
-            )
-            self._execute_query(query, params, commit=True)
+        self.store_trades([trade_data])
 
-    def store_historical_candles(self, symbol, exchange, interval, candles_df):
+    def store_trades(self, trades):
         """
-        Stores historical candle data in the database.
-        Uses INSERT OR REPLACE to handle duplicate entries based on the primary key.
+        Stores or updates several trades in one transaction.
+
+        Args:
+            trades: Iterable of trade dicts keyed by column name; a missing status defaults to 'OPEN'.
         """
+        rows = [tuple(trade_data.get('status', 'OPEN') if col == 'status' else trade_data.get(col)
+                      for col in self._TRADE_COLUMNS) for trade_data in trades]
         with self._lock:
-            from python_engine.utils.symbol_master import MASTER as SymbolMaster
-            instrument_key = SymbolMaster.get_upstox_key(symbol)
-            if not instrument_key:
-                instrument_key = symbol  # Fallback for symbols not in master
-
             with self as db:
-                df_to_insert = candles_df.copy()
-                df_to_insert['symbol'] = instrument_key
-                df_to_insert['exchange'] = exchange
-                df_to_insert['interval'] = interval
+                self._bulk_write(db.conn, 'trades', self._TRADE_UPSERT, rows)
+
+    _CANDLE_COLUMNS = ['symbol', 'exchange', 'interval', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi', 'ts_min']
+    _CANDLE_KEY = ['symbol', 'exchange', 'interval', 'timestamp']
+    # We protect OI and Volume by only updating them if the new value is > 0
+    _CANDLE_UPSERT = f"""
+        INSERT INTO historical_candles ({', '.join(_CANDLE_COLUMNS)})
+        VALUES ({', '.join('?' * len(_CANDLE_COLUMNS))})
+        ON CONFLICT ({', '.join(_CANDLE_KEY)}) DO UPDATE SET
+            open = excluded.open,
+            high = excluded.high,
+            low = excluded.low,
+            close = excluded.close,
+            volume = CASE WHEN excluded.volume > 0 THEN excluded.volume ELSE historical_candles.volume END,
+            oi = CASE WHEN excluded.oi > 0 THEN excluded.oi ELSE historical_candles.oi END,
+            ts_min = excluded.ts_min
+    """
+
+    def _prepare_candle_rows(self, symbol, exchange, interval, candles_df):
+        """Resolves the storage key and normalizes one instrument's candles into upsert rows."""
+        from python_engine.utils.symbol_master import MASTER as SymbolMaster
+        instrument_key = SymbolMaster.get_upstox_key(symbol)
+        if not instrument_key:
+            instrument_key = symbol  # Fallback for symbols not in master
+
+        df_to_insert = candles_df.copy()
+        df_to_insert['symbol'] = instrument_key
+        df_to_insert['exchange'] = exchange
+        df_to_insert['interval'] = interval
+
+        # Data Type Coercion and Formatting
+        df_to_insert = self._normalize_df_timestamps(df_to_insert)
+        if 'oi' not in df_to_insert.columns:
+            df_to_insert['oi'] = 0
+        df_to_insert['oi'] = pd.to_numeric(df_to_insert['oi'], errors='coerce').fillna(0).astype(int)
+        for col in ['open', 'high', 'low', 'close']:
+             df_to_insert[col] = pd.to_numeric(df_to_insert[col], errors='coerce')
+        df_to_insert['volume'] = pd.to_numeric(df_to_insert['volume'], errors='coerce').fillna(0).astype(int)
+
+        df_to_insert['ts_min'] = self._epoch_minutes(df_to_insert['timestamp'])
+
+        # First occurrence of a duplicated key wins, as with the old INSERT OR IGNORE path
+        df_to_insert = df_to_insert[self._CANDLE_COLUMNS].drop_duplicates(subset=self._CANDLE_KEY, keep='first')
+        return self._to_db_rows(df_to_insert, self._CANDLE_COLUMNS)
+
+    def store_historical_candles(self, symbol, exchange, interval, candles_df):
+        """
+        Stores historical candle data in the database.
+        Upserts on the primary key; volume and oi are only overwritten when the new value is > 0.
 
-                # Data Type Coercion and Formatting
-                df_to_insert = self._normalize_df_timestamps(df_to_insert)
-                if 'oi' not in df_to_insert.columns:
-                    df_to_insert['oi'] = 0
-                df_to_insert['oi'] = pd.to_numeric(df_to_insert['oi'], errors='coerce').fillna(0).astype(int)
-                for col in ['open', 'high', 'low', 'close']:
-                     df_to_insert[col] = pd.to_numeric(df_to_insert[col], errors='coerce')
-                df_to_insert['volume'] = pd.to_numeric(df_to_insert['volume'], errors='coerce').fillna(0).astype(int)
+        Returns:
+            bool: False if the transaction failed and was rolled back.
+        """
+        return self.store_historical_candles_batch([(symbol, exchange, interval, candles_df)])
 
+    def store_historical_candles_batch(self, batches):
+        """
+        Stores candles of several instruments in one transaction.
 
-                table_cols = ['symbol', 'exchange', 'interval', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi']
-                df_to_insert = df_to_insert[table_cols]
+        Args:
+            batches: Iterable of (symbol, exchange, interval, candles_df) tuples.
 
+        Returns:
+            bool: False if the transaction failed and was rolled back.
+        """
+        with self._lock:
+            rows = []
+            for symbol, exchange, interval, candles_df in batches:
+                if candles_df is None or candles_df.empty:
+                    continue
                 try:
-                    # Use to_sql with a temporary table for robust insertion
-                    df_to_insert.to_sql('temp_historical_candles', db.conn, if_exists='replace', index=False)
-
-                    # Compatible Upsert Pattern (Works on SQLite < 3.24)
-                    # 1. Update existing rows with data from temp table
-                    # We protect OI and Volume by only updating them if the new value is > 0
-                    update_query = f"""
-                        UPDATE historical_candles
-                        SET
-                            open = (SELECT t.open FROM temp_historical_candles t WHERE t.symbol = historical_candles.symbol AND t.exchange = historical_candles.exchange AND t.interval = historical_candles.interval AND t.timestamp = historical_candles.timestamp),
-                            high = (SELECT t.high FROM temp_historical_candles t WHERE t.symbol = historical_candles.symbol AND t.exchange = historical_candles.exchange AND t.interval = historical_candles.interval AND t.timestamp = historical_candles.timestamp),
-                            low = (SELECT t.low FROM temp_historical_candles t WHERE t.symbol = historical_candles.symbol AND t.exchange = historical_candles.exchange AND t.interval = historical_candles.interval AND t.timestamp = historical_candles.timestamp),
-                            close = (SELECT t.close FROM temp_historical_candles t WHERE t.symbol = historical_candles.symbol AND t.exchange = historical_candles.exchange AND t.interval = historical_candles.interval AND t.timestamp = historical_candles.timestamp),
-                            volume = COALESCE((SELECT t.volume FROM temp_historical_candles t WHERE t.symbol = historical_candles.symbol AND t.exchange = historical_candles.exchange AND t.interval = historical_candles.interval AND t.timestamp = historical_candles.timestamp AND t.volume > 0), historical_candles.volume),
-                            oi = COALESCE((SELECT t.oi FROM temp_historical_candles t WHERE t.symbol = historical_candles.symbol AND t.exchange = historical_candles.exchange AND t.interval = historical_candles.interval AND t.timestamp = historical_candles.timestamp AND t.oi > 0), historical_candles.oi)
-                        WHERE EXISTS (
-                            SELECT 1 FROM temp_historical_candles t
-                            WHERE t.symbol = historical_candles.symbol AND t.exchange = historical_candles.exchange AND t.interval = historical_candles.interval AND t.timestamp = historical_candles.timestamp
-                        )
-                    """
-                    db.conn.execute(update_query)
-
-                    # 2. Insert new rows that don't exist yet
-                    insert_query = f"""
-                        INSERT OR IGNORE INTO historical_candles ({', '.join(table_cols)})
-                        SELECT {', '.join(table_cols)} FROM temp_historical_candles
-                    """
-                    db.conn.execute(insert_query)
-                    db.conn.commit()
+                    rows.extend(self._prepare_candle_rows(symbol, exchange, interval, candles_df))
+                except Exception as e:
+                    print(f"Error preparing historical candles for {symbol}: {e}")
 
+            with self as db:
+                try:
+                    self._bulk_write(db.conn, 'historical_candles', self._CANDLE_UPSERT, rows)
                 except Exception as e:
-                    print(f"Error storing historical candles for {symbol}: {e}")
+                    print(f"Error storing historical candles: {e}")
                     db.conn.rollback()
-                finally:
-                    # Clean up the temporary table
-                    db.conn.execute("DROP TABLE IF EXISTS temp_historical_candles")
+                    return False
+        return True
 
     def get_historical_candles(self, symbol, exchange, interval, from_date, to_date):
         from python_engine.utils.symbol_master import MASTER as SymbolMaster
@@ -341,18 +633,53 @@ class DatabaseManager:
             instrument_key = symbol # Fallback
 
         # Ensure the date range covers the specific time if provided
-        start_date_str = self._normalize_timestamp(from_date)
-        end_date_str = self._normalize_timestamp(to_date, floor=False)
+        start_min, end_min = self._minute_range(from_date, to_date)
 
-        with self as db:
+        with self.reader() as conn:
             query = """
                 SELECT * FROM historical_candles
-                WHERE symbol = ? AND exchange = ? AND interval = ? AND timestamp BETWEEN ? AND ?
-                ORDER BY timestamp DESC
+                WHERE symbol = ? AND ts_min BETWEEN ? AND ? AND exchange = ? AND interval = ?
+                ORDER BY ts_min DESC
             """
-            return pd.read_sql_query(query, db.conn, params=(instrument_key, exchange, interval, start_date_str, end_date_str))
+            return pd.read_sql_query(query, conn, params=(instrument_key, start_min, end_min, exchange, interval))
+
+    _CANDLE_ARRAY_COLUMNS = ('ts_min', 'open', 'high', 'low', 'close', 'volume')
+
+    def get_candle_arrays(self, instrument_key, for_date, since_min=None, exchange='NSE', interval='1m'):
+        """
+        One day of candles as aligned numpy columns, oldest first, without building a DataFrame.
+
+        Args:
+            instrument_key (str): Stored candle symbol (instrument key).
+            for_date (str): Trading date as YYYY-MM-DD.
+            since_min (int, optional): Only bars with ts_min >= this (the last bar a client has is re-sent).
+
+        Returns:
+            dict: 'ts_min' (int64) and 'open', 'high', 'low', 'close', 'volume' (float64) arrays.
+        """
+        start_min, end_min = self._day_minute_range(for_date)
+        if since_min is not None:
+            start_min = max(start_min, int(since_min))
+        with self.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT {', '.join(self._CANDLE_ARRAY_COLUMNS)} FROM historical_candles
+                WHERE symbol = ? AND ts_min BETWEEN ? AND ? AND exchange = ? AND interval = ?
+                ORDER BY ts_min ASC
+            """, (instrument_key, start_min, end_min, exchange, interval)).fetchall()
+        # Transposed so every column is contiguous (orjson serializes those directly)
+        values = np.ascontiguousarray(np.array(rows, dtype=np.float64).reshape(len(rows), len(self._CANDLE_ARRAY_COLUMNS)).T)
+        arrays = dict(zip(self._CANDLE_ARRAY_COLUMNS, values))
+        arrays['ts_min'] = arrays['ts_min'].astype(np.int64)
+        arrays['volume'] = np.nan_to_num(arrays['volume'])
+        return arrays
 
     def store_option_chain(self, symbol, option_chain_df, date=None):
+        """
+        Upserts option chain rows for a symbol. A row without a side's instrument key keeps the stored one.
+
+        Returns:
+            bool: False if the write failed and was rolled back.
+        """
         with self._lock:
             with self as db:
                 # If date is provided, use it for deletion scope
@@ -368,45 +695,100 @@ class DatabaseManager:
 
                     # Ensure timestamp is string for DB comparison and normalized
                     df_to_insert = self._normalize_df_timestamps(df_to_insert)
-
-                    # Use temp table for merging
-                    df_to_insert.to_sql('temp_option_chain', db.conn, if_exists='replace', index=False)
+                    df_to_insert['ts_min'] = self._epoch_minutes(df_to_insert['timestamp'])
 
                     cols = ['symbol', 'timestamp', 'strike', 'expiry', 'call_oi_chg', 'put_oi_chg',
                             'call_instrument_key', 'put_instrument_key', 'call_oi', 'put_oi',
                             'call_ltp', 'put_ltp', 'call_iv', 'put_iv', 'call_delta', 'put_delta',
-                            'call_theta', 'put_theta', 'call_trend', 'put_trend']
+                            'call_theta', 'put_theta', 'call_trend', 'put_trend', 'ts_min']
                     actual_cols = [c for c in cols if c in df_to_insert.columns]
+                    key_cols = ['symbol', 'timestamp', 'strike']
+                    df_to_insert = df_to_insert[actual_cols].drop_duplicates(subset=key_cols, keep='first')
 
-                    # Compatible Upsert for option_chain_data
-                    update_query = f"""
-                        UPDATE option_chain_data
-                        SET {", ".join([f"{c} = (SELECT t.{c} FROM temp_option_chain t WHERE t.symbol = option_chain_data.symbol AND t.timestamp = option_chain_data.timestamp AND t.strike = option_chain_data.strike)" for c in actual_cols if c not in ['symbol', 'timestamp', 'strike']])}
-                        WHERE EXISTS (SELECT 1 FROM temp_option_chain t WHERE t.symbol = option_chain_data.symbol AND t.timestamp = option_chain_data.timestamp AND t.strike = option_chain_data.strike)
-                    """
-                    db.conn.execute(update_query)
-
-                    insert_query = f"""
-                        INSERT OR IGNORE INTO option_chain_data ({', '.join(actual_cols)})
-                        SELECT {', '.join(actual_cols)} FROM temp_option_chain
-                    """
-                    db.conn.execute(insert_query)
-                    db.conn.commit()
+                    self._bulk_write(db.conn, 'option_chain_data',
+                                     self._upsert_query('option_chain_data', actual_cols, key_cols,
+                                                        keep_cols=('call_instrument_key', 'put_instrument_key')),
+                                     self._to_db_rows(df_to_insert, actual_cols))
                 except Exception as e:
                     print(f"Error storing option chain for {symbol}: {e}")
                     db.conn.rollback()
-                finally:
-                    db.conn.execute("DROP TABLE IF EXISTS temp_option_chain")
+                    return False
+        return True
+
+    _CHAIN_COPY_COLUMNS = ('timestamp', 'strike', 'expiry', 'call_oi_chg', 'put_oi_chg', 'call_instrument_key',
+                           'put_instrument_key', 'call_oi', 'put_oi', 'ts_min')
+
+    def copy_option_chain(self, from_symbol, to_symbol, for_date):
+        """
+        Copies one day's option chain rows stored under `from_symbol` to `to_symbol`, replacing existing rows.
+
+        Returns:
+            bool: False if the copy failed and was rolled back.
+        """
+        columns = ', '.join(self._CHAIN_COPY_COLUMNS)
+        with self._lock:
+            with self as db:
+                try:
+                    db.conn.execute(f"""
+                        INSERT OR REPLACE INTO option_chain_data (symbol, {columns})
+                        SELECT ?, {columns} FROM option_chain_data
+                        WHERE symbol = ? AND ts_min BETWEEN ? AND ?
+                    """, (to_symbol, from_symbol, *self._day_minute_range(for_date)))
+                    db.conn.commit()
+                except Exception as e:
+                    print(f"Error copying option chain from {from_symbol} to {to_symbol}: {e}")
+                    db.conn.rollback()
+                    return False
+        return True
 
     def get_option_chain(self, symbol, for_date):
-        with self as db:
-            query = "SELECT * FROM option_chain_data WHERE symbol = ? AND DATE(timestamp) = ?"
-            return pd.read_sql_query(query, db.conn, params=(symbol, for_date))
+        with self.reader() as conn:
+            query = "SELECT * FROM option_chain_data WHERE symbol = ? AND ts_min BETWEEN ? AND ?"
+            return pd.read_sql_query(query, conn, params=(symbol, *self._day_minute_range(for_date)))
+
+    def get_option_chain_contracts(self, symbol, for_date):
+        """One day's (ts_min, expiry, strike, call/put instrument key) rows in time order, without the market data."""
+        with self.reader() as conn:
+            query = """
+                SELECT ts_min, expiry, strike, call_instrument_key, put_instrument_key FROM option_chain_data
+                WHERE symbol = ? AND ts_min BETWEEN ? AND ?
+                ORDER BY ts_min ASC, strike ASC
+            """
+            return pd.read_sql_query(query, conn, params=(symbol, *self._day_minute_range(for_date)))
+
+    def get_previous_option_chain_day(self, symbol, before_date):
+        """Latest date (YYYY-MM-DD) before `before_date` with stored option chain rows, or None."""
+        with self.reader() as conn:
+            row = conn.execute("SELECT MAX(ts_min) FROM option_chain_data WHERE symbol = ? AND ts_min < ?",
+                               (symbol, self._day_minute_range(before_date)[0])).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0] * 60, unit='s').strftime('%Y-%m-%d')
+
+    def get_option_chain_range(self, symbol, from_date, to_date):
+        start_min, end_min = self._minute_range(from_date, to_date)
+
+        with self.reader() as conn:
+            query = """
+                SELECT * FROM option_chain_data
+                WHERE symbol = ? AND ts_min BETWEEN ? AND ?
+                ORDER BY ts_min ASC, strike ASC
+            """
+            return pd.read_sql_query(query, conn, params=(symbol, start_min, end_min))
 
     def get_instrument_master(self):
-        with self as db:
+        with self.reader() as conn:
             query = "SELECT * FROM instrument_master"
-            return pd.read_sql_query(query, db.conn)
+            return pd.read_sql_query(query, conn)
+
+    def get_instrument_master_signature(self):
+        """Cheap fingerprint of instrument_master (one aggregate scan); None if the table is missing."""
+        try:
+            with self.reader() as conn:
+                row = conn.execute("SELECT count(*), total(exchange_token), max(instrument_key) FROM instrument_master").fetchone()
+        except Exception:
+            return None
+        return tuple(row) if row and row[0] else None
 
     def store_instrument_master(self, df):
         with self._lock:
@@ -422,14 +804,44 @@ class DatabaseManager:
                 db.conn.commit()
 
     def get_holidays(self):
-        with self as db:
-            cursor = db.conn.cursor()
+        with self.reader() as conn:
+            cursor = conn.cursor()
             cursor.execute("SELECT holiday_date FROM holidays")
             return [row[0] for row in cursor.fetchall()]
 
+    def get_backfill_checkpoints(self, symbol, trading_date):
+        """
+        Returns the last stored backfill slot ("HH:MM") per expiry for a symbol and day.
+        """
+        with self.reader() as conn:
+            rows = conn.execute("SELECT expiry, last_slot FROM backfill_checkpoints WHERE symbol = ? AND trading_date = ?",
+                                (symbol, trading_date)).fetchall()
+        return {expiry: last_slot for expiry, last_slot in rows}
+
+    def store_backfill_checkpoints(self, symbol, trading_date, slots_by_expiry):
+        """
+        Records the last stored backfill slot per expiry for a symbol and day.
+        """
+        if not slots_by_expiry:
+            return
+        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            with self as db:
+                db.conn.executemany("""
+                    INSERT INTO backfill_checkpoints (symbol, trading_date, expiry, last_slot, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (symbol, trading_date, expiry) DO UPDATE SET
+                        last_slot = MAX(last_slot, excluded.last_slot),
+                        updated_at = excluded.updated_at
+                """, [(symbol, trading_date, expiry, slot, updated_at) for expiry, slot in slots_by_expiry.items()])
+                db.conn.commit()
+
     def store_market_stats(self, symbol, stats_df):
         """
         Stores enriched market statistics in the database.
+
+        Returns:
+            bool: False if the write failed and was rolled back.
         """
         with self._lock:
             with self as db:
@@ -441,42 +853,32 @@ class DatabaseManager:
                 # df_to_insert = self._normalize_df_timestamps(df_to_insert)
 
                 try:
-                    df_to_insert.to_sql('temp_market_stats', db.conn, if_exists='replace', index=False)
-
-                    cols = ['symbol', 'timestamp', 'pcr', 'pcr_velocity', 'advances', 'declines', 'oi_wall_above', 'oi_wall_below', 'call_oi', 'put_oi', 'smart_trend']
+                    df_to_insert['ts_min'] = self._epoch_minutes(df_to_insert['timestamp'])
+                    cols = ['symbol', 'timestamp', 'pcr', 'pcr_velocity', 'advances', 'declines', 'oi_wall_above', 'oi_wall_below', 'call_oi', 'put_oi', 'smart_trend', 'ts_min']
                     # filter columns that exist in df
                     actual_cols = [c for c in cols if c in df_to_insert.columns]
+                    key_cols = ['symbol', 'timestamp']
+                    df_to_insert = df_to_insert[actual_cols].drop_duplicates(subset=key_cols, keep='first')
 
-                    update_query = f"""
-                        UPDATE market_stats
-                        SET {", ".join([f"{c} = (SELECT t.{c} FROM temp_market_stats t WHERE t.symbol = market_stats.symbol AND t.timestamp = market_stats.timestamp)" for c in actual_cols if c not in ['symbol', 'timestamp']])}
-                        WHERE EXISTS (SELECT 1 FROM temp_market_stats t WHERE t.symbol = market_stats.symbol AND t.timestamp = market_stats.timestamp)
-                    """
-                    db.conn.execute(update_query)
-
-                    insert_query = f"""
-                        INSERT OR IGNORE INTO market_stats ({', '.join(actual_cols)})
-                        SELECT {', '.join(actual_cols)} FROM temp_market_stats
-                    """
-                    db.conn.execute(insert_query)
-                    db.conn.commit()
+                    self._bulk_write(db.conn, 'market_stats',
+                                     self._upsert_query('market_stats', actual_cols, key_cols),
+                                     self._to_db_rows(df_to_insert, actual_cols))
                 except Exception as e:
                     print(f"Error storing market stats for {symbol}: {e}")
                     db.conn.rollback()
-                finally:
-                    db.conn.execute("DROP TABLE IF EXISTS temp_market_stats")
+                    return False
+        return True
 
     def get_market_stats(self, symbol, from_date, to_date):
         """
         Retrieves market statistics for a given symbol and date range.
         """
-        start_date_str = self._normalize_timestamp(from_date)
-        end_date_str = self._normalize_timestamp(to_date, floor=False)
+        start_min, end_min = self._minute_range(from_date, to_date)
 
-        with self as db:
+        with self.reader() as conn:
             query = """
                 SELECT * FROM market_stats
-                WHERE symbol = ? AND timestamp BETWEEN ? AND ?
+                WHERE symbol = ? AND ts_min BETWEEN ? AND ?
                 ORDER BY timestamp ASC
             """
-            return pd.read_sql_query(query, db.conn, params=(symbol, start_date_str, end_date_str))
+            return pd.read_sql_query(query, conn, params=(symbol, start_min, end_min))
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+from data_sourcing.data_manager import DataManager
+from python_engine.utils.math_engine import MathEngine
+
+RISK_FREE_RATE = 0.1
+
+
+def enrich_option_chain(symbol: str, index_candles: pd.DataFrame,
+                        chain_df: pd.DataFrame) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Computes IV, Greeks, OI trends and per-snapshot market stats for one day.
+
+    Pure function of its inputs (no I/O), so it can run in a worker process.
+
+    Args:
+        symbol (str): Canonical symbol of the underlying.
+        index_candles (pd.DataFrame): The day's 1-minute index candles.
+        chain_df (pd.DataFrame): The day's option_chain_data rows.
+
+    Returns:
+        Optional[Tuple[pd.DataFrame, pd.DataFrame]]: (enriched chain rows,
+        market stats rows), or None when there is nothing to enrich.
+    """
+    if index_candles is None or index_candles.empty or chain_df is None or chain_df.empty:
+        return None
+
+    # Use vectorized lookups
+    index_ts = pd.to_datetime(index_candles['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    index_map = dict(zip(index_ts, index_candles['close']))
+    index_open_map = dict(zip(index_ts, index_candles['open']))
+
+    df = chain_df.copy()
+    df['timestamp_dt'] = pd.to_datetime(df['timestamp'])
+    df['ts_str'] = df['timestamp_dt'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    df = df.sort_values(['timestamp_dt', 'strike'])
+
+    # Vectorized 1-minute OI delta calculation
+    df['call_oi_1m'] = df.groupby('strike')['call_oi'].diff().fillna(0)
+    df['put_oi_1m'] = df.groupby('strike')['put_oi'].diff().fillna(0)
+
+    # Snapshots without a matching index candle are skipped
+    df['spot'] = df['ts_str'].map(index_map)
+    df = df[df['spot'].notna()].copy()
+    if df.empty:
+        return None
+    spot_open = df['ts_str'].map(index_open_map).fillna(0)
+    price_dir = np.where(spot_open != 0, np.sign(df['spot'] - spot_open), 0)
+    price_dir = np.nan_to_num(price_dir)
+
+    # Time to expiry (years) uses each snapshot's first listed expiry, as before
+    first_expiry = df.drop_duplicates('ts_str').set_index('ts_str')['expiry'] if 'expiry' in df.columns else pd.Series(dtype=object)
+    expiry_dt = pd.to_datetime(df['ts_str'].map(first_expiry).replace('', None), errors='coerce')
+    expiry_dt = expiry_dt.dt.normalize() + pd.Timedelta(hours=15, minutes=30)
+    T = ((expiry_dt - df['timestamp_dt']).dt.total_seconds() / (365 * 24 * 3600)).fillna(0).clip(lower=0).to_numpy()
+
+    # IV and Greeks for every contract of the day in one batch per side
+    spot = df['spot'].to_numpy(dtype=float)
+    strike = df['strike'].to_numpy(dtype=float)
+    for side, option_type, direction in (('call', 'CE', price_dir), ('put', 'PE', -price_dir)):
+        ltp = df[f'{side}_ltp'].fillna(0).to_numpy(dtype=float)
+        iv = MathEngine.calculate_iv_batch(ltp, spot, strike, T, RISK_FREE_RATE, option_type)
+        greeks = MathEngine.calculate_greeks_batch(spot, strike, T, RISK_FREE_RATE, iv, option_type)
+        df[f'{side}_iv'] = iv
+        df[f'{side}_delta'] = greeks['delta']
+        df[f'{side}_theta'] = greeks['theta']
+        df[f'{side}_trend'] = MathEngine.get_smart_trend_batch(direction, df[f'{side}_oi_1m'].to_numpy(dtype=float))
+
+    # Per-snapshot aggregates
+    snapshots = df.groupby('ts_str', sort=True)
+    stats_df = pd.DataFrame({
+        'call_oi': snapshots['call_oi'].sum(),
+        'put_oi': snapshots['put_oi'].sum()
+    })
+    stats_df['pcr'] = np.where(stats_df['call_oi'] > 0, (stats_df['put_oi'] / stats_df['call_oi'].where(stats_df['call_oi'] > 0)).round(4), 1.0)
+    stats_df['pcr_velocity'] = stats_df['pcr'].diff().round(4).fillna(0.0)
+
+    # OI walls: strike of the largest OI per snapshot (lowest strike on ties)
+    for side, wall in (('call', 'oi_wall_above'), ('put', 'oi_wall_below')):
+        top = df.sort_values(['ts_str', f'{side}_oi'], ascending=[True, False], kind='stable').drop_duplicates('ts_str')
+        stats_df[wall] = np.where(stats_df[f'{side}_oi'] > 0, top.set_index('ts_str')['strike'].reindex(stats_df.index), 0)
+
+    # Market-wide Smart Trend: most common non-neutral trend across options near ATM (ties go alphabetically)
+    atm_strike = DataManager.calculate_atm_strike(symbol, df['spot'])
+    atm_options = df[(df['strike'] - atm_strike).abs() <= 100]
+    trends = pd.concat([
+        atm_options[['ts_str', 'call_trend']].set_axis(['ts_str', 'trend'], axis=1),
+        atm_options[['ts_str', 'put_trend']].set_axis(['ts_str', 'trend'], axis=1)
+    ])
+    trends = trends[trends['trend'] != 'Neutral']
+    trend_counts = trends.groupby(['ts_str', 'trend']).size().rename('n').reset_index()
+    dominant = trend_counts.sort_values(['ts_str', 'n'], ascending=[True, False], kind='stable').drop_duplicates('ts_str')
+    stats_df['smart_trend'] = dominant.set_index('ts_str')['trend'].reindex(stats_df.index).fillna('Neutral')
+
+    stats_df['advances'] = 0
+    stats_df['declines'] = 0
+    stats_df = stats_df.rename_axis('timestamp').reset_index()
+
+    return df.drop(columns='spot').reset_index(drop=True), stats_df
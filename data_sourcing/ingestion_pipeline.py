@@ -0,0 +1,387 @@
+import functools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from data_sourcing.enrichment import enrich_option_chain
+from python_engine.utils.symbol_master import MASTER as SymbolMaster
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _WriterBoundDb:
+    """
+    DatabaseManager view for fetch-stage code such as the Trendlyne backfill.
+
+    Reads go straight to the database; store_* calls are handed to the
+    pipeline's writer thread and block until it has run them.
+    """
+
+    def __init__(self, pipeline: "IngestionPipeline"):
+        self._pipeline = pipeline
+
+    def __getattr__(self, name):
+        attr = getattr(self._pipeline.db_manager, name)
+        if not name.startswith('store_'):
+            return attr
+        return lambda *args, **kwargs: self._pipeline._write_sync(name, functools.partial(attr, *args, **kwargs))
+
+
+class IngestionPipeline:
+    """
+    Staged historical ingestion: fetch -> parse -> enrich -> write.
+
+    Remote calls (option-chain sourcing and per-contract candle downloads)
+    run on a bounded thread pool, each provider throttled by its shared
+    RateLimiter. Enrichment (IV, Greeks, stats) runs on a process pool.
+    Parsed candles and enrichment results go through a bounded queue to a
+    single writer thread, which batches candle frames from many contracts
+    into one transaction. The bounded queue applies backpressure to fetchers
+    when the database falls behind. Writes the fetch stage depends on (index
+    candles, Trendlyne chain snapshots) also run on the writer; the fetch
+    thread waits for them.
+
+    Attributes:
+        data_manager (DataManager): Remote fetch and local read access.
+        db_manager (DatabaseManager): SQLite storage.
+        fetch_workers (int): Concurrent remote fetches.
+        enrich_workers (int): Enrichment processes; 0 enriches inline.
+        write_batch_size (int): Candle frames per write transaction.
+    """
+
+    MIN_LOCAL_BARS = 100  # Contracts with at least this many stored bars are not re-fetched
+    WRITE_ATTEMPTS = 3  # Tries per write transaction before the writer moves on
+    WRITE_RETRY_DELAY = 0.5  # Seconds; multiplied by the attempt number
+
+    def __init__(self, data_manager, fetch_workers: int = 8, enrich_workers: int = 2,
+                 write_batch_size: int = 32, queue_size: int = 256):
+        """
+        Initializes the pipeline.
+
+        Args:
+            data_manager (DataManager): Shared data manager.
+            fetch_workers (int): Thread pool size for remote fetches.
+            enrich_workers (int): Process pool size for enrichment (0 = inline).
+            write_batch_size (int): Candle frames per write transaction.
+            queue_size (int): Capacity of the writer queue.
+        """
+        self.data_manager = data_manager
+        self.db_manager = data_manager.db_manager
+        self.fetch_workers = max(1, fetch_workers)
+        self.enrich_workers = max(0, enrich_workers)
+        self.write_batch_size = max(1, write_batch_size)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._counts = {'days': 0, 'candle_sets': 0, 'enriched_days': 0, 'skipped_keys': 0,
+                        'write_failures': 0, 'lost_candle_sets': 0, 'lost_enriched_days': 0}
+        self._counts_lock = threading.Lock()
+
+    def run(self, canonical_symbol: str, from_date: str, to_date: str,
+            full_options: bool = False, force: bool = False) -> Dict[str, int]:
+        """
+        Ingests index candles, option chains, option candles and stats for a date range.
+
+        Args:
+            canonical_symbol (str): Canonical symbol of the underlying.
+            from_date (str): Start date (YYYY-MM-DD).
+            to_date (str): End date (YYYY-MM-DD).
+            full_options (bool): Source full-day chains from Trendlyne snapshots.
+            force (bool): Re-process days that already have data.
+
+        Returns:
+            Dict[str, int]: Counters for processed days, written candle sets,
+            enriched days and contracts skipped because they were already stored,
+            plus failed write attempts and the candle sets / enriched days the
+            writer gave up on.
+        """
+        start = time.perf_counter()
+        start_dt = datetime.strptime(from_date, '%Y-%m-%d')
+        end_dt = datetime.strptime(to_date, '%Y-%m-%d')
+        bars_needed = ((end_dt - start_dt).days + 1) * 400
+
+        writer = threading.Thread(target=self._writer_loop, name="ingestion-writer", daemon=True)
+        writer.start()
+
+        enrich_pool = None
+        try:
+            # Stage 0: the index itself, written before anything that depends on it
+            self._source_index(canonical_symbol, start_dt, end_dt, bars_needed)
+            days = self._plan_days(canonical_symbol, start_dt, end_dt, force)
+            if not days:
+                return dict(self._counts)
+
+            if self.enrich_workers:
+                enrich_pool = ProcessPoolExecutor(max_workers=self.enrich_workers, mp_context=multiprocessing.get_context('spawn'))
+
+            with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="ingestion-fetch") as fetch_pool:
+                pending = {fetch_pool.submit(self._source_day, canonical_symbol, date_str, full_options, force): ('day', date_str) for date_str in days}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, date_str = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.error(f"    [{date_str}] {kind} stage failed: {e}")
+                            continue
+
+                        if kind == 'day':
+                            keys, index_candles, chain_df = result
+                            for key in keys:
+                                pending[fetch_pool.submit(self._fetch_candles, key, date_str)] = ('candles', date_str)
+                            if enrich_pool is not None:
+                                pending[enrich_pool.submit(enrich_option_chain, canonical_symbol, index_candles, chain_df)] = ('enrich', date_str)
+                            else:
+                                self._put_enriched(canonical_symbol, date_str, enrich_option_chain(canonical_symbol, index_candles, chain_df))
+                        elif kind == 'enrich':
+                            self._put_enriched(canonical_symbol, date_str, result)
+        finally:
+            if enrich_pool is not None:
+                enrich_pool.shutdown()
+            self._queue.put(_STOP)
+            writer.join()
+
+        logger.info(f"Pipeline finished {len(days)} day(s) in {time.perf_counter() - start:.1f}s: {self._counts}")
+        return dict(self._counts)
+
+    def _source_index(self, canonical_symbol: str, start_dt: datetime, end_dt: datetime, bars_needed: int) -> None:
+        """Fetches the range's index candles unless enough are stored, and waits for the writer to store them."""
+        local = self.db_manager.get_historical_candles(canonical_symbol, 'NSE', '1m', start_dt, end_dt)
+        if local is not None and len(local) >= bars_needed:
+            return
+        candles = self.data_manager.fetch_remote_candles(canonical_symbol, 'NSE', '1m', bars_needed, start_dt, end_dt)
+        if candles is None or candles.empty:
+            return
+        if not self._write_sync('index candles', self.db_manager.store_historical_candles_batch,
+                                [(canonical_symbol, 'NSE', '1m', candles)]):
+            logger.error(f"Writer gave up on the index candles of {canonical_symbol}.")
+            with self._counts_lock:
+                self._counts['lost_candle_sets'] += 1
+
+    def _plan_days(self, canonical_symbol: str, start_dt: datetime, end_dt: datetime, force: bool) -> List[str]:
+        """Business days in range, minus holidays and (unless forced) days already ingested."""
+        holidays = self.data_manager.holidays
+        days = []
+        for target_date in pd.date_range(start=start_dt.date(), end=end_dt.date(), freq='B'):
+            date_str = target_date.strftime('%Y-%m-%d')
+            if date_str in holidays:
+                continue
+            if not force:
+                existing_candles = self.db_manager.get_historical_candles(canonical_symbol, 'NSE', '1m', date_str, date_str)
+                if existing_candles is not None and not existing_candles.empty:
+                    existing_stats = self.db_manager.get_market_stats(canonical_symbol, date_str, date_str)
+                    if not existing_stats.empty and (existing_candles['oi'] > 0).any():
+                        logger.info(f"Skipping {date_str} - Data already exists.")
+                        continue
+            days.append(date_str)
+        return days
+
+    def _source_day(self, canonical_symbol: str, date_str: str,
+                    full_options: bool, force: bool = False) -> Tuple[Set[str], Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+        """
+        Fetch stage for one day: brings in the option chain and loads the enrichment inputs.
+
+        Returns:
+            Tuple: (option instrument keys to download, index candles, chain rows).
+        """
+        logger.info(f"Processing {date_str}...")
+        if full_options:
+            self._source_full_chain(canonical_symbol, date_str, force)
+        else:
+            self.data_manager.get_option_chain(canonical_symbol, date=date_str, mode='live')
+
+        index_candles = self.data_manager.get_historical_candles(canonical_symbol, from_date=date_str, to_date=date_str, mode='backtest')
+        chain_df = self.db_manager.get_option_chain(canonical_symbol, date_str)
+        keys = self.resolve_option_keys(canonical_symbol, index_candles, chain_df)
+        with self._counts_lock:
+            self._counts['days'] += 1
+        return keys, index_candles, chain_df
+
+    def _source_full_chain(self, canonical_symbol: str, date_str: str, force: bool = False) -> None:
+        """
+        Syncs full-day Trendlyne snapshots (resuming from checkpoints unless forced) under the canonical symbol.
+
+        The backfill fetches on this thread; its writes run on the writer thread.
+        """
+        logger.info(f"    - Syncing Full-Day Option Chain snapshots (Trendlyne)...")
+        try:
+            from backfill_trendlyne import backfill_index_volume_from_tv, backfill_options_day, generate_time_intervals
+            prefix = "NIFTY" if "NIFTY" in canonical_symbol.upper() and "BANK" not in canonical_symbol.upper() else "BANKNIFTY"
+            db = _WriterBoundDb(self)
+            backfill_index_volume_from_tv(db, prefix, date_str)
+            backfill_options_day(db, [prefix], date_str, generate_time_intervals(), resume=not force)
+
+            # Ensure all ingestion uses the standardized canonical symbol
+            if not self._write_sync('chain copy', self.db_manager.copy_option_chain, prefix, canonical_symbol, date_str):
+                logger.error(f"    - Copying {prefix} chain rows of {date_str} to {canonical_symbol} failed.")
+        except Exception as e:
+            logger.error(f"    - Trendlyne backfill failed: {e}")
+
+    @staticmethod
+    def resolve_option_keys(canonical_symbol: str, index_candles: Optional[pd.DataFrame],
+                            chain_df: Optional[pd.DataFrame]) -> Set[str]:
+        """
+        Instrument keys of the contracts near the day's traded range.
+
+        Strikes from two steps below the day's low ATM to two above its high
+        ATM are taken from the chain; keys missing from the chain are resolved
+        through SymbolMaster.
+
+        Args:
+            canonical_symbol (str): Underlying index canonical symbol.
+            index_candles (Optional[pd.DataFrame]): The day's index candles.
+            chain_df (Optional[pd.DataFrame]): The day's option_chain_data rows.
+
+        Returns:
+            Set[str]: Upstox instrument keys.
+        """
+        if index_candles is None or index_candles.empty or chain_df is None or chain_df.empty:
+            return set()
+
+        from data_sourcing.data_manager import DataManager
+        low_strike = DataManager.calculate_atm_strike(canonical_symbol, index_candles['low'].min())
+        high_strike = DataManager.calculate_atm_strike(canonical_symbol, index_candles['high'].max())
+        strike_step = 100 if "BANK" in canonical_symbol.upper() else 50
+        strikes = range(int(low_strike) - strike_step * 2, int(high_strike) + strike_step * 3, strike_step)
+
+        cols = ['strike', 'expiry', 'call_instrument_key', 'put_instrument_key']
+        df = chain_df[chain_df['strike'].isin(strikes)][[c for c in cols if c in chain_df.columns]].drop_duplicates()
+        unique_keys = set()
+        symbol_prefix = "BANKNIFTY" if "BANK" in canonical_symbol.upper() else "NIFTY"
+
+        for row in df.to_dict('records'):
+            call_key, put_key = row.get('call_instrument_key'), row.get('put_instrument_key')
+            if call_key: unique_keys.add(call_key)
+            if put_key: unique_keys.add(put_key)
+
+            # Resolve missing keys via SymbolMaster (High Performance)
+            if not call_key or not put_key:
+                if not row.get('expiry'): continue
+                expiry_dt = pd.to_datetime(row['expiry'])
+                expiry_day, expiry_month, expiry_year = expiry_dt.strftime('%d'), expiry_dt.strftime('%b').upper(), expiry_dt.strftime('%y')
+                for opt_type in ['CE', 'PE']:
+                    tsym = f"{symbol_prefix} {int(row['strike'])} {opt_type} {expiry_day} {expiry_month} {expiry_year}"
+                    key = SymbolMaster.get_upstox_key(tsym)
+                    if key: unique_keys.add(key)
+        return unique_keys
+
+    def _fetch_candles(self, key: str, date_str: str) -> None:
+        """Fetch + parse stage for one contract; the frame is handed to the writer."""
+        day = datetime.strptime(date_str, '%Y-%m-%d')
+        canonical_key = SymbolMaster.get_canonical_ticker(key)
+        local = self.db_manager.get_historical_candles(canonical_key, 'NSE', '1m', day, day)
+        if local is not None and len(local) >= self.MIN_LOCAL_BARS:
+            with self._counts_lock:
+                self._counts['skipped_keys'] += 1
+            return
+        candles = self.data_manager.fetch_remote_candles(canonical_key, 'NSE', '1m', self.MIN_LOCAL_BARS, day, day)
+        if candles is not None and not candles.empty:
+            self._queue.put(('candles', (canonical_key, 'NSE', '1m', candles)))
+
+    def _put_enriched(self, canonical_symbol: str, date_str: str, result) -> None:
+        if result is not None:
+            self._queue.put(('enriched', (canonical_symbol, date_str, *result)))
+
+    def _write_sync(self, kind: str, store, *args) -> bool:
+        """
+        Has the writer thread run one store call and waits for the result.
+
+        Candle frames queued earlier are flushed first, so writes keep their
+        queue order.
+
+        Returns:
+            bool: Whether the call succeeded (see _write).
+        """
+        done: Future = Future()
+        self._queue.put(('call', (kind, store, args, done)))
+        return done.result()
+
+    def _write(self, kind: str, store, *args) -> bool:
+        """
+        Runs one store call, retrying failed transactions with a growing delay.
+
+        Every failed attempt is counted in 'write_failures'.
+
+        Returns:
+            bool: True once a call succeeds, False after WRITE_ATTEMPTS failures.
+        """
+        for attempt in range(1, self.WRITE_ATTEMPTS + 1):
+            try:
+                if store(*args) is not False:
+                    return True
+                error = "transaction rolled back"
+            except Exception as e:
+                error = e
+            with self._counts_lock:
+                self._counts['write_failures'] += 1
+            logger.warning(f"Writer failed on {kind} (attempt {attempt}/{self.WRITE_ATTEMPTS}): {error}")
+            if attempt < self.WRITE_ATTEMPTS:
+                time.sleep(self.WRITE_RETRY_DELAY * attempt)
+        return False
+
+    def _writer_loop(self) -> None:
+        """
+        Single writer: batches candle frames and runs every other write in arrival order.
+
+        A candle batch whose transaction fails is kept and retried on the next
+        flush; only what still cannot be written when the pipeline stops is
+        counted as lost.
+        """
+        batch = []
+
+        def flush(final=False):
+            if not batch:
+                return
+            if self._write('candles', self.db_manager.store_historical_candles_batch, list(batch)):
+                with self._counts_lock:
+                    self._counts['candle_sets'] += len(batch)
+                batch.clear()
+            elif final:
+                logger.error(f"Writer gave up on {len(batch)} candle set(s).")
+                with self._counts_lock:
+                    self._counts['lost_candle_sets'] += len(batch)
+                batch.clear()
+
+        def store_enriched(symbol, date_str, chain_out, stats_df):
+            # One executemany upsert per table handles the whole day
+            return (self.db_manager.store_option_chain(symbol, chain_out, date=date_str) is not False
+                    and self.db_manager.store_market_stats(symbol, stats_df) is not False)
+
+        while True:
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                flush()
+                continue
+            if item is _STOP:
+                flush(final=True)
+                return
+
+            kind, payload = item
+            if kind == 'candles':
+                batch.append(payload)
+                if len(batch) >= self.write_batch_size:
+                    flush()
+            elif kind == 'call':
+                flush()
+                label, store, args, done = payload
+                try:
+                    done.set_result(self._write(label, store, *args))
+                except Exception as e:
+                    done.set_exception(e)
+            elif kind == 'enriched':
+                symbol, date_str, chain_out, stats_df = payload
+                if self._write('enriched', store_enriched, *payload):
+                    with self._counts_lock:
+                        self._counts['enriched_days'] += 1
+                    logger.info(f"      [OK] {date_str}: stored {len(stats_df)} market stats snapshots.")
+                else:
+                    logger.error(f"Writer gave up on the enrichment of {date_str}.")
+                    with self._counts_lock:
+                        self._counts['lost_enriched_days'] += 1
@@ -1,167 +1,294 @@
 import json
+import queue
+import re
+import threading
+import time
 import pandas as pd
 from datetime import datetime
 from data_sourcing.database_manager import DatabaseManager
 from python_engine.utils.symbol_master import MASTER as SymbolMaster
-import re
+
+_STOP = object()
+
+# Per-strike values parsed from the option feeds; expiry and instrument keys are kept separately
+_SIDE_VALUES = ['oi', 'ltp', 'iv', 'delta', 'theta']
+_CHAIN_VALUE_COLUMNS = [f"{side}_{v}" for v in _SIDE_VALUES for side in ('call', 'put')]
+_CHAIN_COLUMNS = ['symbol', 'timestamp', 'strike', 'expiry', 'call_instrument_key', 'put_instrument_key'] + _CHAIN_VALUE_COLUMNS
+
 
 class MongoParser:
-    def __init__(self, mongo_uri="mongodb://localhost:27017/"):
-        self.db_manager = DatabaseManager()
+    """
+    Streams raw Upstox full-feed snapshots into historical_candles and option_chain_data.
+
+    Documents are read in cursor batches with a projection. Each snapshot is
+    parsed into columnar buffers: an LTP bar per index key and one chain row
+    per (underlying, strike). Every `flush_every` snapshots the buffers are
+    handed to a writer thread, which upserts them in bulk while the next
+    batch is parsed. Rows that land on the same key (same instrument or
+    strike within one minute) keep the latest snapshot's values, exactly as
+    the per-snapshot upserts did.
+    """
+
+    PROJECTION = {'_id': 0, 'currentTs': 1, 'feeds': 1}
+
+    def __init__(self, mongo_uri="mongodb://localhost:27017/", flush_every=500, batch_size=1000, db_manager=None):
+        """
+        Args:
+            mongo_uri (str): MongoDB connection string (ignored when a collection is injected).
+            flush_every (int): Snapshots buffered per bulk write.
+            batch_size (int): Documents fetched per cursor round-trip.
+            db_manager (DatabaseManager): Storage backend (a default one when omitted).
+        """
+        self.db_manager = db_manager or DatabaseManager()
         self.mongo_uri = mongo_uri
-        SymbolMaster.initialize()
-
-    def parse_snapshot(self, snapshot_json):
-        """Parses a single MongoDB snapshot and stores it in the database."""
+        self.flush_every = max(1, flush_every)
+        self.batch_size = max(1, batch_size)
+        self._option_meta = {}  # instrument key -> (underlying, strike, 'call'/'put', expiry) or None
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._candles = {'key': [], 'timestamp': [], 'ltp': []}
+        self._chain = {col: [] for col in _CHAIN_COLUMNS}
+        self._pending = 0
+
+    def _option_contract(self, key):
+        """Parses an option key's trading symbol once, e.g. 'NIFTY 25550 PE 20 JAN 26'."""
+        if key in self._option_meta:
+            return self._option_meta[key]
+        meta = None
+        ticker = SymbolMaster.get_ticker_from_key(key)
+        match = re.match(r"^(.*?)\s+(\d+)\s+(CE|PE)\s+(.*)$", ticker) if ticker else None
+        if match:
+            expiry_str = match.group(4)
+            # Normalize expiry to YYYY-MM-DD
+            try:
+                expiry_iso = pd.to_datetime(expiry_str).strftime('%Y-%m-%d')
+            except Exception:
+                expiry_iso = expiry_str
+            meta = (match.group(1).strip(), float(match.group(2)), "call" if match.group(3) == "CE" else "put", expiry_iso)
+        self._option_meta[key] = meta
+        return meta
+
+    def _accumulate(self, snapshot_json):
+        """Parses one snapshot into the buffers; returns False if it carries no usable timestamp."""
         current_ts_val = snapshot_json.get('currentTs', 0)
         try:
             current_ts = int(current_ts_val)
         except (ValueError, TypeError):
             print(f"[MongoParser] Warning: Invalid currentTs value: {current_ts_val}")
-            return
+            return False
 
         if not current_ts:
-            return
-
-        dt = datetime.fromtimestamp(current_ts / 1000)
-        timestamp_str = dt.strftime('%Y-%m-%d %H:%M:%S')
-        date_str = dt.strftime('%Y-%m-%d')
+            return False
 
+        # Storage keys are per minute
+        timestamp_str = datetime.fromtimestamp(current_ts / 1000).strftime('%Y-%m-%d %H:%M:00')
         feeds = snapshot_json.get('feeds', {})
 
-        # 1. Identify relevant indices and store as candles
-        index_data = {}
+        # 1. Index LTPs become 1m candles (only LTP is available, so it fills OHLC)
+        candles = self._candles
+        underlying_chains = {}  # { underlying: { strike: row } }
         for key, feed in feeds.items():
             if "NSE_INDEX" in key:
-                name = key.split('|')[-1].upper()
                 ltpc = feed.get('fullFeed', {}).get('indexFF', {}).get('ltpc', {})
                 if ltpc:
-                    ltp = ltpc.get('ltp', 0)
-                    index_data[name] = ltp
-
-                    # Store as a candle to enable Greeks calculation later
-                    # Note: We only have LTP, so we use it for OHLC.
-                    index_df = pd.DataFrame([{
-                        'timestamp': timestamp_str,
-                        'open': ltp, 'high': ltp, 'low': ltp, 'close': ltp,
-                        'volume': 0, 'oi': 0
-                    }])
-                    self.db_manager.store_historical_candles(key, 'NSE', '1m', index_df)
-
-        # 2. Process Options
-        # Group by underlying
-        underlying_chains = {} # { underlying: { strike: { ... } } }
+                    candles['key'].append(key)
+                    candles['timestamp'].append(timestamp_str)
+                    candles['ltp'].append(ltpc.get('ltp', 0))
 
-        for key, feed in feeds.items():
-            if "NSE_FO" in key:
+            # 2. Options, grouped by underlying and strike
+            elif "NSE_FO" in key:
                 ff = feed.get('fullFeed', {}).get('marketFF', {})
                 if not ff: continue
-
-                # Resolve ticker
-                ticker = SymbolMaster.get_ticker_from_key(key)
-                if not ticker:
-                    # Fallback resolution or skip
-                    continue
-
-                # Parse ticker: e.g. "NIFTY 25550 PE 20 JAN 26" or "BANKNIFTY 59500 CE 20 JAN 26"
-                match = re.match(r"^(.*?)\s+(\d+)\s+(CE|PE)\s+(.*)$", ticker)
-                if not match: continue
-
-                underlying = match.group(1).strip()
-                strike = float(match.group(2))
-                opt_type = match.group(3)
-                expiry_str = match.group(4)
-
-                # Normalize expiry to YYYY-MM-DD
-                try:
-                    expiry_dt = pd.to_datetime(expiry_str)
-                    expiry_iso = expiry_dt.strftime('%Y-%m-%d')
-                except Exception:
-                    expiry_iso = expiry_str
-
-                if underlying not in underlying_chains:
-                    underlying_chains[underlying] = {}
-
-                if strike not in underlying_chains[underlying]:
-                    underlying_chains[underlying][strike] = {
-                        "strike": strike,
-                        "expiry": expiry_iso,
-                        "timestamp": timestamp_str
-                    }
-
-                s_data = underlying_chains[underlying][strike]
-
-                prefix = "call" if opt_type == "CE" else "put"
+                meta = self._option_contract(key)
+                if meta is None: continue
+                underlying, strike, prefix, expiry_iso = meta
+
+                strikes = underlying_chains.setdefault(underlying, {})
+                s_data = strikes.get(strike)
+                if s_data is None:
+                    s_data = strikes[strike] = {"expiry": expiry_iso}
                 s_data[f"{prefix}_oi"] = float(ff.get('oi', 0))
                 s_data[f"{prefix}_ltp"] = float(ff.get('ltpc', {}).get('ltp', 0))
                 s_data[f"{prefix}_instrument_key"] = key
-
                 greeks = ff.get('optionGreeks', {})
                 if greeks:
                     s_data[f"{prefix}_delta"] = float(greeks.get('delta', 0))
                     s_data[f"{prefix}_theta"] = float(greeks.get('theta', 0))
-
                 s_data[f"{prefix}_iv"] = float(ff.get('iv', 0))
 
-        # 3. Store in DB
-        for underlying, strikes_dict in underlying_chains.items():
-            canonical_underlying = "NSE|INDEX|" + underlying
-            df = pd.DataFrame(list(strikes_dict.values()))
-
-            # Fill missing columns with defaults to avoid NULLs
-            expected_cols = [
-                'call_oi', 'put_oi', 'call_ltp', 'put_ltp',
-                'call_delta', 'put_delta', 'call_theta', 'put_theta',
-                'call_iv', 'put_iv', 'call_oi_chg', 'put_oi_chg'
-            ]
-            for col in expected_cols:
-                if col not in df.columns:
-                    df[col] = 0.0
-                else:
-                    df[col] = df[col].fillna(0.0)
-
-            if 'call_trend' not in df.columns: df['call_trend'] = "Neutral"
-            if 'put_trend' not in df.columns: df['put_trend'] = "Neutral"
-
-            self.db_manager.store_option_chain(canonical_underlying, df, date=date_str)
-            print(f"[MongoParser] Stored snapshot for {canonical_underlying} at {timestamp_str} ({len(df)} strikes)")
-
-    def ingest_from_db(self, db_name="upstox_strategy_db", collection_name="raw_tick_data", query=None):
-        """Connects to MongoDB and iterates over documents to ingest data."""
+        chain = self._chain
+        for underlying, strikes in underlying_chains.items():
+            symbol = "NSE|INDEX|" + underlying
+            for strike, s_data in strikes.items():
+                chain['symbol'].append(symbol)
+                chain['timestamp'].append(timestamp_str)
+                chain['strike'].append(strike)
+                chain['expiry'].append(s_data['expiry'])
+                chain['call_instrument_key'].append(s_data.get('call_instrument_key'))
+                chain['put_instrument_key'].append(s_data.get('put_instrument_key'))
+                for col in _CHAIN_VALUE_COLUMNS:
+                    chain[col].append(s_data.get(col, 0.0))
+        self._pending += 1
+        return True
+
+    def _take_buffers(self):
+        buffers = (self._candles, self._chain, self._pending)
+        self._reset_buffers()
+        return buffers
+
+    def _write(self, candles, chain):
+        """
+        Bulk-upserts one flush: all index bars in one transaction, then one chain upsert per underlying.
+
+        Returns:
+            bool: False if any of the writes was rolled back.
+        """
+        ok = True
+        if candles['key']:
+            bars = pd.DataFrame(candles).drop_duplicates(['key', 'timestamp'], keep='last')
+            batches = []
+            for key, group in bars.groupby('key', sort=False):
+                ltp = group['ltp']
+                batches.append((key, 'NSE', '1m', pd.DataFrame({
+                    'timestamp': group['timestamp'], 'open': ltp, 'high': ltp, 'low': ltp, 'close': ltp,
+                    'volume': 0, 'oi': 0})))
+            ok = self.db_manager.store_historical_candles_batch(batches) is not False
+
+        if chain['symbol']:
+            df = pd.DataFrame(chain)
+            row_key = ['symbol', 'timestamp', 'strike']
+            # A later snapshot missing one side of a strike keeps the key seen earlier in the minute
+            keys = ['call_instrument_key', 'put_instrument_key']
+            df[keys] = df.groupby(row_key, sort=False)[keys].ffill()
+            df = df.drop_duplicates(row_key, keep='last')
+            df['call_oi_chg'] = df['put_oi_chg'] = 0.0
+            df['call_trend'] = df['put_trend'] = "Neutral"
+            for symbol, group in df.groupby('symbol', sort=False):
+                stored = self.db_manager.store_option_chain(symbol, group.drop(columns='symbol'),
+                                                            date=group['timestamp'].iloc[0][:10])
+                ok = stored is not False and ok
+        return ok
+
+    def parse_snapshot(self, snapshot_json):
+        """
+        Parses a single MongoDB snapshot and stores it in the database.
+
+        Returns:
+            bool: True if the snapshot was parsed and stored.
+        """
+        if not self._accumulate(snapshot_json):
+            return False
+        candles, chain, _ = self._take_buffers()
+        return self._write(candles, chain)
+
+    def _writer_loop(self, jobs, stats):
+        while True:
+            job = jobs.get()
+            if job is _STOP:
+                return
+            candles, chain, count = job
+            try:
+                written = self._write(candles, chain)
+            except Exception as e:
+                print(f"[MongoParser] Bulk write of {count} snapshots failed: {e}")
+                written = False
+            if written:
+                stats['written'] += count
+            else:
+                stats['failed'] += count
+                print(f"[MongoParser] Bulk write of {count} snapshots was not stored")
+
+    def ingest(self, documents):
+        """
+        Streams snapshots into the database, overlapping parsing with bulk writes.
+
+        Args:
+            documents (Iterable[dict]): Snapshots in currentTs order (cursor, list, generator).
+
+        Returns:
+            int: Number of snapshots stored. Snapshots in a flush whose write
+            failed are parsed but not counted.
+        """
+        start = time.perf_counter()
+        self._reset_buffers()
+        # Two flushes in flight at most: parsing runs ahead of the writer by one batch
+        jobs = queue.Queue(maxsize=1)
+        stats = {'written': 0, 'failed': 0}
+        writer = threading.Thread(target=self._writer_loop, args=(jobs, stats), name="mongo-writer", daemon=True)
+        writer.start()
+        count = 0
         try:
-            from pymongo import MongoClient
-            client = MongoClient(self.mongo_uri)
-            db = client[db_name]
-            collection = db[collection_name]
-
-            if query is None:
-                query = {} # Fetch all by default, or maybe filter by today?
-
-            cursor = collection.find(query).sort("currentTs", 1)
-            count = 0
-            for doc in cursor:
-                self.parse_snapshot(doc)
+            for doc in documents:
+                if not self._accumulate(doc):
+                    continue
                 count += 1
-                if count % 100 == 0:
+                if self._pending >= self.flush_every:
+                    jobs.put(self._take_buffers())
                     print(f"[MongoParser] Processed {count} snapshots...")
+            if self._pending:
+                jobs.put(self._take_buffers())
+        finally:
+            jobs.put(_STOP)
+            writer.join()
+        elapsed = time.perf_counter() - start
+        print(f"[MongoParser] Parsed {count} snapshots, stored {stats['written']} in {elapsed:.1f}s "
+              f"({count / elapsed if elapsed > 0 else 0:.0f}/s).")
+        if stats['failed']:
+            print(f"[MongoParser] Warning: {stats['failed']} snapshots were not stored; re-run the replay to retry them.")
+        return stats['written']
+
+    def ingest_from_db(self, db_name="upstox_strategy_db", collection_name="raw_tick_data", query=None, collection=None):
+        """
+        Streams documents from MongoDB (or an injected collection, e.g. mongomock) into the database.
+
+        Args:
+            db_name (str): Database name.
+            collection_name (str): Collection holding the raw snapshots.
+            query (dict): Optional filter; all documents by default.
+            collection: Object with a pymongo-style find(); bypasses the connection when given.
+
+        Returns:
+            int: Number of snapshots stored (0 on failure).
+        """
+        client = None
+        try:
+            if collection is None:
+                from pymongo import MongoClient
+                client = MongoClient(self.mongo_uri)
+                collection = client[db_name][collection_name]
 
+            cursor = collection.find(query or {}, self.PROJECTION).sort("currentTs", 1).batch_size(self.batch_size)
+            count = self.ingest(cursor)
             print(f"[MongoParser] Finished ingesting {count} snapshots from MongoDB.")
-            client.close()
             return count
         except Exception as e:
             print(f"[MongoParser] MongoDB ingestion failed: {e}")
             return 0
+        finally:
+            if client is not None:
+                client.close()
+
+    @staticmethod
+    def _iter_jsonl(filepath):
+        with open(filepath, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
 
     def ingest_from_file(self, filepath):
-        """Kept for backward compatibility and local testing."""
+        """
+        Ingests snapshots from a file: JSON lines (.jsonl / .ndjson, streamed) or a JSON document/list.
+
+        Returns:
+            int: Number of snapshots stored.
+        """
+        if filepath.endswith(('.jsonl', '.ndjson')):
+            return self.ingest(self._iter_jsonl(filepath))
         with open(filepath, 'r') as f:
             data = json.load(f)
-
-        if isinstance(data, list):
-            for snapshot in data:
-                self.parse_snapshot(snapshot)
-        else:
-            self.parse_snapshot(data)
+        return self.ingest(data if isinstance(data, list) else [data])
 
 if __name__ == "__main__":
     import argparse
@@ -169,11 +296,13 @@ if __name__ == "__main__":
     parser.add_argument("--uri", type=str, default="mongodb://localhost:27017/", help="MongoDB URI")
     parser.add_argument("--db", type=str, default="upstox_strategy_db", help="Database name")
     parser.add_argument("--col", type=str, default="raw_tick_data", help="Collection name")
-    parser.add_argument("--file", type=str, help="Ingest from JSON file instead of DB")
+    parser.add_argument("--file", type=str, help="Ingest from a JSON / JSON-lines file instead of DB")
+    parser.add_argument("--flush-every", type=int, default=500, help="Snapshots per bulk write")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per MongoDB cursor batch")
 
     args = parser.parse_args()
 
-    parser_obj = MongoParser(mongo_uri=args.uri)
+    parser_obj = MongoParser(mongo_uri=args.uri, flush_every=args.flush_every, batch_size=args.batch_size)
     if args.file:
         parser_obj.ingest_from_file(args.file)
     else:
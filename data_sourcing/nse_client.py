@@ -13,9 +13,11 @@ class NSEClient:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
-        self._init_session()
+        # Cookies are fetched on the first request, so constructing a client stays offline
+        self._session_ready = False
 
     def _init_session(self):
+        self._session_ready = True
         if not self.session.cookies:
             try:
                 # First hit homepage
@@ -27,6 +29,8 @@ class NSEClient:
 
     def _make_get_request(self, url, params=None):
         time.sleep(1.0) # Be more conservative with NSE
+        if not self._session_ready:
+            self._init_session()
         try:
             response = self.session.get(url, params=params, timeout=15)
             if response.status_code == 401 or response.status_code == 403:
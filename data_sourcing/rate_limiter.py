@@ -0,0 +1,71 @@
+import threading
+import time
+from typing import Dict, Optional
+from python_engine.engine_config import Config
+
+# Requests per second per remote provider; override with "rate_limits" in config.json
+DEFAULT_RATE_LIMITS = {
+    'upstox': 20.0,
+    'trendlyne': 5.0,
+    'tvdatafeed': 2.0,
+}
+
+_limiters: Dict[str, 'RateLimiter'] = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+
+    acquire() reserves a token and sleeps until it is due, so concurrent
+    callers are spaced out at `rate` calls per second after an initial burst.
+    A rate of None or <= 0 disables limiting.
+    """
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        """
+        Initializes the bucket (full).
+
+        Args:
+            rate (Optional[float]): Calls per second.
+            burst (Optional[int]): Bucket size; defaults to max(1, rate).
+        """
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until a call is allowed."""
+        if self.rate is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """
+    Returns the process-wide limiter for a provider ('upstox', 'trendlyne', ...).
+
+    Args:
+        provider (str): Provider name.
+
+    Returns:
+        RateLimiter: Shared limiter, created on first use from config.json.
+    """
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                rate = (Config.get('rate_limits') or {}).get(provider, DEFAULT_RATE_LIMITS.get(provider))
+                limiter = _limiters[provider] = RateLimiter(rate)
+    return limiter
@@ -1,8 +1,19 @@
 import requests
+from python_engine.engine_config import Config
+from data_sourcing.rate_limiter import get_rate_limiter
+
+DEFAULT_BASE_URL = "https://smartoptions.trendlyne.com/phoenix/api"
+
+
+def trendlyne_base_url():
+    """Trendlyne API root; "trendlyne_base_url" in config.json overrides it (e.g. a local stub)."""
+    return (Config.get('trendlyne_base_url') or DEFAULT_BASE_URL).rstrip('/')
+
 
 class TrendlyneClient:
     def __init__(self):
-        self.base_url = "https://smartoptions.trendlyne.com/phoenix/api"
+        self.base_url = trendlyne_base_url()
+        self._limiter = get_rate_limiter('trendlyne')
 
     def get_stock_id_for_symbol(self, symbol):
         # Strip common prefixes
@@ -19,6 +30,7 @@ class TrendlyneClient:
         search_url = f"{self.base_url}/search-contract-stock/"
         params = {'query': s.lower()}
         try:
+            self._limiter.acquire()
             response = requests.get(search_url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
@@ -36,6 +48,7 @@ class TrendlyneClient:
     def get_expiry_dates(self, stock_id):
         expiry_url = f"{self.base_url}/fno/get-expiry-dates/?mtype=options&stock_id={stock_id}"
         try:
+            self._limiter.acquire()
             response = requests.get(expiry_url, timeout=5)
             response.raise_for_status()
             return response.json().get('body', {}).get('expiryDates', [])
@@ -52,6 +65,7 @@ class TrendlyneClient:
             'maxTime': max_time
         }
         try:
+            self._limiter.acquire()
             response = requests.get(url, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
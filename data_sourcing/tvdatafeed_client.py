@@ -1,19 +1,61 @@
+from enum import Enum
+import pandas as pd
+import requests
+from python_engine.engine_config import Config
+from data_sourcing.rate_limiter import get_rate_limiter
+from python_engine.utils.symbol_converter import upstox_to_tv_option
+
 try:
     from tvDatafeed import TvDatafeed, Interval
-    from python_engine.utils.symbol_converter import upstox_to_tv_option
 except ImportError:
     TvDatafeed = None
-    Interval = None
+
+    class Interval(Enum):
+        """Subset of tvDatafeed.Interval used here, for the HTTP feed when tvDatafeed is absent."""
+        in_1_minute = "1"
+        in_5_minute = "5"
+        in_daily = "1D"
+
+
+class _HttpHistoryFeed:
+    """
+    Minimal stand-in for TvDatafeed backed by an HTTP endpoint.
+
+    Enabled by "tvdatafeed_base_url" in config.json, so a local stub server
+    can replace the TradingView websocket in tests. The endpoint is
+    GET {base_url}/history?symbol=&exchange=&interval=&n_bars= returning a
+    JSON list of {datetime, open, high, low, close, volume} records.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def get_hist(self, symbol, exchange, interval, n_bars):
+        params = {'symbol': symbol, 'exchange': exchange, 'interval': getattr(interval, 'value', interval), 'n_bars': n_bars}
+        response = requests.get(f"{self.base_url}/history", params=params, timeout=30)
+        response.raise_for_status()
+        df = pd.DataFrame(response.json())
+        if df.empty:
+            return None
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        df.insert(0, 'symbol', f"{exchange}:{symbol}")
+        return df.set_index('datetime')
+
 
 class TVDatafeedClient:
     def __init__(self, username=None, password=None):
+        self._limiter = get_rate_limiter('tvdatafeed')
+        base_url = Config.get('tvdatafeed_base_url')
+        if base_url:
+            self.tv = _HttpHistoryFeed(base_url)
+            return
         try:
             self.tv = TvDatafeed(username, password, auto_login=False)
         except Exception as e:
             print(f"[TVDatafeed] Failed to initialize: {e}")
             self.tv = None
 
-    def get_historical_data(self, symbol, exchange, interval, n_bars):
+    def get_historical_data(self, symbol, exchange, interval=Interval.in_1_minute, n_bars=10):
         if not self.tv:
             return None
 
@@ -24,6 +66,7 @@ class TVDatafeedClient:
             print(f"[TVDatafeed] Converted {symbol} -> {tv_symbol}")
 
         try:
+            self._limiter.acquire()
             return self.tv.get_hist(
                 symbol=tv_symbol,
                 exchange=exchange,
@@ -1,5 +1,6 @@
 import upstox_client
 import os
+from data_sourcing.rate_limiter import get_rate_limiter
 try:
     from python_engine.engine_config import Config as UpstoxConfig
     UPSTOX_AVAILABLE = True
@@ -10,6 +11,7 @@ except ImportError:
 class UpstoxClient:
     def __init__(self, access_token=None):
         self.api_client = None
+        self._limiter = get_rate_limiter('upstox')
         if UPSTOX_AVAILABLE:
             if not access_token:
                 from python_engine.engine_config import Config
@@ -18,6 +20,10 @@ class UpstoxClient:
             if access_token:
                 self.configuration = upstox_client.Configuration()
                 self.configuration.access_token = access_token
+                # Point at a local stub server for tests via "upstox_base_url"
+                base_url = UpstoxConfig.get('upstox_base_url')
+                if base_url:
+                    self.configuration.host = base_url.rstrip('/')
                 self.api_client = upstox_client.ApiClient(self.configuration)
             else:
                 print("[UpstoxClient] Not initialized due to missing 'upstox_access_token' in config.json.")
@@ -47,6 +53,7 @@ class UpstoxClient:
             value = '1'
 
         try:
+            self._limiter.acquire()
             return history_api.get_historical_candle_data1(
                 instrument_key=instrument_key,
                 unit=unit,
@@ -74,6 +81,7 @@ class UpstoxClient:
             value = '1'
 
         try:
+            self._limiter.acquire()
             return history_api.get_intra_day_candle_data(
                 instrument_key=instrument_key,
                 unit=unit,
@@ -86,11 +94,13 @@ class UpstoxClient:
     def get_market_data_feed_authorize(self):
         if not self.api_client: return None
         websocket_api = upstox_client.WebsocketApi(self.api_client)
+        self._limiter.acquire()
         return websocket_api.get_market_data_feed_authorize(api_version='2.0')
 
     def get_put_call_option_chain(self, instrument_key, expiry_date):
         if not self.api_client: return None
         options_api = upstox_client.OptionsApi(self.api_client)
+        self._limiter.acquire()
         return options_api.get_put_call_option_chain(
             instrument_key=instrument_key,
             expiry_date=expiry_date
@@ -105,6 +115,7 @@ class UpstoxClient:
         import upstox_client as upstox_sdk
         try:
             api_instance = upstox_sdk.MarketQuoteV3Api(self.api_client)
+            self._limiter.acquire()
             return api_instance.get_ltp(instrument_key=instrument_keys)
         except Exception as e:
             print(f"[UpstoxClient] API Error in get_ltp: {e}")
@@ -0,0 +1,148 @@
+import logging
+import os
+import uuid
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from python_engine.engine_config import Config
+from python_engine.core.order_orchestrator import OrderOrchestrator
+from python_engine.core.trade_logger import TradeLog
+from python_engine.core.trading_engine import TradingEngine
+from python_engine.data.repository import DataRepository
+from python_engine.models.trade import Trade
+from data_sourcing.data_manager import DataManager
+from data_sourcing.database_manager import DatabaseManager
+
+# Standardized Logging
+logger = logging.getLogger(__name__)
+
+# Namespace for deterministic trade ids in merged logs
+_TRADE_ID_NAMESPACE = uuid.UUID('6f1c2a4e-3b7d-4e8a-9c51-2d0f7a9e6b13')
+
+# Per-process state set up once by _init_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def trading_days(from_date: str, to_date: str, holidays: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Lists the weekdays in a date range that are not exchange holidays.
+
+    Args:
+        from_date (str): First date (YYYY-MM-DD), inclusive.
+        to_date (str): Last date (YYYY-MM-DD), inclusive.
+        holidays (Optional[Iterable[str]]): Holiday dates as YYYY-MM-DD strings.
+
+    Returns:
+        List[str]: Trading days as YYYY-MM-DD strings, in order.
+    """
+    holiday_set = set(holidays or [])
+    days = pd.bdate_range(from_date, to_date).strftime('%Y-%m-%d')
+    return [day for day in days if day not in holiday_set]
+
+
+def _init_worker(config_file: str, holidays: List[str]) -> None:
+    """
+    Prepares a worker process: read-only SQLite and one shared DataManager.
+
+    The holidays come from the parent, so workers neither call NSE nor
+    write to the read-only database.
+
+    Args:
+        config_file (str): Path to the engine configuration.
+        holidays (List[str]): Exchange holidays loaded by the parent.
+    """
+    DatabaseManager.default_read_only = True
+    Config.load(config_file)
+    _worker_state['data_manager'] = DataManager(access_token=Config.get('upstox_access_token'), holidays=holidays)
+
+
+def _run_unit(symbol: str, day: str, columnar: bool = True) -> List[Trade]:
+    """
+    Backtests one (symbol, trading day) unit with a fresh engine.
+
+    Args:
+        symbol (str): Canonical symbol.
+        day (str): Trading day (YYYY-MM-DD).
+        columnar (bool): Use the columnar loop; False runs the legacy row loop.
+
+    Returns:
+        List[Trade]: Trades opened during the day.
+    """
+    candles_df = DataRepository().get_historical_candles(symbol, from_date=day, to_date=day)
+    if candles_df is None or candles_df.empty:
+        logger.warning(f"No candles for {symbol} on {day}; skipping.")
+        return []
+
+    candles_df.set_index('timestamp', inplace=True)
+    candles_df.sort_index(inplace=True)
+
+    data_manager = _worker_state['data_manager']
+    trade_log = TradeLog(os.devnull, persist=False)
+    order_orchestrator = OrderOrchestrator(trade_log, data_manager, "backtest")
+    engine = TradingEngine(order_orchestrator, data_manager, Config.get('strategies_dir'))
+    engine.run_backtest(symbol, candles_df, columnar=columnar)
+    return trade_log.get_trades()
+
+
+def _trade_sort_key(trade: Trade) -> Tuple:
+    return (trade.entry_time, trade.pattern_id, trade.symbol, trade.instrument_key or '')
+
+
+def run_parallel_backtest(symbols: List[str], from_date: str, to_date: str,
+                          workers: Optional[int] = None,
+                          config_file: str = 'config.json', columnar: bool = True) -> Dict[str, List[Trade]]:
+    """
+    Backtests every (symbol, trading day) pair across a process pool.
+
+    Strategy state resets at day boundaries, so each day is an independent
+    unit with its own engine. Workers open SQLite read-only and keep trades in
+    memory; the parent merges them in a fixed order (day, entry time, pattern,
+    instrument), assigns deterministic trade ids, then persists and writes one
+    log per symbol exactly like run_backtest.
+
+    Args:
+        symbols (List[str]): Canonical symbols, e.g. ['NSE|INDEX|NIFTY'].
+        from_date (str): First date (YYYY-MM-DD).
+        to_date (str): Last date (YYYY-MM-DD).
+        workers (Optional[int]): Pool size; defaults to os.cpu_count().
+        config_file (str): Path to the engine configuration.
+        columnar (bool): Use the columnar loop; False runs the legacy row loop.
+
+    Returns:
+        Dict[str, List[Trade]]: Merged trades per symbol.
+    """
+    Config.load(config_file)
+    # Creates the schema and caches holidays before any worker opens the DB read-only
+    data_manager = DataManager(access_token=Config.get('upstox_access_token'))
+    days = trading_days(from_date, to_date, data_manager.holidays)
+    units = [(symbol, day) for symbol in symbols for day in days]
+    if not units:
+        print(f"No trading days between {from_date} and {to_date}.")
+        return {symbol: [] for symbol in symbols}
+
+    print(f"[*] Backtesting {len(symbols)} symbol(s) x {len(days)} day(s) on {workers or os.cpu_count()} worker(s)...")
+    results: Dict[Tuple[str, str], List[Trade]] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_file, data_manager.holidays)) as pool:
+        futures = {pool.submit(_run_unit, symbol, day, columnar): (symbol, day) for symbol, day in units}
+        for future in as_completed(futures):
+            symbol, day = futures[future]
+            try:
+                results[(symbol, day)] = future.result()
+            except Exception as e:
+                logger.error(f"Backtest failed for {symbol} on {day}: {e}")
+                results[(symbol, day)] = []
+
+    merged: Dict[str, List[Trade]] = {}
+    for symbol in symbols:
+        trade_log = TradeLog(f'backtest_{symbol.replace("|", "_")}.csv')
+        trades: List[Trade] = []
+        for day in days:
+            for seq, trade in enumerate(sorted(results[(symbol, day)], key=_trade_sort_key)):
+                trade.trade_id = str(uuid.uuid5(_TRADE_ID_NAMESPACE, f"{symbol}|{day}|{seq}"))
+                trade_log.log_trade(trade)
+                trades.append(trade)
+        trade_log.write_log_file()
+        trade_log.close()
+        merged[symbol] = trades
+        print(f"Backtest complete for {symbol}: {len(trades)} trade(s). Log saved to: {trade_log.log_file}")
+    return merged
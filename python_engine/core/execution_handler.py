@@ -4,6 +4,8 @@ import pandas as pd
 from python_engine.models.trade import TradeOutcome
 
 class ExecutionHandler:
+    MAX_HOLD_SECONDS = 1800  # Time-based exit after 30 minutes
+
     def __init__(self, order_orchestrator, data_manager):
         self._order_orchestrator = order_orchestrator
         self._data_manager = data_manager
@@ -32,12 +34,14 @@ class ExecutionHandler:
     def _check_active_exits(self, event: MarketEvent):
         """
         In-memory check for Trailing SL and Time-based exits.
-        Evaluated on every bar for active positions.
+        Evaluated on every bar for the positions the event touches (held in or
+        derived from event.symbol) plus any position past its time limit.
         """
         current_time = pd.to_datetime(event.timestamp, unit='s')
+        book = self._order_orchestrator._open_positions
 
-        # Iterating over a copy to allow deletion during loop
-        for pos_key, position in list(self._order_orchestrator._open_positions.items()):
+        # affected_by returns a snapshot, so positions can be closed inside the loop
+        for pos_key, position in book.affected_by(event.symbol, entered_by=event.timestamp - self.MAX_HOLD_SECONDS):
             # Only process if we have the actual option candle for accurate exit
             opt_candle = self._data_manager.get_historical_candle_for_timestamp(
                 symbol=position.instrument_key,
@@ -68,7 +72,7 @@ class ExecutionHandler:
                         self._order_orchestrator._trade_log.update_trade(trade)
 
             # 2. Time-based Exit (30 min limit)
-            if (current_time - entry_time).total_seconds() > 1800:
+            if (current_time - entry_time).total_seconds() > self.MAX_HOLD_SECONDS:
                 print(f"[ExecutionHandler] Time-based exit triggered for {position.symbol}")
                 self._order_orchestrator._close_position(
                     position,
@@ -76,4 +80,4 @@ class ExecutionHandler:
                     event.timestamp,
                     TradeOutcome.WIN if current_profit > 0 else TradeOutcome.LOSS
                 )
-                # Note: _close_position handles deletion from _open_positions
+                # Note: _close_position removes it from the position book
@@ -4,6 +4,7 @@ from data_sourcing.data_manager import DataManager
 from python_engine.models.data_models import PatternState, PatternDefinition, MarketEvent, VolumeBar
 from python_engine.models.trade import Position, Trade, TradeSide, TradeOutcome
 from python_engine.core.trade_logger import TradeLog
+from python_engine.core.position_book import PositionBook
 from python_engine.utils.dot_dict import DotDict
 from python_engine.utils.mvel_functions import MVEL_FUNCTIONS
 from python_engine.utils.symbol_master import MASTER as SymbolMaster
@@ -14,20 +15,39 @@ class OrderOrchestrator:
         self._trade_log = trade_log
         self._data_manager = data_manager
         self._mode = mode
-        self._open_positions = {}
+        self._open_positions = PositionBook()
         self._asteval = Interpreter(symtable=MVEL_FUNCTIONS)
 
+    def restore_positions(self, trades):
+        """Re-opens positions for trades that were still open when a previous run stopped."""
+        for trade in trades:
+            pos_key = f"{trade.symbol}_{trade.pattern_id}"
+            self._open_positions[pos_key] = Position(
+                underlying_symbol=trade.underlying_symbol or trade.symbol,
+                instrument_key=trade.instrument_key,
+                symbol=trade.symbol,
+                pattern_id=trade.pattern_id,
+                side=trade.side,
+                entry_price=trade.entry_price,
+                entry_time=trade.entry_time,
+                stop_loss=trade.stop_loss,
+                take_profit=trade.take_profit,
+                trade_id=trade.trade_id,
+                quantity=trade.quantity
+            )
+            print(f"[OrderOrchestrator] Restored open position for {trade.symbol} ({trade.pattern_id}) at {trade.entry_price}")
+
     def on_event(self, event: MarketEvent):
         # 1. If this event IS the instrument we have a position in (e.g. the Option itself)
         # We might have multiple patterns trading the same instrument
-        positions_for_instrument = [p for p in self._open_positions.values() if p.symbol == event.symbol]
+        positions_for_instrument = self._open_positions.for_symbol(event.symbol)
         for position in positions_for_instrument:
             self._check_sl_tp(position, event.candle)
 
         # 2. If this is the underlying index, check all positions deriving from it
         # This is primarily for backtesting where we might only have underlying data events
         # Or if we want to exit an option based on underlying technicals
-        positions_to_check = [p for p in self._open_positions.values() if p.underlying_symbol == event.symbol and p.symbol != event.symbol]
+        positions_to_check = self._open_positions.for_underlying(event.symbol, exclude_symbol=event.symbol)
 
         for position in positions_to_check:
             # For these, we still need to fetch the option's specific candle
@@ -57,9 +77,7 @@ class OrderOrchestrator:
                 trade_closed = True
 
         if trade_closed:
-            pos_key = f"{position.symbol}_{position.pattern_id}"
-            if pos_key in self._open_positions:
-                del self._open_positions[pos_key]
+            self._open_positions.pop(f"{position.symbol}_{position.pattern_id}", None)
 
     def _get_atm_option_details(self, underlying_symbol, side, candle):
         # Simplify symbol prefix extraction
@@ -94,7 +112,7 @@ class OrderOrchestrator:
         # Allow multiple strategies to trade the same underlying, but only one position per strategy-underlying pair
         pos_key_prefix = f"{state.symbol}_{definition.pattern_id}"
         # We check if this specific pattern already has an open position for this underlying
-        pattern_underlying_open = any(p.pattern_id == definition.pattern_id and p.underlying_symbol == state.symbol for p in self._open_positions.values())
+        pattern_underlying_open = self._open_positions.has_pattern(definition.pattern_id, state.symbol)
         if pattern_underlying_open:
             return
 
@@ -184,7 +202,8 @@ class OrderOrchestrator:
             stop_loss=stop_loss,
             take_profit=take_profit,
             sl_price=stop_loss,
-            tp_price=take_profit
+            tp_price=take_profit,
+            underlying_symbol=underlying_symbol_for_position
         )
         self._trade_log.log_trade(trade)
 
@@ -212,4 +231,5 @@ class OrderOrchestrator:
             trade.status = 'CLOSED'
             trade.exit_reason = exit_reason or ('WIN' if outcome == TradeOutcome.WIN else 'LOSS')
             self._trade_log.update_trade(trade)
+            self._open_positions.pop(f"{position.symbol}_{position.pattern_id}", None)
             print(f"Closed position for {position.symbol} at {exit_price} with outcome {outcome} reason {trade.exit_reason}")
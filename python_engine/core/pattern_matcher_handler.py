@@ -1,15 +1,23 @@
 import json
+import logging
 import os
 from typing import Dict, Optional
 from python_engine.models.data_models import MarketEvent, MessageType, PatternDefinition
 from python_engine.core.pattern_state_machine import PatternStateMachine
 from python_engine.core.price_registry import PriceRegistry
 from python_engine.utils.dataclass_factory import from_dict
+from python_engine.utils.expression_compiler import CompiledPhase, compile_phases
+from python_engine.utils.streaming_indicators import IndicatorRegistry
+from python_engine.utils.bar_history import BarHistory
 
 class PatternMatcherHandler:
     def __init__(self, strategies_dir: str):
+        self._compiled_phases: Dict[str, Dict[str, CompiledPhase]] = {}
         self._pattern_definitions = self._load_patterns(strategies_dir)
         self._active_state_machines: Dict[str, PatternStateMachine] = {}
+        self._indicators = IndicatorRegistry()
+        # One history per symbol, shared by every machine trading it
+        self._histories: Dict[str, BarHistory] = {}
 
     def _load_patterns(self, strategies_dir: str) -> Dict[str, PatternDefinition]:
         definitions = {}
@@ -17,7 +25,15 @@ class PatternMatcherHandler:
             if filename.endswith(".json"):
                 with open(os.path.join(strategies_dir, filename)) as f:
                     data = json.load(f)
-                    definitions[data["pattern_id"]] = from_dict(PatternDefinition, data)
+                    definition = from_dict(PatternDefinition, data)
+                    definitions[data["pattern_id"]] = definition
+                    # Conditions and captures are parsed and sandbox-checked once here
+                    compiled = compile_phases(definition)
+                    for phase in compiled.values():
+                        for expression in phase.conditions + tuple(e for _, e in phase.captures):
+                            if expression.error:
+                                logging.error(f"[PatternMatcherHandler] {definition.pattern_id}: cannot compile '{expression.source}': {expression.error}")
+                    self._compiled_phases[definition.pattern_id] = compiled
         return definitions
 
     def on_event(self, event: MarketEvent):
@@ -26,11 +42,22 @@ class PatternMatcherHandler:
             candle = event.candle
             if candle:
                 PriceRegistry.update_price(candle.symbol, candle.close)
+                history = self._histories.get(candle.symbol)
+                if history is None:
+                    history = self._histories[candle.symbol] = BarHistory()
+                history.append(candle)
+                self._indicators.update(candle, history)
                 for definition in self._pattern_definitions.values():
                     machine_key = f"{candle.symbol}:{definition.pattern_id}"
-                    state_machine = self._active_state_machines.setdefault(
-                        machine_key, PatternStateMachine(definition, candle.symbol)
-                    )
+                    state_machine = self._active_state_machines.get(machine_key)
+                    if state_machine is None:
+                        state_machine = PatternStateMachine(
+                            definition, candle.symbol,
+                            compiled_phases=self._compiled_phases[definition.pattern_id],
+                            indicators=self._indicators,
+                            history=history
+                        )
+                        self._active_state_machines[machine_key] = state_machine
                     state_machine.evaluate(candle, event.sentiment, event.screener_data)
                     if state_machine.is_triggered():
                         event.triggered_machine = state_machine
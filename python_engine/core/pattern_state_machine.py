@@ -1,25 +1,36 @@
 from python_engine.models.data_models import PatternDefinition, PatternState, VolumeBar, Sentiment, Phase
 from python_engine.utils.mvel_functions import MVEL_FUNCTIONS
 from python_engine.utils.dot_dict import DotDict
-from typing import Dict, Optional, List
+from python_engine.utils.expression_compiler import CompiledExpression, CompiledPhase, compile_phases, new_namespace
+from python_engine.utils.streaming_indicators import IndicatorRegistry
+from python_engine.utils.bar_history import BarHistory
+from typing import Dict, Optional, List, Tuple
 import logging
-from asteval import Interpreter
 
 class PatternStateMachine:
-    def __init__(self, definition: PatternDefinition, symbol: str, initial_state: Optional[PatternState] = None):
+    def __init__(self, definition: PatternDefinition, symbol: str, initial_state: Optional[PatternState] = None,
+                 compiled_phases: Optional[Dict[str, CompiledPhase]] = None,
+                 indicators: Optional[IndicatorRegistry] = None,
+                 history: Optional[BarHistory] = None):
         self._definition = definition
         self._symbol = symbol
         self._state = initial_state if initial_state else PatternState(definition.pattern_id, symbol, definition.phases[0].id)
         self._is_triggered = False
-        self._history: List[VolumeBar] = []
         self._prev_candle: Optional[VolumeBar] = None
         self._MAX_HISTORY = 200
-        self._asteval = Interpreter(symtable=MVEL_FUNCTIONS)
+        # A shared history is appended to by its owner (PatternMatcherHandler);
+        # a standalone machine keeps and appends to its own.
+        self._owns_history = history is None
+        self._history = BarHistory(self._MAX_HISTORY) if history is None else history
+        self._compiled_phases = compiled_phases if compiled_phases is not None else compile_phases(definition)
+        self._namespace = new_namespace(MVEL_FUNCTIONS)
+        if indicators is not None:
+            # Indicator calls on this machine's history are served from streaming state
+            self._namespace.update(indicators.functions_for(symbol, self._history))
 
     def evaluate(self, candle: VolumeBar, sentiment: Sentiment, screener_data: Dict[str, float]):
-        self._history.append(candle)
-        if len(self._history) > self._MAX_HISTORY:
-            self._history.pop(0)
+        if self._owns_history:
+            self._history.append(candle)
 
         current_phase = self._get_current_phase()
         if not current_phase:
@@ -35,8 +46,9 @@ class PatternStateMachine:
 
         self._build_context(candle, sentiment, screener_data)
 
-        if self._check_conditions(current_phase.conditions):
-            self._capture_variables(current_phase.capture)
+        compiled_phase = self._compiled_phases[current_phase.id]
+        if self._check_conditions(compiled_phase.conditions):
+            self._capture_variables(compiled_phase.captures)
             self._move_to_next_phase()
         else:
             self._state.increment_timeout()
@@ -45,43 +57,44 @@ class PatternStateMachine:
 
         self._prev_candle = candle
 
-    def _check_conditions(self, conditions: List[str]) -> bool:
+    def _check_conditions(self, conditions: Tuple[CompiledExpression, ...]) -> bool:
         if not conditions:
             return True
 
         for condition in conditions:
             try:
-                if not self._asteval.eval(condition):
+                if not condition.evaluate(self._namespace):
                     return False
             except Exception as e:
-                logging.error(f"Error evaluating condition '{condition}': {e}")
+                logging.error(f"Error evaluating condition '{condition.source}': {e}")
                 return False
         return True
 
-    def _capture_variables(self, captures: Dict[str, str]):
+    def _capture_variables(self, captures: Tuple[Tuple[str, CompiledExpression], ...]):
         if not captures:
             return
 
-        for name, expression in captures.items():
+        for name, expression in captures:
             try:
-                value = self._asteval.eval(expression)
+                value = expression.evaluate(self._namespace)
                 if isinstance(value, (int, float)):
                     self._state.capture(name, float(value))
             except Exception as e:
                 logging.error(f"Error capturing variable '{name}': {e}")
 
     def _build_context(self, candle: VolumeBar, sentiment: Sentiment, screener_data: Dict[str, float]):
-        self._asteval.symtable['candle'] = candle
-        self._asteval.symtable['sentiment'] = sentiment
-        self._asteval.symtable['vars'] = DotDict(self._state.captured_variables)
-        self._asteval.symtable['screener'] = screener_data or {}
-        self._asteval.symtable['prev_candle'] = self._prev_candle or candle
-        self._asteval.symtable['history'] = self._history
-        self._asteval.symtable['volume'] = float(candle.volume)
-        self._asteval.symtable['close'] = candle.close
-        self._asteval.symtable['high'] = candle.high
-        self._asteval.symtable['low'] = candle.low
-        self._asteval.symtable['open'] = candle.open
+        namespace = self._namespace
+        namespace['candle'] = candle
+        namespace['sentiment'] = sentiment
+        namespace['vars'] = DotDict(self._state.captured_variables)
+        namespace['screener'] = screener_data or {}
+        namespace['prev_candle'] = self._prev_candle or candle
+        namespace['history'] = self._history
+        namespace['volume'] = float(candle.volume)
+        namespace['close'] = candle.close
+        namespace['high'] = candle.high
+        namespace['low'] = candle.low
+        namespace['open'] = candle.open
 
     def _get_current_phase(self) -> Optional[Phase]:
         for phase in self._definition.phases:
@@ -121,7 +134,7 @@ class PatternStateMachine:
         return self._definition
 
     @property
-    def history(self) -> List[VolumeBar]:
+    def history(self) -> BarHistory:
         return self._history
 
     @property
@@ -0,0 +1,134 @@
+import heapq
+import itertools
+from typing import Dict, Iterator, List, Optional, Tuple
+from python_engine.models.trade import Position
+
+
+class PositionBook:
+    """
+    Open positions keyed by "<symbol>_<pattern_id>", with secondary indexes.
+
+    Behaves like the dict it replaces (`in`, `[]`, `del`, `items()`,
+    `values()`, `pop`) and additionally indexes positions by instrument
+    symbol, by underlying and by (pattern_id, underlying). A min-heap
+    ordered by entry time answers "which positions have been held longer
+    than N seconds" without scanning the book. Heap entries of removed
+    positions are discarded lazily when they reach the top.
+
+    Every lookup returns positions in the order they were opened, as
+    iterating the old dict did.
+    """
+
+    def __init__(self):
+        self._positions: Dict[str, Position] = {}
+        self._seq: Dict[str, int] = {}  # pos_key -> insertion counter, for stable ordering
+        self._by_symbol: Dict[str, Dict[str, Position]] = {}
+        self._by_underlying: Dict[str, Dict[str, Position]] = {}
+        self._by_pattern: Dict[Tuple[str, str], Dict[str, Position]] = {}
+        self._entries: List[Tuple[float, int, str]] = []  # (entry_time, seq, pos_key)
+        self._counter = itertools.count()
+
+    @staticmethod
+    def _index_add(index: Dict, key, pos_key: str, position: Position) -> None:
+        index.setdefault(key, {})[pos_key] = position
+
+    @staticmethod
+    def _index_remove(index: Dict, key, pos_key: str) -> None:
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(pos_key, None)
+            if not bucket:
+                del index[key]
+
+    def __setitem__(self, pos_key: str, position: Position) -> None:
+        if pos_key in self._positions:
+            self.pop(pos_key)
+        seq = next(self._counter)
+        self._positions[pos_key] = position
+        self._seq[pos_key] = seq
+        self._index_add(self._by_symbol, position.symbol, pos_key, position)
+        self._index_add(self._by_underlying, position.underlying_symbol, pos_key, position)
+        self._index_add(self._by_pattern, (position.pattern_id, position.underlying_symbol), pos_key, position)
+        heapq.heappush(self._entries, (position.entry_time, seq, pos_key))
+
+    def __getitem__(self, pos_key: str) -> Position:
+        return self._positions[pos_key]
+
+    def __delitem__(self, pos_key: str) -> None:
+        if self.pop(pos_key) is None:
+            raise KeyError(pos_key)
+
+    def __contains__(self, pos_key) -> bool:
+        return pos_key in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def get(self, pos_key: str, default=None) -> Optional[Position]:
+        return self._positions.get(pos_key, default)
+
+    def items(self):
+        return self._positions.items()
+
+    def values(self):
+        return self._positions.values()
+
+    def pop(self, pos_key: str, default=None) -> Optional[Position]:
+        """Removes a position from the book and every index; its heap entry is dropped lazily."""
+        position = self._positions.pop(pos_key, None)
+        if position is None:
+            return default
+        del self._seq[pos_key]
+        self._index_remove(self._by_symbol, position.symbol, pos_key)
+        self._index_remove(self._by_underlying, position.underlying_symbol, pos_key)
+        self._index_remove(self._by_pattern, (position.pattern_id, position.underlying_symbol), pos_key)
+        return position
+
+    def for_symbol(self, symbol: str) -> List[Position]:
+        """Positions held in the instrument `symbol`."""
+        return list(self._by_symbol.get(symbol, {}).values())
+
+    def for_underlying(self, underlying: str, exclude_symbol: Optional[str] = None) -> List[Position]:
+        """Positions derived from `underlying`, optionally skipping those held in `exclude_symbol`."""
+        return [p for p in self._by_underlying.get(underlying, {}).values() if p.symbol != exclude_symbol]
+
+    def has_pattern(self, pattern_id: str, underlying: str) -> bool:
+        """True if `pattern_id` already holds a position on `underlying`."""
+        return (pattern_id, underlying) in self._by_pattern
+
+    def _live(self, seq: int, pos_key: str) -> bool:
+        return self._seq.get(pos_key) == seq
+
+    def entered_by(self, cutoff: float) -> Dict[str, Position]:
+        """
+        Positions opened at or before `cutoff` (epoch seconds).
+
+        Only entries up to the cutoff are popped from the heap. Live ones are
+        pushed back, so a position stays due until it is removed.
+        """
+        due = []
+        while self._entries and self._entries[0][0] <= cutoff:
+            entry = heapq.heappop(self._entries)
+            if self._live(entry[1], entry[2]):
+                due.append(entry)
+        for entry in due:
+            heapq.heappush(self._entries, entry)
+        return {pos_key: self._positions[pos_key] for _, _, pos_key in due}
+
+    def affected_by(self, symbol: str, entered_by: Optional[float] = None) -> List[Tuple[str, Position]]:
+        """
+        Positions an event on `symbol` has to look at, in opening order.
+
+        These are positions held in `symbol`, positions whose underlying is
+        `symbol` and, when `entered_by` is given, positions opened at or
+        before that time (time exits fire whichever instrument ticks).
+        """
+        selected: Dict[str, Position] = {}
+        selected.update(self._by_symbol.get(symbol, {}))
+        selected.update(self._by_underlying.get(symbol, {}))
+        if entered_by is not None:
+            selected.update(self.entered_by(entered_by))
+        return sorted(selected.items(), key=lambda item: self._seq[item[0]])
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from python_engine.models.trade import Trade, TradeOutcome, TradeSide
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _epoch(value) -> Optional[float]:
+    """Trade times are epoch seconds; tolerate datetimes for callers that pass them."""
+    if value is None:
+        return None
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+def trade_to_record(trade: Trade) -> Dict[str, Any]:
+    """JSON-safe snapshot of a trade (enums as values, times as epoch seconds)."""
+    return {
+        'trade_id': trade.trade_id,
+        'pattern_id': trade.pattern_id,
+        'symbol': trade.symbol,
+        'underlying_symbol': trade.underlying_symbol,
+        'instrument_key': trade.instrument_key,
+        'side': trade.side.value if hasattr(trade.side, 'value') else str(trade.side),
+        'entry_time': _epoch(trade.entry_time),
+        'entry_price': trade.entry_price,
+        'exit_time': _epoch(trade.exit_time),
+        'exit_price': trade.exit_price,
+        'stop_loss': trade.stop_loss,
+        'take_profit': trade.take_profit,
+        'sl_price': trade.sl_price,
+        'tp_price': trade.tp_price,
+        'quantity': trade.quantity,
+        'status': trade.status,
+        'exit_reason': trade.exit_reason,
+        'outcome': trade.outcome.value if hasattr(trade.outcome, 'value') else str(trade.outcome),
+    }
+
+
+def record_to_trade(record: Dict[str, Any]) -> Trade:
+    """Rebuilds a Trade from trade_to_record output."""
+    fields = dict(record)
+    fields['side'] = TradeSide(fields['side'])
+    fields['outcome'] = TradeOutcome(fields['outcome'])
+    return Trade(**fields)
+
+
+def record_to_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """trades-table row for a journal record: formatted times plus realized PnL."""
+    pnl = 0
+    if record['outcome'] != TradeOutcome.IN_PROGRESS.value and record['exit_price'] is not None:
+        # PnL for 1 lot (assuming option multiplier is 1 for now or handled elsewhere)
+        move = record['exit_price'] - record['entry_price']
+        pnl = (move if record['side'] == TradeSide.BUY.value else -move) * record['quantity']
+    row = dict(record)
+    for col in ('entry_time', 'exit_time'):
+        row[col] = datetime.fromtimestamp(record[col]).strftime('%Y-%m-%d %H:%M:%S') if record[col] else None
+    row['pnl'] = pnl
+    return row
+
+
+class TradeJournal:
+    """
+    Write-behind persistence for trade mutations.
+
+    record() appends the trade's current state to an in-memory queue and, if
+    a journal file is configured, to an append-only JSON-lines WAL. It never
+    touches SQLite. A flusher thread drains the queue in batches (up to
+    `batch_size` records or `flush_interval` seconds), keeps the latest state
+    per trade and upserts the batch into `trades` in one transaction. The
+    WAL is fsynced once per batch. Once everything written is committed, the
+    WAL is periodically compacted down to the still-open trades. After a
+    crash, recover() replays it into the database and returns those open
+    trades so positions can be restored.
+
+    Attributes:
+        db_manager (DatabaseManager): Storage backend.
+        path (Optional[str]): WAL file; None keeps the queue in memory only (backtests).
+        batch_size (int): Maximum records per commit.
+        flush_interval (float): Seconds to wait for a batch to fill.
+    """
+
+    COMPACT_AFTER = 256  # Committed WAL lines before the file is rewritten
+
+    def __init__(self, db_manager, path: Optional[str] = None, batch_size: int = 200, flush_interval: float = 0.5):
+        self.db_manager = db_manager
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()  # Orders WAL appends with enqueueing
+        self._wal = None
+        self._written = 0
+        self._committed = 0
+        self._lines = 0
+        self._open: Dict[str, Dict[str, Any]] = {}  # trade_id -> latest record of trades still open
+        self._failed: Dict[str, Dict[str, Any]] = {}  # Records of a failed commit, retried with the next batch
+        self._failed_records = 0  # Journal records folded into _failed
+        self._thread: Optional[threading.Thread] = None
+
+    def recover(self) -> List[Trade]:
+        """
+        Replays the WAL left by a previous run into `trades` and compacts it.
+
+        Call before start(). Safe to repeat: upserts are idempotent.
+
+        Returns:
+            List[Trade]: Trades that were still open, in entry order.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return []
+        latest: Dict[str, Dict[str, Any]] = {}
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    logger.warning(f"[TradeJournal] Skipping unreadable line in {self.path}")
+                    continue
+                latest[record['trade_id']] = record
+        if latest:
+            self.db_manager.store_trades([record_to_row(r) for r in latest.values()])
+        self._open = {tid: r for tid, r in latest.items() if r['status'] != 'CLOSED'}
+        self._compact()
+        logger.info(f"[TradeJournal] Replayed {len(latest)} trade(s) from {self.path}; {len(self._open)} open.")
+        return sorted((record_to_trade(r) for r in self._open.values()), key=lambda t: (t.entry_time or 0, t.trade_id))
+
+    def start(self) -> None:
+        """Opens the WAL for appending and starts the flusher thread."""
+        if self._thread is not None:
+            return
+        if self.path:
+            self._wal = open(self.path, 'a')
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, trade: Trade) -> None:
+        """Journals the trade's current state; returns without waiting for the database."""
+        record = trade_to_record(trade)
+        with self._lock:
+            if self._wal is not None:
+                self._wal.write(json.dumps(record) + "\n")
+                self._wal.flush()  # Survives a process crash; fsync happens per batch
+            self._written += 1
+            self._queue.put(record)
+
+    def flush(self) -> None:
+        """Blocks until every record so far has been through a commit (failed ones are retried later)."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Commits everything (retrying a failed commit once more), compacts the WAL and stops the flusher."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        if self._failed:
+            self._commit([])
+        with self._lock:
+            if self._failed:
+                logger.error(f"[TradeJournal] {len(self._failed)} trade(s) left uncommitted; recover() replays them from the WAL.")
+            else:
+                self._compact()
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stopping:
+                self._queue.task_done()
+                return
+
+    def _commit(self, batch: List[Dict[str, Any]]) -> None:
+        latest = dict(self._failed)
+        latest.update((record['trade_id'], record) for record in batch)
+        try:
+            if self._wal is not None:
+                with self._lock:
+                    os.fsync(self._wal.fileno())
+            self.db_manager.store_trades([record_to_row(r) for r in latest.values()])
+        except Exception as e:
+            # Retried with the next batch; the WAL still holds them if the process dies first
+            logger.error(f"[TradeJournal] Commit of {len(latest)} trade(s) failed: {e}")
+            self._failed = latest
+            self._failed_records += len(batch)
+            return
+        committed = self._failed_records + len(batch)
+        self._failed = {}
+        self._failed_records = 0
+        with self._lock:
+            for tid, record in latest.items():
+                if record['status'] == 'CLOSED':
+                    self._open.pop(tid, None)
+                else:
+                    self._open[tid] = record
+            self._committed += committed
+            self._lines += committed
+            if self._lines >= self.COMPACT_AFTER and self._committed == self._written:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Rewrites the WAL with only the open trades (caller holds the lock or owns the journal)."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for record in self._open.values():
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = open(self.path, 'a')
+        self._lines = 0
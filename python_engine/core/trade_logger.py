@@ -1,61 +1,96 @@
 import csv
 from python_engine.models.trade import Trade, TradeOutcome, TradeSide
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from data_sourcing.database_manager import DatabaseManager
+from python_engine.core.trade_journal import TradeJournal, trade_to_record, record_to_row
+from python_engine.utils.event_bus import BUS, TRADE_OPEN, TRADE_CLOSE, SL_MOVE
+
+
+def _chart_time(formatted):
+    # Same convention as /api/trades: the stored wall-clock time read as UTC
+    if not formatted:
+        return None
+    return int(datetime.strptime(formatted, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp())
+
+
+def trade_event(trade: Trade) -> dict:
+    """Event-bus payload for a trade, shaped like an /api/trades row."""
+    row = record_to_row(trade_to_record(trade))
+    row['entry_time_unix'] = _chart_time(row['entry_time'])
+    row['exit_time_unix'] = _chart_time(row['exit_time'])
+    return row
 
 class TradeLog:
-    def __init__(self, log_file: str):
+    def __init__(self, log_file: str, persist: bool = True, journal_path: str = None):
+        """
+        Args:
+            log_file (str): CSV written by write_log_file().
+            persist (bool): Write trades to the `trades` table (through a write-behind TradeJournal).
+            journal_path (str): Crash-safe JSON-lines WAL for the journal; enables recover_open_trades().
+        """
         self.log_file = log_file
         self._trades = {}
-        self._db_manager = DatabaseManager()
-        self._db_manager.initialize_database()
+        # Parallel backtest workers keep trades in memory; the parent persists the merged log
+        self._persist = persist
+        self._db_manager = None
+        self._journal = None
+        if persist:
+            self._db_manager = DatabaseManager()
+            self._db_manager.initialize_database()
+            self._journal = TradeJournal(self._db_manager, journal_path)
+
+    def recover_open_trades(self):
+        """
+        Replays the journal left by a previous run and returns the trades still open.
+
+        Call once at startup, before the first trade is logged.
+        """
+        if self._journal is None:
+            return []
+        trades = self._journal.recover()
+        for trade in trades:
+            self._trades[trade.trade_id] = trade
+        return trades
 
     def log_trade(self, trade: Trade):
         self._trades[trade.trade_id] = trade
         self._persist_to_db(trade)
+        self._publish(TRADE_OPEN, trade)
 
     def update_trade(self, trade: Trade):
         self._trades[trade.trade_id] = trade
         self._persist_to_db(trade)
+        # Open trades are only updated when their stop moves
+        self._publish(TRADE_CLOSE if trade.status == 'CLOSED' else SL_MOVE, trade)
+
+    def _publish(self, topic: str, trade: Trade):
+        if BUS.has_subscribers():
+            BUS.publish(topic, trade_event(trade))
 
     def _persist_to_db(self, trade: Trade):
-        pnl = 0
-        if trade.outcome != TradeOutcome.IN_PROGRESS and trade.exit_price is not None:
-            # PnL for 1 lot (assuming option multiplier is 1 for now or handled elsewhere)
-            pnl = (trade.exit_price - trade.entry_price) * trade.quantity if trade.side == TradeSide.BUY else (trade.entry_price - trade.exit_price) * trade.quantity
-
-        entry_time_str = datetime.fromtimestamp(trade.entry_time).strftime('%Y-%m-%d %H:%M:%S') if trade.entry_time else None
-        exit_time_str = datetime.fromtimestamp(trade.exit_time).strftime('%Y-%m-%d %H:%M:%S') if trade.exit_time else None
-
-        trade_data = {
-            'trade_id': trade.trade_id,
-            'pattern_id': trade.pattern_id,
-            'symbol': trade.symbol,
-            'instrument_key': trade.instrument_key,
-            'side': trade.side.value if hasattr(trade.side, 'value') else str(trade.side),
-            'entry_time': entry_time_str,
-            'entry_price': trade.entry_price,
-            'exit_time': exit_time_str,
-            'exit_price': trade.exit_price,
-            'stop_loss': trade.stop_loss,
-            'take_profit': trade.take_profit,
-            'sl_price': trade.sl_price,
-            'tp_price': trade.tp_price,
-            'quantity': trade.quantity,
-            'status': trade.status,
-            'exit_reason': trade.exit_reason,
-            'outcome': trade.outcome.value if hasattr(trade.outcome, 'value') else str(trade.outcome),
-            'pnl': pnl
-        }
-        try:
-            self._db_manager.store_trade(trade_data)
-        except Exception as e:
-            print(f"[TradeLog] DB Error: {e}")
+        if not self._persist:
+            return
+        # Queued for the journal's flusher thread; the caller never waits on SQLite
+        self._journal.start()
+        self._journal.record(trade)
+
+    def flush(self):
+        """Blocks until every logged change has been written to the database."""
+        if self._journal is not None:
+            self._journal.flush()
+
+    def close(self):
+        """Writes out pending changes and stops the journal."""
+        if self._journal is not None:
+            self._journal.close()
 
     def get_trade(self, trade_id: str) -> Trade:
         return self._trades.get(trade_id)
 
+    def get_trades(self):
+        return list(self._trades.values())
+
     def write_log_file(self):
         # Keeps existing CSV functionality for redundancy
         with open(self.log_file, 'w', newline='') as f:
@@ -1,7 +1,8 @@
 import time
+import numpy as np
 import pandas as pd
 import logging
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 from python_engine.models.data_models import MarketEvent, MessageType, VolumeBar, Sentiment
 from python_engine.core.market_structure_handler import MarketStructureHandler
 from python_engine.core.sentiment_handler import SentimentHandler
@@ -9,6 +10,7 @@ from python_engine.core.option_chain_handler import OptionChainHandler
 from python_engine.core.pattern_matcher_handler import PatternMatcherHandler
 from python_engine.core.execution_handler import ExecutionHandler
 from python_engine.data.repository import DataRepository
+from python_engine.data.stats_timeline import StatsTimeline
 from python_engine.utils.atr_calculator import calculate_atr
 
 # Standardized Logging
@@ -22,6 +24,9 @@ class TradingEngine:
     modules, providing a unified interface for both backtest and live operations.
     """
 
+    # Live events for these symbols run the full pipeline; others skip pattern matching
+    LIVE_PATTERN_SYMBOLS = frozenset({"NSE|INDEX|NIFTY", "NSE|INDEX|BANKNIFTY", "NIFTY", "BANKNIFTY"})
+
     def __init__(self, order_orchestrator: Any, data_manager: Any, strategy_dir: str):
         """
         Initializes the TradingEngine and its modular handler pipeline.
@@ -50,14 +55,17 @@ class TradingEngine:
             self.pattern_matcher,
             self.execution_handler
         ]
+        self._price_pipeline = [h for h in self.pipeline if h is not self.pattern_matcher]
 
-    def run_backtest(self, symbol: str, candles_df: pd.DataFrame) -> None:
+    def run_backtest(self, symbol: str, candles_df: pd.DataFrame, columnar: bool = True) -> None:
         """
         Executes a vectorized backtest over a dataframe of historical candles.
 
         Args:
             symbol (str): The symbol to backtest.
             candles_df (pd.DataFrame): Dataframe containing OHLCV data.
+            columnar (bool): Drive the pipeline from preloaded NumPy columns
+                (default). When False, the legacy row-by-row loop is used.
         """
         if candles_df is None or candles_df.empty:
             logger.warning("[TradingEngine] No data provided for backtest.")
@@ -69,6 +77,120 @@ class TradingEngine:
         candles_df = candles_df.copy()
         candles_df['atr'] = calculate_atr(candles_df)
 
+        if columnar:
+            # As-of join of the closest market stats snapshot onto every bar
+            stats = self.repository.join_closest_stats(symbol, candles_df.index)
+            for col in stats.columns:
+                candles_df[col] = stats[col].to_numpy()
+            self._run_backtest_columnar(symbol, candles_df)
+        else:
+            self._run_backtest_rows(symbol, candles_df)
+
+    def _run_backtest_columnar(self, symbol: str, candles_df: pd.DataFrame) -> None:
+        """
+        Columnar backtest loop driven by integer offsets into preloaded arrays.
+
+        OHLCV, ATR, market stats and the daily option-chain snapshots are read
+        once for the whole range, so the per-bar work is limited to building
+        the event and running the handler pipeline.
+
+        Args:
+            symbol (str): The symbol to backtest.
+            candles_df (pd.DataFrame): Timestamp-indexed OHLCV data with 'atr'
+                and the sentiment columns from DataRepository.join_closest_stats.
+        """
+        index = pd.DatetimeIndex(candles_df.index)
+        ts_ns = index.values.astype('datetime64[ns]').astype(np.int64)
+        epochs = (ts_ns // 10**9).tolist()
+        dates = index.strftime('%Y-%m-%d')
+        from_date, to_date = dates[0], dates[-1]
+
+        opens = candles_df['open'].tolist()
+        highs = candles_df['high'].tolist()
+        lows = candles_df['low'].tolist()
+        closes = candles_df['close'].tolist()
+        volumes = candles_df['volume'].tolist()
+        atrs = candles_df['atr'].tolist()
+
+        has_stats = candles_df['has_stats'].tolist()
+        stats_cols = {col: candles_df[col].tolist() for col, _ in StatsTimeline.SENTIMENT_COLUMNS}
+        chains_by_date = self._preload_option_chains(symbol, from_date, to_date)
+
+        last_date = None
+        current_option_chain = None
+
+        for i in range(len(epochs)):
+            curr_date = dates[i]
+            if curr_date != last_date:
+                current_option_chain = chains_by_date.get(curr_date)
+                last_date = curr_date
+
+            sentiment = None
+            if has_stats[i]:
+                sentiment = Sentiment(
+                    pcr=stats_cols['pcr'][i],
+                    pcr_velocity=stats_cols['pcr_velocity'][i],
+                    oi_wall_above=stats_cols['oi_wall_above'][i],
+                    oi_wall_below=stats_cols['oi_wall_below'][i],
+                    smart_trend=stats_cols['smart_trend'][i],
+                    advances=stats_cols['advances'][i],
+                    declines=stats_cols['declines'][i]
+                )
+
+            ts = epochs[i]
+            event = MarketEvent(
+                type=MessageType.MARKET_UPDATE,
+                timestamp=ts,
+                symbol=symbol,
+                candle=VolumeBar(
+                    symbol=symbol,
+                    timestamp=ts,
+                    open=opens[i],
+                    high=highs[i],
+                    low=lows[i],
+                    close=closes[i],
+                    volume=volumes[i],
+                    atr=atrs[i]
+                ),
+                sentiment=sentiment,
+                option_chain=current_option_chain
+            )
+
+            for handler in self.pipeline:
+                handler.on_event(event)
+
+    def _preload_option_chains(self, symbol: str, from_date: str, to_date: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Loads the option-chain snapshots for the whole range in a single query.
+
+        Args:
+            symbol (str): Canonical symbol.
+            from_date (str): First trading date (YYYY-MM-DD).
+            to_date (str): Last trading date (YYYY-MM-DD).
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Option-chain records keyed by date.
+        """
+        chain = self.repository.get_option_chain_range(symbol, from_date, to_date)
+        if chain is None or chain.empty:
+            return {}
+
+        chain_dates = pd.to_datetime(chain['timestamp']).dt.strftime('%Y-%m-%d').to_numpy()
+        unique_dates, starts = np.unique(chain_dates, return_index=True)
+        bounds = list(starts) + [len(chain)]
+        return {
+            date: chain.iloc[bounds[j]:bounds[j + 1]].to_dict('records')
+            for j, date in enumerate(unique_dates)
+        }
+
+    def _run_backtest_rows(self, symbol: str, candles_df: pd.DataFrame) -> None:
+        """
+        Legacy row-by-row backtest loop, kept for parity checks.
+
+        Args:
+            symbol (str): The symbol to backtest.
+            candles_df (pd.DataFrame): Timestamp-indexed OHLCV data with 'atr'.
+        """
         last_date = None
         current_option_chain = None
 
@@ -117,19 +239,31 @@ class TradingEngine:
             for handler in self.pipeline:
                 handler.on_event(event)
 
-    async def run_live(self, event_queue: Any) -> None:
+    async def run_live(self, event_queue: Any, on_processed: Optional[Callable[[MarketEvent, float], None]] = None) -> None:
         """
         Main asynchronous loop for live trading ingestion and processing.
 
         Args:
             event_queue (Any): Asyncio queue consuming real-time market events.
+            on_processed (Optional[Callable]): Called with each event and the
+                seconds its handlers took, e.g. for latency metrics.
         """
         logger.info("[TradingEngine] Live engine pipeline activated.")
         while True:
             event = await event_queue.get()
-            if event is None: break
-
-            for handler in self.pipeline:
-                handler.on_event(event)
+            if event is None:
+                event_queue.task_done()
+                break
 
-            event_queue.task_done()
+            start = time.perf_counter()
+            try:
+                # Option candles only feed prices; patterns trigger on index bars
+                handlers = self.pipeline if event.symbol in self.LIVE_PATTERN_SYMBOLS else self._price_pipeline
+                for handler in handlers:
+                    handler.on_event(event)
+            except Exception as e:
+                logger.error(f"[TradingEngine] Handler error for {event.symbol}: {e}")
+            finally:
+                event_queue.task_done()
+            if on_processed is not None:
+                on_processed(event, time.perf_counter() - start)
@@ -0,0 +1,236 @@
+import threading
+import logging
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from python_engine.utils.symbol_master import MASTER as SymbolMaster
+
+# Standardized Logging
+logger = logging.getLogger(__name__)
+
+_NO_OPTION = (None, None)
+
+
+def strike_step(underlying: str) -> int:
+    """Strike spacing used for ATM rounding (matches DataManager.calculate_atm_strike)."""
+    return 100 if "BANKNIFTY" in underlying.upper() else 50
+
+
+def option_trading_symbol(prefix: str, strike: int, option_type: str, expiry: str) -> str:
+    """Trading symbol in instrument-master form, e.g. 'NIFTY 25000 CE 20 JAN 26'."""
+    return f"{prefix} {strike} {option_type} {pd.to_datetime(expiry).strftime('%d %b %y').upper()}"
+
+
+class _DayAtmTable:
+    """
+    One underlying-day of option contracts: (strike, 'CE'/'PE') -> (instrument_key, trading_symbol).
+
+    Only the day's nearest expiry is kept (the earliest one not before the
+    trading day, else the latest seen). The keys recorded in
+    option_chain_data win; strikes without one are resolved through the
+    instrument master by trading symbol. Each strike remembers the minute
+    it was first stored, so a lookup can be limited to the strikes the
+    chain had listed by then.
+    """
+
+    __slots__ = ('expiry', 'step', 'contracts', 'strikes', 'first_seen')
+
+    def __init__(self, prefix: str, day: str, chain: Optional[pd.DataFrame]):
+        self.expiry: Optional[str] = None
+        self.step = strike_step(prefix)
+        self.contracts: Dict[Tuple[int, str], Tuple[Optional[str], Optional[str]]] = {}
+        self.strikes = np.empty(0, dtype=np.int64)
+        self.first_seen = np.empty(0, dtype=np.int64)  # ts_min per strike
+        if chain is None or chain.empty:
+            return
+
+        expiries = sorted(e for e in chain['expiry'].dropna().unique())
+        if not expiries:
+            return
+        self.expiry = next((e for e in expiries if str(e)[:10] >= day), expiries[-1])
+
+        rows = chain[chain['expiry'] == self.expiry]
+        # Latest non-null key per strike, taken column by column
+        keys = {}
+        for option_type, column in (('CE', 'call_instrument_key'), ('PE', 'put_instrument_key')):
+            known = rows[['strike', column]].dropna().drop_duplicates('strike', keep='last')
+            keys[option_type] = dict(zip(known['strike'].astype(int), known[column]))
+
+        first_seen = rows.groupby(rows['strike'].astype(int))['ts_min'].min()
+        strikes = first_seen.index.to_numpy(dtype=np.int64)
+        for strike in strikes:
+            strike = int(strike)
+            for option_type in ('CE', 'PE'):
+                trading_symbol = option_trading_symbol(prefix, strike, option_type, self.expiry)
+                key = keys[option_type].get(strike) or SymbolMaster.get_upstox_key(trading_symbol)
+                if not key:
+                    self.contracts[(strike, option_type)] = _NO_OPTION
+                    continue
+                actual = SymbolMaster.get_ticker_from_key(key)
+                self.contracts[(strike, option_type)] = (key, actual if actual and actual != key else trading_symbol)
+        self.strikes = strikes
+        self.first_seen = first_seen.to_numpy(dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def _listed(self, at_min: Optional[int]) -> np.ndarray:
+        return self.strikes if at_min is None else self.strikes[self.first_seen <= at_min]
+
+    def has_strikes(self, at_min: Optional[int] = None) -> bool:
+        """True if any strike was stored by `at_min` (epoch minute; None = any time of the day)."""
+        return bool(len(self._listed(at_min)))
+
+    def atm_strike(self, spot_price: float, at_min: Optional[int] = None) -> Optional[int]:
+        """ATM strike for `spot_price`: the rounded strike, else the nearest one listed (by `at_min`, if given)."""
+        strikes = self._listed(at_min)
+        if not len(strikes):
+            return None
+        atm = int(round(spot_price / self.step) * self.step)
+        i = int(np.searchsorted(strikes, atm))
+        if i < len(strikes) and strikes[i] == atm:
+            return atm
+        # Spot outside the stored window; take the closest listed strike (lower one on a tie)
+        candidates = [int(s) for s in strikes[max(0, i - 1):i + 1]]
+        return min(candidates, key=lambda s: abs(s - atm))
+
+    def lookup(self, side: str, spot_price: float, at_min: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
+        strike = self.atm_strike(spot_price, at_min)
+        if strike is None:
+            return _NO_OPTION
+        return self.contracts.get((strike, "CE" if side.upper() == 'BUY' else "PE"), _NO_OPTION)
+
+
+class AtmOptionTable:
+    """
+    Per-day ATM option resolution shared by backtests and the UI.
+
+    The first lookup for an underlying on a trading day loads that day's
+    option_chain_data once and resolves every (strike, CE/PE) contract of
+    its nearest expiry to an instrument key and trading symbol. Later
+    lookups round spot to the strike step and hit a dict. Underlying-days
+    are evicted least-recently-used.
+
+    A lookup given a time only considers strikes stored by then. When the
+    day has no chain (yet), it falls back to the contracts of the most
+    recent earlier day with a stored chain, as the old "latest chain at or
+    before the trade" query did.
+    """
+
+    def __init__(self, db_manager, max_days: int = 64):
+        """
+        Initializes the table cache.
+
+        Args:
+            db_manager (DatabaseManager): Source of option_chain_data.
+            max_days (int): Maximum number of underlying-days kept in memory.
+        """
+        self._db = db_manager
+        self._max_days = max_days
+        self._days: "OrderedDict[Tuple[str, str], _DayAtmTable]" = OrderedDict()
+        self._fallbacks: "OrderedDict[Tuple[str, str], _DayAtmTable]" = OrderedDict()  # Keyed by the day they stand in for
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _prefix(underlying: str) -> str:
+        return "BANKNIFTY" if "BANK" in underlying.upper() else "NIFTY"
+
+    def day(self, underlying: str, day: str) -> _DayAtmTable:
+        """
+        Returns the contract table for `underlying` on `day`, building it on first use.
+
+        Args:
+            underlying (str): 'NIFTY' / 'BANKNIFTY' or any alias SymbolMaster knows.
+            day (str): Trading date as YYYY-MM-DD.
+        """
+        prefix = self._prefix(underlying)
+        key = (prefix, day)
+        with self._lock:
+            table = self._days.get(key)
+            if table is not None:
+                self._days.move_to_end(key)
+                self.hits += 1
+                return table
+        chain = None
+        try:
+            chain = self._db.get_option_chain_contracts(SymbolMaster.get_canonical_ticker(prefix), day)
+        except Exception as e:
+            logger.error(f"Error loading option contracts for {prefix} on {day}: {e}")
+        table = _DayAtmTable(prefix, day, chain)
+        with self._lock:
+            self.misses += 1
+            if not len(table):
+                # Not cached: the chain for this day may still be ingested
+                return table
+            self._days[key] = table
+            self._days.move_to_end(key)
+            while len(self._days) > self._max_days:
+                self._days.popitem(last=False)
+        return table
+
+    def previous_day(self, underlying: str, day: str) -> _DayAtmTable:
+        """
+        Contracts of the most recent earlier day with a stored chain, standing in for `day`.
+
+        The expiry is still chosen relative to `day`. Empty if no earlier chain exists.
+        """
+        prefix = self._prefix(underlying)
+        key = (prefix, day)
+        with self._lock:
+            table = self._fallbacks.get(key)
+            if table is not None:
+                self._fallbacks.move_to_end(key)
+                return table
+        chain = None
+        try:
+            canonical = SymbolMaster.get_canonical_ticker(prefix)
+            source_day = self._db.get_previous_option_chain_day(canonical, day)
+            if source_day is not None:
+                chain = self._db.get_option_chain_contracts(canonical, source_day)
+        except Exception as e:
+            logger.error(f"Error loading the option contracts preceding {day} for {prefix}: {e}")
+        table = _DayAtmTable(prefix, day, chain)
+        with self._lock:
+            self._fallbacks[key] = table
+            while len(self._fallbacks) > self._max_days:
+                self._fallbacks.popitem(last=False)
+        return table
+
+    def lookup(self, underlying: str, side: str, spot_price: float, day: str,
+               at_min: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Resolves the ATM option for a trade side.
+
+        Args:
+            underlying (str): 'NIFTY' / 'BANKNIFTY' or any alias SymbolMaster knows.
+            side (str): 'BUY' resolves the call, anything else the put.
+            spot_price (float): Underlying price to centre on.
+            day (str): Trading date as YYYY-MM-DD.
+            at_min (Optional[int]): Epoch minute of the trade; only strikes stored
+                by then are considered. None uses the whole day.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (instrument_key, trading_symbol), or (None, None).
+        """
+        if not spot_price:
+            return _NO_OPTION
+        table = self.day(underlying, day)
+        if table.has_strikes(at_min):
+            return table.lookup(side, spot_price, at_min)
+        return self.previous_day(underlying, day).lookup(side, spot_price)
+
+    def invalidate(self, underlying: str, day: str) -> None:
+        """Drops one underlying-day, e.g. after its option chain was backfilled."""
+        with self._lock:
+            self._days.pop((self._prefix(underlying), day), None)
+            # Days after this one may have been standing in with an older chain
+            self._fallbacks.clear()
+
+    def clear(self) -> None:
+        """Drops every cached underlying-day."""
+        with self._lock:
+            self._days.clear()
+            self._fallbacks.clear()
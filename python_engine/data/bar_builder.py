@@ -0,0 +1,146 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MINUTE_MS = 60_000
+_DAY_MS = 24 * 60 * _MINUTE_MS
+_IST_OFFSET_MS = 330 * _MINUTE_MS  # Trading days are IST calendar days
+
+
+@dataclass
+class BuiltBar:
+    """A finalized 1-minute bar; `minute_ms` is the bar's start in epoch milliseconds."""
+    key: str
+    minute_ms: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    source: str  # 'feed' (exchange I1 OHLC) or 'ticks' (aggregated ltpc)
+
+
+@dataclass
+class BarGap:
+    """A closed minute the builder could not assemble; the caller should fetch it over REST."""
+    key: str
+    minute_ms: int
+
+
+class _BarState:
+    __slots__ = ('minute_ms', 'open', 'high', 'low', 'close', 'volume', 'complete', 'feed_bar')
+
+    def __init__(self, minute_ms: int, complete: bool):
+        self.minute_ms = minute_ms
+        self.open = self.high = self.low = self.close = None
+        self.volume = 0
+        # False when the minute was joined midway (startup / reconnect): its ticks are not the full bar
+        self.complete = complete
+        self.feed_bar: Optional[Dict[str, Any]] = None
+
+    def add_tick(self, price: float, qty: int) -> None:
+        if self.open is None:
+            self.open = self.high = self.low = price
+        else:
+            self.high = max(self.high, price)
+            self.low = min(self.low, price)
+        self.close = price
+        self.volume += qty
+
+
+class BarBuilder:
+    """
+    Assembles finalized 1-minute bars from Upstox V3 full-feed messages.
+
+    Each feed carries the exchange's running I1 OHLC for the current minute
+    (and usually the previous one) plus the last trade in `ltpc`. When a feed
+    for a later minute arrives, the previous minute is closed: the exchange
+    I1 candle for that minute is used when seen, otherwise the bar aggregated
+    from ltpc ticks. A minute that was only partly observed (first minute
+    after start or reconnect) and has no I1 candle is reported as a BarGap,
+    and so is every minute skipped without any feed (quiet instrument,
+    dropped messages, or a disconnect), unless the new feed carries its I1
+    candle. Skipped minutes are only reported within one trading day, so an
+    overnight reconnect does not ask for the closed market's minutes.
+
+    Not thread-safe; feed it from the websocket callback thread only.
+    """
+
+    def __init__(self):
+        self._states: Dict[str, _BarState] = {}
+        self._last_closed: Dict[str, int] = {}  # key -> last minute emitted as a bar or gap; survives reset()
+
+    def reset(self) -> None:
+        """Forgets all in-progress bars (call on reconnect); the next feed reports the minutes missed meanwhile."""
+        self._states.clear()
+
+    @staticmethod
+    def _parse_feed(feed: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        ff = feed.get('fullFeed', {})
+        body = ff.get('marketFF') or ff.get('indexFF') or {}
+        ohlc = body.get('marketOHLC', {}).get('ohlc', [])
+        return body.get('ltpc'), [o for o in ohlc if o.get('interval') == 'I1']
+
+    @staticmethod
+    def _bar_from_i1(key: str, candle: Dict[str, Any]) -> BuiltBar:
+        return BuiltBar(key, int(candle['ts']), float(candle['open']), float(candle['high']), float(candle['low']),
+                        float(candle['close']), int(candle.get('vol', 0) or 0), 'feed')
+
+    def _skipped(self, key: str, after_ms: int, before_ms: int, i1: List[Dict[str, Any]]) -> List[Any]:
+        """Bars (from I1 candles in the feed) or gaps for the minutes strictly between two minutes of one day."""
+        if (after_ms + _IST_OFFSET_MS) // _DAY_MS != (before_ms + _IST_OFFSET_MS) // _DAY_MS:
+            return []
+        candles = {int(c['ts']): c for c in i1}
+        return [self._bar_from_i1(key, candles[m]) if m in candles else BarGap(key, m)
+                for m in range(after_ms + _MINUTE_MS, before_ms, _MINUTE_MS)]
+
+    def update(self, key: str, feed: Dict[str, Any]) -> List[Any]:
+        """
+        Applies one instrument feed.
+
+        Args:
+            key (str): Upstox instrument key.
+            feed (Dict[str, Any]): The instrument's entry in message['feeds'].
+
+        Returns:
+            List[Any]: BuiltBar / BarGap items for minutes closed by this feed, oldest first.
+        """
+        ltpc, i1 = self._parse_feed(feed)
+        ltt = int(ltpc['ltt']) if ltpc and ltpc.get('ltt') else None
+        minute_ms = max([int(c['ts']) for c in i1] + ([ltt - ltt % _MINUTE_MS] if ltt else []), default=None)
+        if minute_ms is None:
+            return []
+
+        state = self._states.get(key)
+        closed: List[Any] = []
+        if state is None:
+            last_closed = self._last_closed.get(key)
+            if last_closed is not None and minute_ms <= last_closed:
+                return []  # Late message for a minute already closed
+            if last_closed is not None:
+                closed.extend(self._skipped(key, last_closed, minute_ms, i1))
+            state = self._states[key] = _BarState(minute_ms, complete=False)
+        elif minute_ms > state.minute_ms:
+            # The previous minute's exchange candle usually rides along with the new minute
+            prev_i1 = next((c for c in i1 if int(c['ts']) == state.minute_ms), None) or state.feed_bar
+            if prev_i1 is not None:
+                closed.append(self._bar_from_i1(key, prev_i1))
+            elif state.complete and state.open is not None:
+                closed.append(BuiltBar(key, state.minute_ms, state.open, state.high, state.low, state.close, state.volume, 'ticks'))
+            else:
+                closed.append(BarGap(key, state.minute_ms))
+            closed.extend(self._skipped(key, state.minute_ms, minute_ms, i1))
+            state = self._states[key] = _BarState(minute_ms, complete=True)
+        elif minute_ms < state.minute_ms:
+            return []  # Late message for a minute already closed
+        if closed:
+            self._last_closed[key] = closed[-1].minute_ms
+
+        current = next((c for c in i1 if int(c['ts']) == state.minute_ms), None)
+        if current is not None:
+            state.feed_bar = current
+        if ltpc and ltt is not None and ltt - ltt % _MINUTE_MS == state.minute_ms and ltpc.get('ltp') is not None:
+            state.add_tick(float(ltpc['ltp']), int(ltpc.get('ltq', 0) or 0))
+        return closed
@@ -0,0 +1,142 @@
+import threading
+import logging
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from python_engine.models.data_models import VolumeBar
+from python_engine.utils.symbol_master import MASTER as SymbolMaster
+
+# Standardized Logging
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class _DayCandles:
+    """One instrument-day of 1-minute candles as parallel NumPy arrays."""
+
+    __slots__ = ('ts', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, df: Optional[pd.DataFrame]):
+        if df is None or df.empty:
+            self.ts = np.empty(0, dtype=np.int64)
+            self.open = self.high = self.low = self.close = np.empty(0, dtype=float)
+            self.volume = np.empty(0, dtype=np.int64)
+            return
+        df = df.copy()
+        df['timestamp_dt'] = pd.to_datetime(df['timestamp'])
+        df = df.sort_values('timestamp_dt', kind='stable')
+        # Naive wall-clock seconds, the same value pd.Timestamp.timestamp() yields
+        self.ts = df['timestamp_dt'].values.astype('datetime64[s]').astype(np.int64)
+        self.open = df['open'].to_numpy(dtype=float)
+        self.high = df['high'].to_numpy(dtype=float)
+        self.low = df['low'].to_numpy(dtype=float)
+        self.close = df['close'].to_numpy(dtype=float)
+        self.volume = df['volume'].fillna(0).to_numpy(dtype=np.int64)
+
+
+class OptionCandleCache:
+    """
+    Day-at-a-time cache of 1-minute candles for "candle at t" lookups.
+
+    The first lookup for an instrument on a given day loads that whole day in
+    one query; later lookups are a binary search over the timestamp array.
+    Instrument-days are evicted least-recently-used.
+
+    Lookups mirror DataManager.get_historical_candle_for_timestamp: the
+    candidates are the candles from the start of the minute 30 seconds
+    before `t` to the end of the minute 30 seconds after it, and the one
+    nearest to `t` wins (the earlier one on a tie).
+    """
+
+    def __init__(self, db_manager, max_days: int = 256):
+        """
+        Initializes the cache.
+
+        Args:
+            db_manager (DatabaseManager): Source of historical candles.
+            max_days (int): Maximum number of instrument-days kept in memory.
+        """
+        self._db = db_manager
+        self._max_days = max_days
+        self._days: "OrderedDict[tuple, _DayCandles]" = OrderedDict()  # (canonical, day) -> candles
+        self._canonical: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _canonical_symbol(self, symbol: str) -> str:
+        canonical = self._canonical.get(symbol)
+        if canonical is None:
+            canonical = self._canonical[symbol] = SymbolMaster.get_canonical_ticker(symbol)
+        return canonical
+
+    def _get_day(self, symbol: str, day: str) -> _DayCandles:
+        canonical = self._canonical_symbol(symbol)
+        key = (canonical, day)
+        with self._lock:
+            candles = self._days.get(key)
+            if candles is not None:
+                self._days.move_to_end(key)
+                self.hits += 1
+                return candles
+        df = None
+        try:
+            df = self._db.get_historical_candles(canonical, 'NSE', '1m', f"{day} 00:00:00", f"{day} 23:59:59")
+        except Exception as e:
+            logger.error(f"Error loading candles for {canonical} on {day}: {e}")
+        candles = _DayCandles(df)
+        with self._lock:
+            self.misses += 1
+            self._days[key] = candles
+            self._days.move_to_end(key)
+            while len(self._days) > self._max_days:
+                self._days.popitem(last=False)
+        return candles
+
+    def get_candle(self, symbol: str, timestamp: float) -> Optional[VolumeBar]:
+        """
+        Returns the candle nearest to `timestamp` within the lookup window.
+
+        Args:
+            symbol (str): Instrument key or trading symbol.
+            timestamp (float): Epoch seconds, interpreted like datetime.fromtimestamp.
+
+        Returns:
+            Optional[VolumeBar]: The candle, or None if there is none in the window.
+        """
+        dt = datetime.fromtimestamp(timestamp)
+        candles = self._get_day(symbol, dt.strftime('%Y-%m-%d'))
+        ts = candles.ts
+        if len(ts) == 0:
+            return None
+
+        t = (dt - _EPOCH).total_seconds()
+        lo = (dt - timedelta(seconds=30)).replace(second=0, microsecond=0)
+        hi = (dt + timedelta(seconds=30)).replace(second=59, microsecond=0)
+        lo_s, hi_s = (lo - _EPOCH).total_seconds(), (hi - _EPOCH).total_seconds()
+
+        i = int(np.searchsorted(ts, t, side='right'))
+        best = -1
+        if i > 0 and ts[i - 1] >= lo_s:
+            best = i - 1
+        if i < len(ts) and ts[i] <= hi_s and (best < 0 or ts[i] - t < t - ts[best]):
+            best = i
+        if best < 0:
+            return None
+        return VolumeBar(
+            symbol=symbol,
+            timestamp=float(ts[best]),
+            open=float(candles.open[best]),
+            high=float(candles.high[best]),
+            low=float(candles.low[best]),
+            close=float(candles.close[best]),
+            volume=int(candles.volume[best])
+        )
+
+    def clear(self) -> None:
+        """Drops every cached instrument-day."""
+        with self._lock:
+            self._days.clear()
@@ -1,9 +1,12 @@
+import threading
+import numpy as np
 import pandas as pd
 import logging
-from typing import Optional, Dict, Any, List
-from functools import lru_cache
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Sequence
 from datetime import datetime
 from data_sourcing.database_manager import DatabaseManager
+from python_engine.data.stats_timeline import StatsTimeline
 from python_engine.utils.symbol_master import MASTER as SymbolMaster
 
 # Standardized Logging
@@ -20,11 +23,16 @@ class DataRepository:
     _instance = None
     _meta_cache: Dict[str, Any] = {}
 
+    # Maximum number of (symbol, day) stats timelines kept in memory
+    MAX_STATS_DAYS = 512
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DataRepository, cls).__new__(cls)
             cls._instance.db = DatabaseManager()
             cls._instance.db.initialize_database()
+            cls._instance._timelines: "OrderedDict[tuple, StatsTimeline]" = OrderedDict()  # (symbol, day) -> timeline
+            cls._instance._timeline_lock = threading.Lock()
         return cls._instance
 
     def get_historical_candles(self, symbol: str, exchange: str = 'NSE',
@@ -90,11 +98,108 @@ class DataRepository:
             logger.error(f"Error fetching option chain for {symbol} on {date_str}: {e}")
         return None
 
-    @lru_cache(maxsize=1024)
+    def get_option_chain_range(self, symbol: str, from_date: str, to_date: str) -> Optional[pd.DataFrame]:
+        """
+        Retrieves all option chain snapshots between two dates in one query.
+
+        Args:
+            symbol (str): Canonical symbol.
+            from_date (str): Start date (YYYY-MM-DD).
+            to_date (str): End date (YYYY-MM-DD), inclusive.
+
+        Returns:
+            Optional[pd.DataFrame]: Snapshots ordered by timestamp and strike.
+        """
+        try:
+            return self.db.get_option_chain_range(symbol, from_date, to_date)
+        except Exception as e:
+            logger.error(f"Error fetching option chain for {symbol} from {from_date} to {to_date}: {e}")
+        return None
+
+    def _cache_timeline(self, symbol: str, date_str: str, timeline: StatsTimeline) -> None:
+        # Today's stats are still being written, so only closed days are cached
+        if date_str == datetime.now().strftime('%Y-%m-%d'):
+            return
+        with self._timeline_lock:
+            self._timelines[(symbol, date_str)] = timeline
+            self._timelines.move_to_end((symbol, date_str))
+            while len(self._timelines) > self.MAX_STATS_DAYS:
+                self._timelines.popitem(last=False)
+
+    def get_stats_timeline(self, symbol: str, date_str: str) -> StatsTimeline:
+        """
+        Returns the market stats of one trading day as a StatsTimeline.
+
+        Closed days are loaded once and kept in an LRU cache; the current
+        day is re-read on every call.
+
+        Args:
+            symbol (str): Canonical symbol.
+            date_str (str): Trading day (YYYY-MM-DD).
+
+        Returns:
+            StatsTimeline: The day's snapshots (empty if there are none).
+        """
+        with self._timeline_lock:
+            timeline = self._timelines.get((symbol, date_str))
+            if timeline is not None:
+                self._timelines.move_to_end((symbol, date_str))
+                return timeline
+        timeline = StatsTimeline(self.get_market_stats(symbol, date_str, date_str))
+        self._cache_timeline(symbol, date_str, timeline)
+        return timeline
+
+    def preload_stats_timelines(self, symbol: str, dates: Sequence[str]) -> None:
+        """
+        Loads the stats timelines of several days with a single query.
+
+        Args:
+            symbol (str): Canonical symbol.
+            dates (Sequence[str]): Trading days (YYYY-MM-DD); days without
+                snapshots are cached as empty timelines.
+        """
+        with self._timeline_lock:
+            missing = sorted(d for d in set(dates) if (symbol, d) not in self._timelines)
+        if not missing:
+            return
+        stats = self.get_market_stats(symbol, missing[0], missing[-1])
+        by_day = {}
+        if stats is not None and not stats.empty:
+            days = pd.to_datetime(stats['timestamp']).dt.strftime('%Y-%m-%d')
+            by_day = {day: group for day, group in stats.groupby(days.to_numpy(), sort=False)}
+        for day in missing:
+            self._cache_timeline(symbol, day, StatsTimeline(by_day.get(day)))
+
+    def join_closest_stats(self, symbol: str, timestamps: Sequence) -> pd.DataFrame:
+        """
+        Attaches the closest market stats snapshot to every bar in one pass.
+
+        Args:
+            symbol (str): Canonical symbol.
+            timestamps (Sequence): Naive bar timestamps (e.g. a candle DatetimeIndex).
+
+        Returns:
+            pd.DataFrame: Sentiment columns plus 'has_stats', indexed like
+            `timestamps` (see StatsTimeline.join).
+        """
+        index = pd.DatetimeIndex(timestamps)
+        dates = index.strftime('%Y-%m-%d').to_numpy()
+        days = pd.unique(dates)
+        if len(days) == 0:
+            return StatsTimeline().join(index)
+        self.preload_stats_timelines(symbol, days)
+
+        positions = [np.flatnonzero(dates == day) for day in days]
+        joined = pd.concat([self.get_stats_timeline(symbol, day).join(index[pos]) for day, pos in zip(days, positions)])
+        # Restore the caller's row order
+        joined = joined.iloc[np.argsort(np.concatenate(positions), kind='stable')]
+        joined.index = timestamps
+        return joined
+
     def get_closest_stats(self, symbol: str, timestamp: datetime) -> Optional[Dict[str, Any]]:
         """
         Fetches the market stats snapshot closest to the given timestamp.
-        Implements LRU caching for high-frequency backtest lookups.
+        Served from the day's cached StatsTimeline.
 
         Args:
             symbol (str): Canonical symbol.
@@ -104,17 +209,12 @@ class DataRepository:
             Optional[Dict[str, Any]]: The closest market stats record.
         """
         try:
-            ts_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            date_str = timestamp.strftime('%Y-%m-%d')
-            stats = self.db.get_market_stats(symbol, date_str, ts_str)
-            if not stats.empty:
-                stats['timestamp_dt'] = pd.to_datetime(stats['timestamp'])
-                stats['diff'] = (stats['timestamp_dt'] - timestamp).abs()
-                return stats.sort_values('diff').iloc[0].to_dict()
+            return self.get_stats_timeline(symbol, timestamp.strftime('%Y-%m-%d')).closest(timestamp)
         except Exception as e:
             logger.error(f"Error fetching closest stats for {symbol} at {timestamp}: {e}")
         return None
 
     def clear_cache(self) -> None:
         """Clears the internal retrieval caches."""
-        self.get_closest_stats.cache_clear()
+        with self._timeline_lock:
+            self._timelines.clear()
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+from data_sourcing.data_manager import DataManager
+from python_engine.models.data_models import Sentiment, SentimentSnapshot
+from python_engine.utils.math_engine import MathEngine
+from python_engine.utils.symbol_master import MASTER as SymbolMaster
+
+logger = logging.getLogger(__name__)
+
+
+def underlying_for(ticker: str) -> Optional[str]:
+    """Canonical index symbol whose sentiment applies to `ticker` (index or one of its options)."""
+    upper = (ticker or "").upper()
+    if "BANKNIFTY" in upper or "NIFTY BANK" in upper:
+        return "NSE|INDEX|BANKNIFTY"
+    if "NIFTY" in upper:
+        return "NSE|INDEX|NIFTY"
+    return None
+
+
+class SentimentService:
+    """
+    Background sentiment per underlying, refreshed on a fixed cadence.
+
+    One refresher thread per underlying pulls the nearest-expiry Upstox option
+    chain. From that single pull it derives PCR, PCR velocity, the OI walls
+    around spot and the ATM smart trend. The result is published as a frozen
+    SentimentSnapshot by swapping one dict entry, so readers on the hot path
+    get it with an O(1) lookup and no locking or I/O. Failed refreshes keep
+    the previous snapshot; its `as_of` tells readers how stale it is.
+
+    Attributes:
+        interval (float): Seconds between refreshes.
+        stale_after (float): Age beyond which is_stale() reports True.
+    """
+
+    ATM_WINDOW = 100  # Strikes within this distance of ATM vote on the smart trend
+
+    def __init__(self, data_manager, symbols: Iterable[str], interval: float = 15.0,
+                 stale_after: Optional[float] = None):
+        self.data_manager = data_manager
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+        self._snapshots: Dict[str, SentimentSnapshot] = {}
+        self._previous_chain: Dict[str, pd.DataFrame] = {}
+        self._expiry: Dict[str, Tuple[date, str]] = {}
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self) -> None:
+        """Starts one daemon refresher per underlying."""
+        for symbol in self.symbols:
+            thread = threading.Thread(target=self._run, args=(symbol,), name=f"sentiment-{symbol}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, symbol: str) -> None:
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                self.refresh(symbol)
+            except Exception as e:
+                logger.warning(f"[SentimentService] Refresh failed for {symbol}: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - start)))
+
+    def get(self, symbol: str) -> Optional[SentimentSnapshot]:
+        """Latest snapshot for an underlying (or any ticker on it); None before the first refresh."""
+        underlying = underlying_for(symbol)
+        return self._snapshots.get(underlying) if underlying else None
+
+    def is_stale(self, snapshot: Optional[SentimentSnapshot], now: Optional[float] = None) -> bool:
+        return snapshot is None or snapshot.age(now) > self.stale_after
+
+    def sentiment_for(self, symbol: str) -> Tuple[Sentiment, Optional[SentimentSnapshot]]:
+        """
+        Per-event Sentiment for a ticker plus the snapshot it came from.
+
+        Returns a neutral Sentiment (and None) until the first refresh succeeds.
+        """
+        snapshot = self.get(symbol)
+        if snapshot is None:
+            return Sentiment(pcr=1.0, advances=0, declines=0, smart_trend="Neutral"), None
+        return snapshot.to_sentiment(), snapshot
+
+    def _nearest_expiry(self, symbol: str) -> Optional[str]:
+        today = date.today()
+        cached = self._expiry.get(symbol)
+        if cached and cached[0] == today:
+            return cached[1]
+        trendlyne = self.data_manager.trendlyne_client
+        stock_id = trendlyne.get_stock_id_for_symbol(symbol)
+        expiries = trendlyne.get_expiry_dates(stock_id) if stock_id else []
+        if not expiries:
+            return None
+        self._expiry[symbol] = (today, expiries[0])
+        return expiries[0]
+
+    def _pull_chain(self, symbol: str, expiry: str) -> Optional[pd.DataFrame]:
+        instrument_key = SymbolMaster.get_upstox_key(symbol)
+        if not instrument_key:
+            return None
+        response = self.data_manager.upstox_client.get_put_call_option_chain(instrument_key, expiry)
+        if not response or not response.data:
+            return None
+
+        def market(side):
+            md = side.market_data
+            return (float(getattr(md, 'ltp', None) or getattr(md, 'last_price', 0) or 0),
+                    float(getattr(md, 'close_price', 0) or 0),
+                    float(getattr(md, 'oi', 0) or 0),
+                    float(getattr(md, 'prev_oi', 0) or 0))
+
+        rows = []
+        for item in response.data:
+            c_ltp, c_close, c_oi, c_prev = market(item.call_options)
+            p_ltp, p_close, p_oi, p_prev = market(item.put_options)
+            rows.append((float(item.strike_price), float(getattr(item, 'underlying_spot_price', 0) or 0),
+                         c_ltp, c_close, c_oi, c_prev, p_ltp, p_close, p_oi, p_prev))
+        return pd.DataFrame(rows, columns=['strike', 'spot', 'call_ltp', 'call_close', 'call_oi', 'call_prev_oi',
+                                           'put_ltp', 'put_close', 'put_oi', 'put_prev_oi'])
+
+    def refresh(self, symbol: str) -> Optional[SentimentSnapshot]:
+        """Pulls the chain once and publishes a new snapshot; returns it (None on failure)."""
+        expiry = self._nearest_expiry(symbol)
+        chain = self._pull_chain(symbol, expiry) if expiry else None
+        if chain is None or chain.empty:
+            return None
+        pulled_at = time.time()
+
+        call_total, put_total = float(chain['call_oi'].sum()), float(chain['put_oi'].sum())
+        pcr = round(put_total / call_total, 4) if call_total > 0 else 1.0
+        previous = self._snapshots.get(symbol)
+        pcr_velocity = round(pcr - previous.pcr, 4) if previous else 0.0
+
+        spot = float(chain['spot'].iloc[0]) or None
+        oi_above = oi_below = 0.0
+        if spot:
+            calls, puts = chain[chain['strike'] > spot], chain[chain['strike'] < spot]
+            if not calls.empty: oi_above = float(calls.loc[calls['call_oi'].idxmax(), 'strike'])
+            if not puts.empty: oi_below = float(puts.loc[puts['put_oi'].idxmax(), 'strike'])
+
+        smart_trend = self._smart_trend(symbol, chain, spot)
+        self._previous_chain[symbol] = chain
+        snapshot = SentimentSnapshot(symbol=symbol, pcr=pcr, pcr_velocity=pcr_velocity, oi_wall_above=oi_above,
+                                     oi_wall_below=oi_below, smart_trend=smart_trend, spot=spot, expiry=expiry, as_of=pulled_at)
+        self._snapshots[symbol] = snapshot
+        return snapshot
+
+    def _smart_trend(self, symbol: str, chain: pd.DataFrame, spot: Optional[float]) -> str:
+        """
+        Most common non-neutral price/OI trend across near-ATM contracts (ties alphabetical).
+
+        Changes are measured against the previous pull, or against the
+        previous close and previous-day OI on the first pull of the session.
+        """
+        if not spot:
+            return "Neutral"
+        atm = DataManager.calculate_atm_strike(symbol, spot)
+        near = chain[(chain['strike'] - atm).abs() <= self.ATM_WINDOW]
+        previous = self._previous_chain.get(symbol)
+        if previous is not None:
+            base = near[['strike']].merge(previous, on='strike', how='left')
+            base_cols = {side: (base[f'{side}_ltp'].to_numpy(), base[f'{side}_oi'].to_numpy()) for side in ('call', 'put')}
+        else:
+            base_cols = {side: (near[f'{side}_close'].to_numpy(), near[f'{side}_prev_oi'].to_numpy()) for side in ('call', 'put')}
+
+        trends = []
+        for side, (base_price, base_oi) in base_cols.items():
+            price_change = np.nan_to_num(near[f'{side}_ltp'].to_numpy() - base_price)
+            oi_change = np.nan_to_num(near[f'{side}_oi'].to_numpy() - base_oi)
+            trends.extend(MathEngine.get_smart_trend_batch(price_change, oi_change))
+        counts = pd.Series([t for t in trends if t != "Neutral"], dtype=object).value_counts()
+        if counts.empty:
+            return "Neutral"
+        return sorted(counts[counts == counts.max()].index)[0]
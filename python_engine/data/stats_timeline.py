@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+_MINUTE_NS = 60 * 10**9
+_DAY_NS = 24 * 60 * _MINUTE_NS
+
+
+class StatsTimeline:
+    """
+    Market-stats snapshots of one symbol as timestamp-sorted NumPy columns.
+
+    Lookups follow the historical get_closest_stats rule: the candidates for
+    a bar are the snapshots of the bar's own day up to the last second of
+    the bar's minute (the whole day for a midnight bar), and the snapshot
+    with the smallest absolute distance wins (the earlier one on a tie).
+    Both single lookups and bulk as-of joins are binary searches over the
+    timestamp array.
+
+    Attributes:
+        SENTIMENT_COLUMNS (tuple): (column, default) pairs used to build a
+            Sentiment, with the default applied when the column is absent.
+    """
+
+    SENTIMENT_COLUMNS = (
+        ('pcr', 1.0), ('pcr_velocity', 0.0), ('oi_wall_above', 0.0), ('oi_wall_below', 0.0),
+        ('smart_trend', 'Neutral'), ('advances', 0), ('declines', 0)
+    )
+
+    def __init__(self, stats: Optional[pd.DataFrame] = None):
+        """
+        Builds the timeline.
+
+        Args:
+            stats (Optional[pd.DataFrame]): market_stats rows (any order).
+        """
+        if stats is None or stats.empty:
+            self.ts = np.empty(0, dtype=np.int64)
+            self.columns: Dict[str, np.ndarray] = {}
+            return
+        stats = stats.assign(timestamp_dt=pd.to_datetime(stats['timestamp']))
+        stats = stats.sort_values('timestamp_dt', kind='stable').reset_index(drop=True)
+        self.ts = stats['timestamp_dt'].values.astype('datetime64[ns]').astype(np.int64)
+        self.columns = {col: stats[col].to_numpy() for col in stats.columns if col != 'timestamp_dt'}
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def closest_indices(self, ts_ns: np.ndarray) -> np.ndarray:
+        """
+        Resolves the closest snapshot for many timestamps at once.
+
+        Args:
+            ts_ns (np.ndarray): Naive timestamps as int64 nanoseconds.
+
+        Returns:
+            np.ndarray: Row offsets into the columns, -1 where no snapshot applies.
+        """
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        stats_ns = self.ts
+        if len(stats_ns) == 0:
+            return np.full(len(ts_ns), -1, dtype=np.int64)
+
+        day_start = ts_ns - (ts_ns % _DAY_NS)
+        # Window end: last second of the bar's minute (end of day for midnight bars)
+        upper = np.where(ts_ns == day_start, day_start + _DAY_NS - 10**9,
+                         ts_ns - (ts_ns % _MINUTE_NS) + _MINUTE_NS - 10**9)
+
+        first = np.searchsorted(stats_ns, day_start, side='left')
+        last = np.searchsorted(stats_ns, upper, side='right') - 1
+        before = np.searchsorted(stats_ns, ts_ns, side='right') - 1
+        after = before + 1
+
+        has_before = before >= first
+        has_after = after <= last
+        diff_before = np.where(has_before, ts_ns - stats_ns[np.clip(before, 0, len(stats_ns) - 1)], np.iinfo(np.int64).max)
+        diff_after = np.where(has_after, stats_ns[np.clip(after, 0, len(stats_ns) - 1)] - ts_ns, np.iinfo(np.int64).max)
+
+        idx = np.where(diff_after < diff_before, after, before)
+        return np.where(last >= first, idx, -1)
+
+    def closest(self, timestamp: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Returns the snapshot closest to `timestamp` as a record.
+
+        Args:
+            timestamp (datetime): Naive bar timestamp.
+
+        Returns:
+            Optional[Dict[str, Any]]: The market_stats row, or None if there is none.
+        """
+        k = int(self.closest_indices(np.array([pd.Timestamp(timestamp).value]))[0])
+        if k < 0:
+            return None
+        return {col: values[k:k + 1].tolist()[0] for col, values in self.columns.items()}
+
+    def join(self, timestamps: Sequence) -> pd.DataFrame:
+        """
+        As-of joins the sentiment columns onto a sequence of bar timestamps.
+
+        Args:
+            timestamps (Sequence): Naive bar timestamps (e.g. a DatetimeIndex).
+
+        Returns:
+            pd.DataFrame: One row per timestamp, indexed like the input, with
+            SENTIMENT_COLUMNS plus a boolean 'has_stats' column. Rows without
+            a snapshot carry the column defaults.
+        """
+        index = pd.DatetimeIndex(timestamps)
+        idx = self.closest_indices(index.values.astype('datetime64[ns]').astype(np.int64))
+        found = idx >= 0
+        take = np.where(found, idx, 0)
+        frame = pd.DataFrame(index=timestamps)
+        for col, default in self.SENTIMENT_COLUMNS:
+            values = self.columns.get(col)
+            if values is None:
+                frame[col] = [default] * len(idx)
+            else:
+                frame[col] = values[take] if found.all() else np.where(found, values[take], default)
+        frame['has_stats'] = found
+        return frame
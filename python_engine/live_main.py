@@ -1,7 +1,9 @@
 import asyncio
 import threading
 import time
+import zlib
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import upstox_client
 from upstox_client.feeder.market_data_streamer_v3 import MarketDataStreamerV3
@@ -10,21 +12,56 @@ from python_engine.engine_config import Config
 from python_engine.core.order_orchestrator import OrderOrchestrator
 from python_engine.core.trade_logger import TradeLog
 from python_engine.core.trading_engine import TradingEngine
-from python_engine.core.pattern_matcher_handler import PatternMatcherHandler
+from python_engine.data.bar_builder import BarBuilder, BarGap, BuiltBar
+from python_engine.data.sentiment_service import SentimentService
+from python_engine.utils.latency import LatencyHistogram
+from python_engine.utils.event_bus import BUS, BAR, UdpPublisher, DEFAULT_HOST, DEFAULT_PORT
+from data_sourcing.async_db_writer import AsyncDBWriter
 from data_sourcing.data_manager import DataManager
 from python_engine.utils.symbol_master import MASTER as SymbolMaster
 
 class LiveTradingEngine:
+    """
+    Live pipeline: websocket -> bar builder -> bounded per-worker queues -> enrichment
+    workers -> event queue -> TradingEngine.run_live, with an AsyncDBWriter for persistence.
+
+    Sentiment comes from a SentimentService snapshot (O(1), no I/O); REST gap
+    fills run on a thread pool so one slow call does not stall other instruments.
+    Each instrument is routed to one worker, so its bars reach the engine in
+    minute order even when a gap fill is slow. The websocket thread blocks while
+    a raw queue is full, which pushes backpressure onto the socket instead of
+    growing memory. Per-stage latency histograms are
+    available from latency_report() and logged every `live_latency_log_secs`.
+    """
+
+    STAGES = ('queue_wait', 'rest_fallback', 'sentiment_age', 'handlers', 'db_commit', 'end_to_end')
+    GAP_CACHE_SECS = 30  # An intraday response fills further gaps of its instrument for this long
+
     def __init__(self, loop):
         self.loop = loop
         self.access_token = Config.get('upstox_access_token')
         self.data_manager = DataManager(access_token=self.access_token)
-        self.trade_log = TradeLog('live_trades.csv')
+        self.trade_log = TradeLog('live_trades.csv', journal_path=Config.get('live_trade_journal') or 'live_trades.journal.jsonl')
         self.order_orchestrator = OrderOrchestrator(self.trade_log, self.data_manager, "live")
+        # Positions still open when the previous session stopped (or crashed) keep being managed
+        self.order_orchestrator.restore_positions(self.trade_log.recover_open_trades())
         self.engine = TradingEngine(self.order_orchestrator, self.data_manager, Config.get('strategies_dir'))
         self.symbols = ["NSE|INDEX|NIFTY", "NSE|INDEX|BANKNIFTY"]
         self.subscribed_instruments = self._get_subscriptions()
-        self._last_min = {}
+        self.bar_builder = BarBuilder()
+        self.sentiment_service = SentimentService(self.data_manager, self.symbols, interval=Config.get('sentiment_refresh_secs') or 15)
+
+        queue_size = Config.get('live_queue_size') or 1000
+        self.io_workers = Config.get('live_io_workers') or 8
+        self.raw_queues = [asyncio.Queue(maxsize=max(1, queue_size // self.io_workers)) for _ in range(self.io_workers)]
+        self.event_queue = asyncio.Queue(maxsize=queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="live-io")
+        self.latency = {stage: LatencyHistogram(stage) for stage in self.STAGES}
+        self.db_writer = AsyncDBWriter(self.data_manager.db_manager, latency=self.latency['db_commit'])
+        self._received = {}  # id(event) -> perf_counter at websocket receipt
+        self._gap_candles = {}  # key -> (monotonic fetch time, {minute_ms: REST candle})
+        # Bars and trade events go to the dashboard process (ui/server.py) over local UDP
+        self.event_publisher = UdpPublisher(BUS, Config.get('ui_event_host') or DEFAULT_HOST, Config.get('ui_event_port') or DEFAULT_PORT)
 
     def _get_subscriptions(self):
         subs = {SymbolMaster.get_upstox_key(s) for s in self.symbols if SymbolMaster.get_upstox_key(s)}
@@ -37,57 +74,104 @@ class LiveTradingEngine:
         return {s for s in subs if s}
 
     def on_message(self, message):
+        # Runs on the websocket thread
         if 'feeds' not in message: return
-        feeds = message.get('feeds', {})
-        for key, feed in feeds.items():
-            ff = feed.get('fullFeed', {})
-            ohlc_data = []
-            if 'marketFF' in ff:
-                ohlc_data = ff['marketFF'].get('marketOHLC', {}).get('ohlc', [])
-            elif 'indexFF' in ff:
-                ohlc_data = ff['indexFF'].get('marketOHLC', {}).get('ohlc', [])
-
-            candle_1m = next((o for o in ohlc_data if o.get('interval') == 'I1'), None)
-            if not candle_1m: continue
-
-            ts = int(candle_1m['ts'])
-            ticker = SymbolMaster.get_ticker_from_key(key)
-            # print(f'TICKER: {ticker}')
-            if ticker not in self._last_min: self._last_min[ticker] = ts; continue
-
-            if ts > self._last_min[ticker]:
-                self._last_min[ticker] = ts
-                print(f"[LiveTradingEngine] Minute closed for {ticker} at {datetime.fromtimestamp(ts/1000)}. Fetching finalized candle...")
-                self.loop.call_soon_threadsafe(lambda k=key, t=ticker: asyncio.create_task(self.process_candle(k, t)))
-
-    async def process_candle(self, key, ticker):
-        try:
-            resp = self.data_manager.upstox_client.get_intra_day_candle_data(key, '1m')
-            if resp and hasattr(resp, 'data') and len(resp.data.candles) >= 2:
-                c = resp.data.candles[1]
-                ts_dt = pd.to_datetime(c[0])
-                df = pd.DataFrame([{'timestamp': ts_dt, 'open': float(c[1]), 'high': float(c[2]), 'low': float(c[3]), 'close': float(c[4]), 'volume': int(c[5])}])
-                self.data_manager.db_manager.store_historical_candles(ticker, 'NSE', '1m', df)
-
-                event = MarketEvent(
-                    type=MessageType.MARKET_UPDATE,
-                    timestamp=int(ts_dt.timestamp()),
-                    symbol=ticker,
-                    candle=VolumeBar(symbol=ticker, timestamp=int(ts_dt.timestamp()), open=float(c[1]), high=float(c[2]), low=float(c[3]), close=float(c[4]), volume=int(c[5])),
-                    sentiment=self.data_manager.get_current_sentiment(ticker, timestamp=int(ts_dt.timestamp()), mode='live')
-                )
-
-                # Only Indices should trigger patterns
-                if ticker in ["NSE|INDEX|NIFTY", "NSE|INDEX|BANKNIFTY", "NIFTY", "BANKNIFTY"]:
-                    handlers = self.engine.pipeline
-                else:
-                    handlers = [h for h in self.engine.pipeline if h != self.engine.pattern_matcher]
-
-                for handler in handlers:
-                    handler.on_event(event)
-
-        except Exception as e:
-            print(f"[LiveTradingEngine] Error processing candle for {ticker}: {e}")
+        received = time.perf_counter()
+        for key, feed in message.get('feeds', {}).items():
+            for item in self.bar_builder.update(key, feed):
+                # Blocks while the queue is full: backpressure on the socket reader
+                asyncio.run_coroutine_threadsafe(self._dispatch(item, received), self.loop).result()
+
+    async def _dispatch(self, item, received):
+        """Queues a bar or gap on its instrument's worker, which handles that instrument's items in order."""
+        await self.raw_queues[zlib.crc32(item.key.encode()) % len(self.raw_queues)].put((item, received))
+
+    async def _enrich_worker(self, raw_queue):
+        while True:
+            item, received = await raw_queue.get()
+            self.latency['queue_wait'].record(time.perf_counter() - received)
+            try:
+                event = await self._build_event(item)
+                if event is not None:
+                    self._received[id(event)] = received
+                    await self.event_queue.put(event)
+            except Exception as e:
+                print(f"[LiveTradingEngine] Error processing candle for {item.key}: {e}")
+            finally:
+                raw_queue.task_done()
+
+    async def _build_event(self, item):
+        ticker = SymbolMaster.get_ticker_from_key(item.key)
+        if isinstance(item, BarGap):
+            print(f"[LiveTradingEngine] Gap for {ticker} at {datetime.fromtimestamp(item.minute_ms/1000)}. Fetching candle via REST...")
+            start = time.perf_counter()
+            item = await self.loop.run_in_executor(self._executor, self._fetch_gap_bar, item)
+            self.latency['rest_fallback'].record(time.perf_counter() - start)
+            if item is None:
+                return None
+
+        ts_dt = pd.Timestamp(item.minute_ms, unit='ms', tz='UTC').tz_convert('Asia/Kolkata')
+        ts = int(ts_dt.timestamp())
+        df = pd.DataFrame([{'timestamp': ts_dt, 'open': item.open, 'high': item.high, 'low': item.low, 'close': item.close, 'volume': item.volume}])
+        await self.db_writer.submit_candles(ticker, 'NSE', '1m', df)
+
+        if BUS.has_subscribers():
+            # Chart time is the IST wall clock read as UTC, as /api/candles serves it
+            BUS.publish(BAR, {'symbol': ticker, 'key': item.key, 'time': int(ts_dt.tz_localize(None).timestamp()),
+                              'open': item.open, 'high': item.high, 'low': item.low, 'close': item.close, 'volume': item.volume})
+
+        sentiment, snapshot = self.sentiment_service.sentiment_for(ticker)
+        if snapshot is not None:
+            self.latency['sentiment_age'].record(snapshot.age())
+        if ticker in DataManager.LIVE_STATS_SYMBOLS and not self.sentiment_service.is_stale(snapshot):
+            await self.db_writer.submit_market_stats(ticker, DataManager.live_stats_frame(ts, sentiment))
+
+        return MarketEvent(
+            type=MessageType.MARKET_UPDATE,
+            timestamp=ts,
+            symbol=ticker,
+            candle=VolumeBar(symbol=ticker, timestamp=ts, open=item.open, high=item.high, low=item.low, close=item.close, volume=item.volume),
+            sentiment=sentiment
+        )
+
+    def _fetch_gap_bar(self, gap):
+        """
+        REST fallback (blocking) for a minute the bar builder could not assemble.
+
+        The full-day intraday response is kept per instrument for GAP_CACHE_SECS,
+        so the run of gaps a reconnect produces costs one request per instrument.
+        It is refetched once stale or when it does not cover the gap's minute yet.
+        An instrument's gaps are handled by one worker, so they never race here.
+        """
+        cached = self._gap_candles.get(gap.key)
+        if cached is None or time.monotonic() - cached[0] > self.GAP_CACHE_SECS or gap.minute_ms not in cached[1]:
+            resp = self.data_manager.upstox_client.get_intra_day_candle_data(gap.key, '1m')
+            if not (resp and hasattr(resp, 'data') and resp.data.candles):
+                return None
+            cached = (time.monotonic(), {int(pd.to_datetime(x[0]).timestamp() * 1000): x for x in resp.data.candles})
+            self._gap_candles[gap.key] = cached
+        c = cached[1].get(gap.minute_ms)
+        if c is None:
+            print(f"[LiveTradingEngine] No REST candle for {gap.key} at {pd.Timestamp(gap.minute_ms, unit='ms', tz='UTC')}")
+            return None
+        return BuiltBar(gap.key, gap.minute_ms, float(c[1]), float(c[2]), float(c[3]), float(c[4]), int(c[5]), 'rest')
+
+    def _on_processed(self, event, seconds):
+        self.latency['handlers'].record(seconds)
+        received = self._received.pop(id(event), None)
+        if received is not None:
+            self.latency['end_to_end'].record(time.perf_counter() - received)
+
+    def latency_report(self):
+        """Per-stage latency summaries: {stage: {'count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}}."""
+        return {stage: hist.snapshot() for stage, hist in self.latency.items()}
+
+    async def _log_latency(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"[LiveTradingEngine] Latency (queues: raw={sum(q.qsize() for q in self.raw_queues)} events={self.event_queue.qsize()})")
+            for hist in self.latency.values():
+                print(f"    {hist}")
 
     def start_websocket(self):
         conf = upstox_client.Configuration()
@@ -95,13 +179,32 @@ class LiveTradingEngine:
         streamer = MarketDataStreamerV3(upstox_client.ApiClient(conf), list(self.subscribed_instruments), "full")
         streamer.on("message", self.on_message)
         streamer.on("error", lambda e: print(f"[Websocket] Error: {e}"))
-        streamer.on("open", lambda: print("[Websocket] Connected"))
+        streamer.on("open", self._on_open)
         threading.Thread(target=streamer.connect, daemon=True).start()
 
+    def _on_open(self):
+        print("[Websocket] Connected")
+        # Bars in progress across a disconnect are incomplete; their minutes fall back to REST
+        self.bar_builder.reset()
+
     async def start(self):
+        self.db_writer.start()
+        self.sentiment_service.start()
+        self.event_publisher.start()
+        workers = [asyncio.create_task(self._enrich_worker(raw_queue)) for raw_queue in self.raw_queues]
+        reporter = asyncio.create_task(self._log_latency(Config.get('live_latency_log_secs') or 60))
         self.start_websocket()
         print(f"Live engine started. Monitoring {len(self.subscribed_instruments)} instruments.")
-        while True: await asyncio.sleep(1)
+        try:
+            await self.engine.run_live(self.event_queue, on_processed=self._on_processed)
+        finally:
+            for task in workers + [reporter]:
+                task.cancel()
+            self.sentiment_service.stop()
+            await self.db_writer.close()
+            self.trade_log.close()
+            self.event_publisher.stop()
+            self._executor.shutdown(wait=False)
 
 async def run_live():
     Config.load('config.json')
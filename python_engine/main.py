@@ -8,7 +8,7 @@ from data_sourcing.data_manager import DataManager
 from data_sourcing.ingestion import IngestionManager
 from python_engine.data.repository import DataRepository
 
-def run_backtest(symbol: str, from_date: str = None, to_date: str = None, auto_backfill: bool = True):
+def run_backtest(symbol: str, from_date: str = None, to_date: str = None, auto_backfill: bool = True, columnar: bool = True):
     # Load configuration
     Config.load('config.json')
     access_token = Config.get('upstox_access_token')
@@ -45,8 +45,9 @@ def run_backtest(symbol: str, from_date: str = None, to_date: str = None, auto_b
     candles_df.sort_index(inplace=True)
 
     # Run the Engine
-    engine.run_backtest(symbol, candles_df)
+    engine.run_backtest(symbol, candles_df, columnar=columnar)
 
     # Finalize
     trade_log.write_log_file()
+    trade_log.close()
     print(f"Backtest complete. Log saved to: {trade_log.log_file}")
@@ -1,3 +1,4 @@
+import time
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 from enum import Enum
@@ -24,6 +25,28 @@ class Sentiment:
     regime: Optional[str] = None
     smart_trend: Optional[str] = None
 
+@dataclass(frozen=True)
+class SentimentSnapshot:
+    """Immutable sentiment reading for one underlying, published by SentimentService."""
+    symbol: str
+    pcr: float
+    pcr_velocity: float
+    oi_wall_above: float
+    oi_wall_below: float
+    smart_trend: str
+    spot: Optional[float]
+    expiry: Optional[str]
+    as_of: float  # Epoch seconds when the option chain was pulled
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the snapshot was taken."""
+        return (now if now is not None else time.time()) - self.as_of
+
+    def to_sentiment(self) -> Sentiment:
+        """A fresh (mutable) Sentiment for one event; handlers may annotate it."""
+        return Sentiment(pcr=self.pcr, advances=0, declines=0, pcr_velocity=self.pcr_velocity,
+                         oi_wall_above=self.oi_wall_above, oi_wall_below=self.oi_wall_below, smart_trend=self.smart_trend)
+
 @dataclass
 class OptionChainData:
     strike: int
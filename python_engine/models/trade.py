@@ -37,6 +37,7 @@ class Trade:
     status: str = 'OPEN'
     exit_reason: Optional[str] = None
     outcome: TradeOutcome = TradeOutcome.IN_PROGRESS
+    underlying_symbol: Optional[str] = None  # Index the position was derived from (None for direct trades)
 
 @dataclass
 class Position:
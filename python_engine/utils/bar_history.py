@@ -0,0 +1,88 @@
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Union
+from python_engine.models.data_models import VolumeBar
+
+
+class BarHistory:
+    """
+    Fixed-capacity ring buffer of candles stored as NumPy columns.
+
+    Every bar is written twice, at `pos` and `pos + capacity`, so the live
+    window is always one contiguous slice of each column. column() therefore
+    returns a zero-copy view in chronological order without any reshuffling.
+    The VolumeBar objects are kept alongside so indexing and iteration still
+    yield bars, which keeps `history[-1].close` style access working.
+
+    Attributes:
+        FIELDS (tuple): Numeric VolumeBar attributes stored as columns.
+        capacity (int): Maximum number of bars kept.
+    """
+
+    FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'atr')
+
+    def __init__(self, capacity: int = 200):
+        """
+        Initializes an empty buffer.
+
+        Args:
+            capacity (int): Maximum number of bars kept.
+        """
+        self.capacity = capacity
+        self._columns: Dict[str, np.ndarray] = {
+            field: np.zeros(2 * capacity, dtype=np.int64 if field == 'timestamp' else np.float64)
+            for field in self.FIELDS
+        }
+        self._bars = np.empty(2 * capacity, dtype=object)
+        self._start = 0
+        self._size = 0
+
+    def append(self, bar: VolumeBar):
+        """Adds a bar, evicting the oldest one once the buffer is full."""
+        capacity = self.capacity
+        if self._size < capacity:
+            pos = self._size
+            self._size += 1
+        else:
+            pos = self._start
+            self._start = (pos + 1) % capacity
+        mirror = pos + capacity
+        for field, column in self._columns.items():
+            value = getattr(bar, field)
+            column[pos] = value
+            column[mirror] = value
+        self._bars[pos] = bar
+        self._bars[mirror] = bar
+
+    def column(self, field: str, n: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Returns a read-only view of one column, oldest bar first.
+
+        Args:
+            field (str): One of FIELDS (case-insensitive).
+            n (Optional[int]): If given, only the last `n` bars, with list
+                slicing semantics (`values[-n:]`).
+
+        Returns:
+            Optional[np.ndarray]: The view, or None if `field` is not a stored column.
+        """
+        column = self._columns.get(field.lower())
+        if column is None:
+            return None
+        view = column[self._start:self._start + self._size]
+        view.flags.writeable = False
+        return view if n is None else view[-n:]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[VolumeBar, List[VolumeBar]]:
+        window = self._bars[self._start:self._start + self._size]
+        if isinstance(index, slice):
+            return list(window[index])
+        return window[index]
+
+    def __iter__(self) -> Iterator[VolumeBar]:
+        return iter(self._bars[self._start:self._start + self._size])
+
+    def __repr__(self) -> str:
+        return f"BarHistory(size={self._size}, capacity={self.capacity})"
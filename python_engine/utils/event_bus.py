@@ -0,0 +1,162 @@
+import json
+import logging
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+MAX_DATAGRAM = 65507
+
+# Topics published by the live engine and TradeLog
+BAR = "bar"
+TRADE_OPEN = "trade_open"
+TRADE_CLOSE = "trade_close"
+SL_MOVE = "sl_move"
+
+Event = Dict[str, Any]
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for engine events.
+
+    Subscribers are plain callables taking an event dict
+    {'type': topic, 'data': payload}. They run synchronously on the
+    publishing thread and must not block; hand work off to a queue.
+    A failing subscriber is logged and does not affect the others.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Callable[[Event], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Event], None]) -> Callable[[Event], None]:
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Event], None]) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not callback]
+
+    def has_subscribers(self) -> bool:
+        """Lets publishers skip building payloads nobody will see (e.g. in backtests)."""
+        return bool(self._subscribers)
+
+    def publish(self, topic: str, data: Any) -> None:
+        subscribers = self._subscribers  # Copy-on-write list; no lock needed to iterate
+        if not subscribers:
+            return
+        event = {'type': topic, 'data': data}
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"[EventBus] Subscriber failed on '{topic}': {e}")
+
+
+BUS = EventBus()
+
+
+class UdpPublisher:
+    """
+    Forwards every event on a bus to a local UDP port as one JSON datagram.
+
+    Fire-and-forget: sends never block the publisher, and events are
+    dropped (and counted) when nobody listens or the socket buffer is full.
+    """
+
+    def __init__(self, bus: EventBus = BUS, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Args:
+            bus (EventBus): Bus to forward.
+            host (str): Listener address.
+            port (int): Listener UDP port.
+        """
+        self.bus = bus
+        self.address = (host, port)
+        self.dropped = 0
+        self._sock: Optional[socket.socket] = None
+
+    def start(self) -> None:
+        if self._sock is not None:
+            return
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self.bus.subscribe(self._send)
+
+    def stop(self) -> None:
+        self.bus.unsubscribe(self._send)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _send(self, event: Event) -> None:
+        payload = json.dumps(event, default=str).encode()
+        if len(payload) > MAX_DATAGRAM:
+            self.dropped += 1
+            return
+        try:
+            self._sock.sendto(payload, self.address)
+        except OSError:
+            # No listener (ECONNREFUSED on some platforms) or a full buffer
+            self.dropped += 1
+
+
+class UdpListener:
+    """
+    Receives UdpPublisher datagrams and republishes them on a bus in this process.
+
+    Runs a daemon thread. If the port is already taken (e.g. by a second
+    dashboard process), start() logs a warning and the bus stays local.
+    """
+
+    def __init__(self, bus: EventBus = BUS, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Args:
+            bus (EventBus): Bus to republish on.
+            host (str): Address to bind.
+            port (int): UDP port to bind.
+        """
+        self.bus = bus
+        self.address = (host, port)
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Binds the port and starts receiving; returns False if the port could not be bound."""
+        if self._thread is not None:
+            return True
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(self.address)
+        except OSError as e:
+            logger.warning(f"[UdpListener] Could not bind {self.address}: {e}")
+            sock.close()
+            return False
+        self._sock = sock
+        self._thread = threading.Thread(target=self._run, name="event-bus-udp", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._thread = None
+
+    def _run(self) -> None:
+        sock = self._sock
+        while True:
+            try:
+                payload, _ = sock.recvfrom(MAX_DATAGRAM)
+            except OSError:
+                return  # Socket closed by stop()
+            try:
+                event = json.loads(payload)
+                self.bus.publish(event['type'], event.get('data'))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"[UdpListener] Ignoring malformed event: {e}")
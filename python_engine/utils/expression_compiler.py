@@ -0,0 +1,184 @@
+import ast
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+from asteval.astutils import (UNSAFE_ATTRS, UNSAFE_ATTRS_DTYPES, safe_add, safe_lshift,
+                              safe_mult, safe_pow)
+from python_engine.models.data_models import PatternDefinition
+
+MAX_EXPRESSION_LENGTH = 50000
+
+# Expression subset of the node types asteval interprets. Statements, imports,
+# lambdas, generators and f-strings are rejected at compile time.
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.keyword, ast.Attribute, ast.Subscript, ast.Slice, ast.Name,
+    ast.Constant, ast.List, ast.Tuple, ast.Dict, ast.Set, ast.ListComp,
+    ast.SetComp, ast.DictComp, ast.comprehension, ast.Load, ast.Store,
+    ast.boolop, ast.operator, ast.unaryop, ast.cmpop,
+)
+
+# Attributes asteval refuses to resolve, regardless of the object type.
+_UNSAFE_ATTRS = frozenset(UNSAFE_ATTRS).union(*UNSAFE_ATTRS_DTYPES.values())
+
+# Guarded operators, rewritten into calls to asteval's safe_* helpers so the
+# exponent, shift and string-length limits still apply.
+_SAFE_BINOPS = {
+    ast.Pow: '_safe_pow',
+    ast.Mult: '_safe_mult',
+    ast.Add: '_safe_add',
+    ast.LShift: '_safe_lshift',
+}
+
+
+def _safe_attr(obj: Any, attr: str) -> Any:
+    """Attribute access that, like asteval, refuses to hand out modules."""
+    value = getattr(obj, attr)
+    if isinstance(value, ModuleType):
+        raise AttributeError(f"no safe attribute '{attr}' for {obj!r}")
+    return value
+
+
+SANDBOX_GLOBALS = {
+    '__builtins__': {},
+    '_safe_attr': _safe_attr,
+    '_safe_pow': safe_pow,
+    '_safe_mult': safe_mult,
+    '_safe_add': safe_add,
+    '_safe_lshift': safe_lshift,
+}
+
+
+class _SandboxValidator(ast.NodeVisitor):
+    """Rejects any construct asteval would refuse to evaluate."""
+
+    def generic_visit(self, node):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise SyntaxError(f"'{type(node).__name__}' is not allowed in strategy expressions")
+        super().generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id.startswith('_'):
+            raise NameError(f"name '{node.id}' is not allowed in strategy expressions")
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        attr = node.attr
+        if attr in _UNSAFE_ATTRS or (attr.startswith('__') and attr.endswith('__')):
+            raise AttributeError(f"no safe attribute '{attr}'")
+        self.generic_visit(node)
+
+
+class _SafeOperatorRewriter(ast.NodeTransformer):
+    """Routes guarded operators and attribute loads through the safe helpers."""
+
+    def visit_Attribute(self, node):
+        self.generic_visit(node)
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id='_safe_attr', ctx=ast.Load()),
+                     args=[node.value, ast.Constant(node.attr)], keywords=[]),
+            node
+        )
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        helper = _SAFE_BINOPS.get(type(node.op))
+        if helper is None:
+            return node
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id=helper, ctx=ast.Load()), args=[node.left, node.right], keywords=[]),
+            node
+        )
+
+
+class CompiledExpression:
+    """
+    A strategy expression validated against the asteval sandbox rules and
+    compiled once into a code object.
+
+    Attributes:
+        source (str): The original expression text.
+        error (Optional[Exception]): Compilation error, if the expression was rejected.
+    """
+
+    __slots__ = ('source', 'error', '_code')
+
+    def __init__(self, source: str):
+        """
+        Parses, validates and compiles an expression.
+
+        Args:
+            source (str): Expression text from the strategy JSON.
+        """
+        self.source = source
+        self.error: Optional[Exception] = None
+        self._code = None
+        try:
+            if len(source) > MAX_EXPRESSION_LENGTH:
+                raise RuntimeError(f"length of text exceeds {MAX_EXPRESSION_LENGTH:d} characters")
+            tree = ast.parse(source.strip(), mode='eval')
+            _SandboxValidator().visit(tree)
+            tree = ast.fix_missing_locations(_SafeOperatorRewriter().visit(tree))
+            self._code = compile(tree, f"<strategy: {source}>", 'eval')
+        except Exception as e:
+            self.error = e
+
+    def evaluate(self, namespace: Dict[str, Any]) -> Any:
+        """
+        Evaluates the expression against a prebuilt namespace.
+
+        Args:
+            namespace (Dict[str, Any]): Namespace built from new_namespace().
+
+        Returns:
+            Any: The expression value.
+
+        Raises:
+            Exception: The compilation error, or any error raised while evaluating.
+        """
+        if self._code is None:
+            raise self.error
+        return eval(self._code, namespace)
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r})"
+
+
+@dataclass(frozen=True)
+class CompiledPhase:
+    """Compiled conditions and captures for one pattern phase."""
+    conditions: Tuple[CompiledExpression, ...]
+    captures: Tuple[Tuple[str, CompiledExpression], ...]
+
+
+def new_namespace(symbols: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Creates an evaluation namespace with no builtins and the sandbox helpers.
+
+    Args:
+        symbols (Dict[str, Any]): Functions and values exposed to expressions.
+
+    Returns:
+        Dict[str, Any]: A namespace suitable for CompiledExpression.evaluate.
+    """
+    namespace = dict(symbols)
+    namespace.update(SANDBOX_GLOBALS)
+    return namespace
+
+
+def compile_phases(definition: PatternDefinition) -> Dict[str, CompiledPhase]:
+    """
+    Compiles every condition and capture of a pattern definition.
+
+    Args:
+        definition (PatternDefinition): The loaded strategy.
+
+    Returns:
+        Dict[str, CompiledPhase]: Compiled phases keyed by phase id.
+    """
+    compiled = {}
+    for phase in definition.phases:
+        conditions: List[CompiledExpression] = [CompiledExpression(c) for c in (phase.conditions or [])]
+        captures = [(name, CompiledExpression(expr)) for name, expr in (phase.capture or {}).items()]
+        compiled[phase.id] = CompiledPhase(tuple(conditions), tuple(captures))
+    return compiled
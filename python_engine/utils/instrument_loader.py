@@ -1,141 +1,231 @@
 import pandas as pd
+import numpy as np
 import requests
 import gzip
-import io
+import os
+import time
+import threading
 
 from datetime import datetime
 
-class InstrumentLoader:
-    def get_upstox_instruments(self, symbols=["NIFTY", "BANKNIFTY"], spot_prices={"NIFTY": 0, "BANKNIFTY": 0}, target_date=None):
-        # 1. Load Instrument Master (from cache if available)
-        cache_file = "upstox_instruments.json.gz"
-        import os
-        import time
-        cache_age_seconds = 24 * 60 * 60
-
-        content = None
-        if os.path.exists(cache_file) and (time.time() - os.path.getmtime(cache_file)) < cache_age_seconds:
+CACHE_FILE = "upstox_instruments.json.gz"
+INSTRUMENTS_URL = "https://assets.upstox.com/market-quote/instruments/exchange/NSE.json.gz"
+CACHE_AGE_SECONDS = 24 * 60 * 60
+DOWNLOAD_RETRY_SECONDS = 15 * 60
+
+
+class _ExpiryChain:
+    """Options of one (name, expiry): sorted strikes with aligned CE/PE keys and trading symbols."""
+
+    __slots__ = ('expiry', 'strikes', 'ce_keys', 'ce_symbols', 'pe_keys', 'pe_symbols')
+
+    def __init__(self, expiry, strikes, types, keys, symbols):
+        """
+        Args:
+            expiry (pd.Timestamp): Contract expiry.
+            strikes, types, keys, symbols (np.ndarray): The group's rows, sorted by strike
+                (stably, so listings of one strike keep their file order).
+        """
+        self.expiry = expiry
+        self.strikes = np.unique(strikes)
+        for option_type in ('CE', 'PE'):
+            rows = np.flatnonzero(types == option_type)
+            # First listing per strike wins, as the old per-strike scans did
+            _, first = np.unique(strikes[rows], return_index=True)
+            rows = rows[first]
+            pos = np.searchsorted(self.strikes, strikes[rows])
+            side_keys = np.full(len(self.strikes), None, dtype=object)
+            side_symbols = np.full(len(self.strikes), None, dtype=object)
+            side_keys[pos] = keys[rows]
+            side_symbols[pos] = symbols[rows]
+            setattr(self, f"{option_type.lower()}_keys", side_keys)
+            setattr(self, f"{option_type.lower()}_symbols", side_symbols)
+
+
+class FnoIndex:
+    """
+    Process-wide index of NSE derivatives, parsed once from the Upstox instrument file.
+
+    Only FUT/CE/PE rows are kept, as typed columns sorted by (name, expiry,
+    strike). Futures are kept per name sorted by expiry. For options, each
+    name has a sorted expiry array with the row range of every expiry, so
+    "nearest expiry on/after a date" and "strikes around spot" are both
+    binary searches. The _ExpiryChain for a (name, expiry) is built the
+    first time it is asked for. The index is rebuilt only when the cached
+    file is replaced (daily refresh).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._last_download_attempt = 0.0
+        self.futures = {}  # name -> (expiries ms, instrument keys), sorted by expiry
+        self.expiries = {}  # name -> (sorted datetime64[D] expiries, row offsets, row ends)
+        self.names = np.empty(0, dtype=object)
+        self._columns = {}
+        self._chains = {}  # (name, expiry position) -> _ExpiryChain
+
+    def _fetch(self):
+        """Refreshes the cached file when it is stale; returns its mtime, or None when there is none."""
+        fresh = os.path.exists(CACHE_FILE) and (time.time() - os.path.getmtime(CACHE_FILE)) < CACHE_AGE_SECONDS
+        if not fresh and (self._mtime is None or time.time() - self._last_download_attempt > DOWNLOAD_RETRY_SECONDS):
+            self._last_download_attempt = time.time()
             try:
-                with open(cache_file, "rb") as f: content = f.read()
-            except Exception: pass
-
-        if not content:
-            url = "https://assets.upstox.com/market-quote/instruments/exchange/NSE.json.gz"
-            try:
-                print(f"[InstrumentLoader] Downloading instrument master from {url}...")
-                response = requests.get(url, timeout=60)
-                content = response.content
-                with open(cache_file, "wb") as f: f.write(content)
+                print(f"[InstrumentLoader] Downloading instrument master from {INSTRUMENTS_URL}...")
+                response = requests.get(INSTRUMENTS_URL, timeout=60)
+                response.raise_for_status()
+                with open(CACHE_FILE, "wb") as f: f.write(response.content)
             except Exception as e:
                 print(f"[InstrumentLoader] Download failed: {e}")
-                if os.path.exists(cache_file):
-                    with open(cache_file, "rb") as f: content = f.read()
+        return os.path.getmtime(CACHE_FILE) if os.path.exists(CACHE_FILE) else None
+
+    def refresh(self):
+        """Makes sure the index reflects the current instrument file; returns False if none is available."""
+        with self._lock:
+            mtime = self._fetch()
+            if mtime is None:
+                return self._mtime is not None
+            if mtime == self._mtime:
+                return True
+            try:
+                with gzip.open(CACHE_FILE, "rb") as f:
+                    df = pd.read_json(f)
+            except Exception as e:
+                print(f"[InstrumentLoader] Could not parse {CACHE_FILE}: {e}")
+                return self._mtime is not None
+            self._build(df)
+            self._mtime = mtime
+            return True
+
+    def _build(self, df):
+        df = df.loc[df['instrument_type'].isin(['FUT', 'CE', 'PE']),
+                    ['name', 'instrument_type', 'expiry', 'strike_price', 'instrument_key', 'trading_symbol']]
+        df = df.astype({'name': 'category', 'instrument_type': 'category'})
+
+        futures = {}
+        for name, group in df[df['instrument_type'] == 'FUT'].groupby('name', observed=True, sort=False):
+            group = group.sort_values('expiry', kind='stable')
+            futures[name] = (group['expiry'].to_numpy(), group['instrument_key'].to_numpy(dtype=object))
+
+        options = df[df['instrument_type'] != 'FUT'].assign(
+            expiry_dt=pd.to_datetime(df['expiry'], origin='unix', unit='ms'))
+        options = options.sort_values(['name', 'expiry_dt', 'strike_price'], kind='stable')
+        names = options['name'].astype(str).to_numpy(dtype=object)
+        expiry = options['expiry_dt'].to_numpy()
+        # Row offsets where a new (name, expiry) group starts
+        starts = np.flatnonzero(np.r_[True, (names[1:] != names[:-1]) | (expiry[1:] != expiry[:-1])])
+        ends = np.r_[starts[1:], len(options)]
+
+        expiries = {}
+        group_names = names[starts]
+        for name in pd.unique(group_names):
+            sel = np.flatnonzero(group_names == name)
+            expiries[name] = (expiry[starts[sel]], starts[sel], ends[sel])
+
+        self.futures = futures
+        self.expiries = expiries
+        self.names = df['name'].cat.categories.to_numpy(dtype=object)
+        self._columns = {
+            'strike': options['strike_price'].to_numpy(dtype=float),
+            'type': options['instrument_type'].astype(str).to_numpy(dtype=object),
+            'key': options['instrument_key'].to_numpy(dtype=object),
+            'symbol': options['trading_symbol'].to_numpy(dtype=object),
+        }
+        self._chains = {}
+
+    def nearest_chain(self, name, on_or_after):
+        """Option chain of the nearest expiry on/after the given date (the earliest one if all are past)."""
+        entry = self.expiries.get(name)
+        if entry is None:
+            return None
+        expiries, starts, ends = entry
+        i = int(np.searchsorted(expiries.astype('datetime64[D]'), np.datetime64(on_or_after.date(), 'D'), side='left'))
+        if i == len(expiries):
+            print(f"[InstrumentLoader] No valid expiries found for {name} on/after {on_or_after.date()}. Using all.")
+            i = 0
+        chain = self._chains.get((name, i))
+        if chain is None:
+            rows = slice(starts[i], ends[i])
+            c = self._columns
+            chain = self._chains[(name, i)] = _ExpiryChain(pd.Timestamp(expiries[i]), c['strike'][rows], c['type'][rows],
+                                                          c['key'][rows], c['symbol'][rows])
+        return chain
+
+
+_INDEX = FnoIndex()
+
 
-        if not content:
+class InstrumentLoader:
+    @staticmethod
+    def _target_day(target_date):
+        if target_date is None:
+            target_date = datetime.now()
+        elif isinstance(target_date, str):
+            target_date = pd.to_datetime(target_date)
+        elif not isinstance(target_date, datetime):
+            # Handle date objects
+            target_date = pd.to_datetime(str(target_date))
+        return target_date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def get_upstox_instruments(self, symbols=["NIFTY", "BANKNIFTY"], spot_prices={"NIFTY": 0, "BANKNIFTY": 0}, target_date=None):
+        # 1. Instrument Master, parsed once per process and refreshed with the daily file
+        if not _INDEX.refresh():
             print("[InstrumentLoader] ERROR: Could not get instrument master")
             return {}
 
-        with gzip.GzipFile(fileobj=io.BytesIO(content)) as f:
-            df = pd.read_json(f)
-
+        target_day = self._target_day(target_date)
         full_mapping = {}
 
         for symbol in symbols:
-            # Map simplified symbol 'NIFTY' to Upstox name 'Nifty 50'
-            # NOTE: ExtractInstrumentKeys.py uses 'name' == 'NIFTY' for options, NOT 'Nifty 50'
-            # search_name = "Nifty 50" if symbol == "NIFTY" else "Nifty Bank" if symbol == "BANKNIFTY" else symbol
-            
+            # Derivatives are listed under 'NIFTY' / 'BANKNIFTY', not the index names 'Nifty 50' / 'Nifty Bank'
             spot = spot_prices.get(symbol)
 
             # --- 1. Current Month Future ---
-            # Future names are typically "NIFTY" or "BANKNIFTY" in the JSON, NOT "Nifty 50"
-            # We need to check both or assume standard abbreviations for Futures vs Indices
-            # Based on DB dump: "NIFTY FUT..." comes from name="NIFTY" (likely) or just matched on trading symbol.
-            # Let's try matching name against the input symbol first for Futures, as they often match "NIFTY" / "BANKNIFTY"
-            
-            fut_df = df[(df['name'] == symbol) & (df['instrument_type'] == 'FUT')].sort_values(by='expiry')
-            
-            try:
-                current_fut_key = fut_df.iloc[0]['instrument_key']
-            except IndexError:
+            futures = _INDEX.futures.get(symbol)
+            if futures is None or not len(futures[1]):
                 print(f"Warning: No future found for {symbol}. Skipping.")
                 continue
+            current_fut_key = futures[1][0]
 
             # --- 2. Nearest Expiry Options ---
-            # Options for Nifty are under 'Nifty 50'
-            opt_df = df[(df['name'] == symbol) & (df['instrument_type'].isin(['CE', 'PE']))].copy()
-            
-            if opt_df.empty:
-                print(f"[InstrumentLoader] ERROR: No options found for {search_name}. DF Shape: {df.shape}")
-                print(f"[InstrumentLoader] Unique Names in DF: {df['name'].unique()[:20]}")
+            chain = _INDEX.nearest_chain(symbol, target_day)
+            if chain is None:
+                print(f"[InstrumentLoader] ERROR: No options found for {symbol}.")
+                print(f"[InstrumentLoader] Unique Names in DF: {_INDEX.names[:20]}")
                 continue
 
-            # Ensure expiry is in datetime format for accurate sorting
-            opt_df['expiry'] = pd.to_datetime(opt_df['expiry'], origin='unix', unit='ms')
-
-            # Filter for expiries >= target_date
-            if target_date is None:
-                target_date = datetime.now()
-            elif isinstance(target_date, str):
-                target_date = pd.to_datetime(target_date)
-            elif isinstance(target_date, datetime):
-                pass
-            else:
-                # Handle date objects
-                target_date = pd.to_datetime(str(target_date))
-
-            # Strip time for comparison
-            target_date_only = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            valid_opts = opt_df[opt_df['expiry'].dt.date >= target_date_only.date()]
-
-            if valid_opts.empty:
-                print(f"[InstrumentLoader] No valid expiries found for {symbol} on/after {target_date_only.date()}. Using all.")
-                valid_opts = opt_df
-
-            nearest_expiry = valid_opts['expiry'].min()
-            near_opt_df = valid_opts[valid_opts['expiry'] == nearest_expiry]
-
             # --- 3. Identify the 11 Strikes (5 OTM, 1 ATM, 5 ITM) ---
-            unique_strikes = sorted(near_opt_df['strike_price'].unique())
-
-            # Find ATM strike
+            strikes = chain.strikes
             if spot is None or spot <= 0:
                 # If spot is unknown, pick the middle strike as a placeholder
-                atm_index = len(unique_strikes) // 2
-                atm_strike = unique_strikes[atm_index]
+                atm_index = len(strikes) // 2
             else:
-                atm_strike = min(unique_strikes, key=lambda x: abs(x - spot))
-                atm_index = unique_strikes.index(atm_strike)
+                # Closest strike; the lower one on a tie
+                atm_index = int(np.searchsorted(strikes, spot))
+                if atm_index == len(strikes) or (atm_index > 0 and spot - strikes[atm_index - 1] <= strikes[atm_index] - spot):
+                    atm_index -= 1
 
             # Slice range: Index - 5 to Index + 5 (Total 11 strikes)
             start_idx = max(0, atm_index - 5)
-            end_idx = min(len(unique_strikes), atm_index + 6)
-            selected_strikes = unique_strikes[start_idx : end_idx]
+            end_idx = min(len(strikes), atm_index + 6)
 
             # --- 4. Build Result ---
             option_keys = []
-            for strike in selected_strikes:
-                try:
-                    ce_key = near_opt_df[(near_opt_df['strike_price'] == strike) & (near_opt_df['instrument_type'] == 'CE')]['instrument_key'].values[0]
-                    ce_trading_symbol = near_opt_df[(near_opt_df['strike_price'] == strike) & (near_opt_df['instrument_type'] == 'CE')]['trading_symbol'].values[0]
-
-                    pe_key = near_opt_df[(near_opt_df['strike_price'] == strike) & (near_opt_df['instrument_type'] == 'PE')]['instrument_key'].values[0]
-                    pe_trading_symbol = near_opt_df[(near_opt_df['strike_price'] == strike) & (near_opt_df['instrument_type'] == 'PE')]['trading_symbol'].values[0]
-                except IndexError:
-                    print(f"Warning: CE or PE key not found for strike {strike} in {symbol}. Skipping.")
+            for i in range(start_idx, end_idx):
+                if chain.ce_keys[i] is None or chain.pe_keys[i] is None:
+                    print(f"Warning: CE or PE key not found for strike {strikes[i]} in {symbol}. Skipping.")
                     continue
-
                 option_keys.append({
-                    "strike": strike,
-                    "ce": ce_key,
-                    "ce_trading_symbol" :ce_trading_symbol,
-                    "pe": pe_key,
-                    "pe_trading_symbol" : pe_trading_symbol
+                    "strike": strikes[i],
+                    "ce": chain.ce_keys[i],
+                    "ce_trading_symbol": chain.ce_symbols[i],
+                    "pe": chain.pe_keys[i],
+                    "pe_trading_symbol": chain.pe_symbols[i]
                 })
 
             full_mapping[symbol] = {
                 "future": current_fut_key,
-                "expiry": nearest_expiry.strftime('%Y-%m-%d'),
+                "expiry": chain.expiry.strftime('%Y-%m-%d'),
                 "options": option_keys,
                 "all_keys": [current_fut_key] + [opt['ce'] for opt in option_keys] + [opt['pe'] for opt in option_keys]
             }
@@ -0,0 +1,69 @@
+import bisect
+import threading
+from typing import Dict, Iterable
+
+# Bucket upper bounds in milliseconds; the last bucket is open-ended
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram with approximate percentiles.
+
+    Percentiles report the upper bound of the bucket holding the requested
+    rank (the exact maximum for the open-ended bucket), so they are cheap to
+    record from hot paths and never understate a latency.
+    """
+
+    def __init__(self, name: str, buckets_ms: Iterable[float] = DEFAULT_BUCKETS_MS):
+        """
+        Args:
+            name (str): Stage name used in reports.
+            buckets_ms (Iterable[float]): Ascending bucket upper bounds in ms.
+        """
+        self.name = name
+        self.bounds = tuple(buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Adds one observation given in seconds."""
+        ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+            self.total += 1
+            self.sum_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in ms; 0.0 when empty."""
+        with self._lock:
+            if not self.total:
+                return 0.0
+            rank = max(1, int(round(q / 100.0 * self.total)))
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return min(self.bounds[i], self.max_ms) if i < len(self.bounds) else self.max_ms
+            return self.max_ms
+
+    def snapshot(self) -> Dict[str, float]:
+        """Summary with count, mean, p50, p90, p99 and max (ms)."""
+        return {
+            'count': self.total,
+            'mean_ms': self.sum_ms / self.total if self.total else 0.0,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms,
+        }
+
+    def __str__(self) -> str:
+        s = self.snapshot()
+        return (f"{self.name:<14} n={s['count']:<6} mean={s['mean_ms']:.1f}ms p50<={s['p50_ms']:.0f}ms "
+                f"p90<={s['p90_ms']:.0f}ms p99<={s['p99_ms']:.0f}ms max={s['max_ms']:.1f}ms")
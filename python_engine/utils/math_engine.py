@@ -1,6 +1,18 @@
 import math
+import numpy as np
 from scipy.stats import norm
 from scipy.optimize import newton
+from scipy.special import ndtr
+
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+# Search bracket for the batch IV solver; prices implying more than 1000% are treated as unsolvable
+_IV_MIN, _IV_MAX = 1e-6, 10.0
+
+
+def _is_call_mask(option_type, shape):
+    """Broadcasts 'CE'/'PE' (scalar or array) to a boolean call mask."""
+    return np.broadcast_to(np.asarray(option_type) == 'CE', shape)
 
 class MathEngine:
     @staticmethod
@@ -70,6 +82,117 @@ class MathEngine:
             'theta': round(theta, 4)
         }
 
+    @staticmethod
+    def black_scholes_batch(S, K, T, r, sigma, option_type='CE'):
+        """
+        Vectorized black_scholes over NumPy arrays (or scalars, broadcast).
+        option_type: 'CE'/'PE' or an array of them.
+        Expired contracts (T <= 0) are priced at intrinsic value.
+        """
+        S, K, T, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, sigma)))
+        is_call = _is_call_mask(option_type, S.shape)
+        live = (T > 0) & (sigma > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrt_t = np.sqrt(T)
+            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_t)
+            d2 = d1 - sigma * sqrt_t
+            disc_k = K * np.exp(-r * T)
+            call = S * ndtr(d1) - disc_k * ndtr(d2)
+            put = disc_k * ndtr(-d2) - S * ndtr(-d1)
+        intrinsic = np.where(is_call, np.maximum(0.0, S - K), np.maximum(0.0, K - S))
+        return np.where(live, np.where(is_call, call, put), intrinsic)
+
+    @staticmethod
+    def calculate_iv_batch(price, S, K, T, r, option_type='CE', tol=1e-5, max_iter=100):
+        """
+        Vectorized calculate_iv: solves every contract at once.
+
+        Each iteration takes a Newton step (using vega) per contract and keeps a
+        [lo, hi] bracket on the root; a step that leaves the bracket or has a
+        vanishing vega is replaced by bisection. Contracts whose price is
+        outside the no-arbitrage bounds, or that fail to converge, get 0.0,
+        mirroring the scalar version.
+        """
+        price, S, K, T = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (price, S, K, T)))
+        is_call = _is_call_mask(option_type, price.shape)
+        iv = np.zeros(price.shape)
+
+        with np.errstate(invalid='ignore'):
+            disc_k = K * np.exp(-r * T)
+            lower = np.where(is_call, np.maximum(0.0, S - disc_k), np.maximum(0.0, disc_k - S))
+            upper = np.where(is_call, S, disc_k)
+            solvable = (T > 0) & (price > 0) & (S > 0) & (K > 0) & (price > lower) & (price < upper)
+            solvable &= price < MathEngine.black_scholes_batch(S, K, T, r, _IV_MAX, np.where(is_call, 'CE', 'PE'))
+        if not solvable.any():
+            return iv
+
+        p, s, k, t, call = price[solvable], S[solvable], K[solvable], T[solvable], is_call[solvable]
+        sqrt_t = np.sqrt(t)
+        disc = k * np.exp(-r * t)
+        sigma = np.full(p.shape, 0.2)
+        lo = np.full(p.shape, _IV_MIN)
+        hi = np.full(p.shape, _IV_MAX)
+        done = np.zeros(p.shape, dtype=bool)
+
+        for _ in range(max_iter):
+            d1 = (np.log(s / k) + (r + 0.5 * sigma ** 2) * t) / (sigma * sqrt_t)
+            d2 = d1 - sigma * sqrt_t
+            model = np.where(call, s * ndtr(d1) - disc * ndtr(d2), disc * ndtr(-d2) - s * ndtr(-d1))
+            diff = model - p
+            # Price is increasing in sigma, so the sign of diff tightens the bracket
+            hi = np.where(diff > 0, np.minimum(hi, sigma), hi)
+            lo = np.where(diff < 0, np.maximum(lo, sigma), lo)
+
+            vega = s * _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1) * sqrt_t
+            with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+                step = sigma - diff / vega
+            bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+            new_sigma = np.where(diff == 0, sigma, np.where(bisect, 0.5 * (lo + hi), step))
+
+            converged = np.abs(new_sigma - sigma) < tol
+            sigma = np.where(done, sigma, new_sigma)
+            done |= converged
+            if done.all():
+                break
+
+        iv[solvable] = np.where(done & (sigma > 0), sigma, 0.0)
+        return iv
+
+    @staticmethod
+    def calculate_greeks_batch(S, K, T, r, sigma, option_type='CE'):
+        """
+        Vectorized Greeks for arrays of contracts, computed in one pass.
+        Returns a dict of arrays:
+            delta, theta: as calculate_greeks (theta per day, both rounded to 4 places)
+            gamma: per 1 point move in S
+            vega: per 1 volatility point (0.01 sigma)
+        Contracts with T <= 0 or sigma <= 0 get zeros.
+        """
+        S, K, T, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, sigma)))
+        is_call = _is_call_mask(option_type, S.shape)
+        live = (T > 0) & (sigma > 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrt_t = np.sqrt(T)
+            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_t)
+            d2 = d1 - sigma * sqrt_t
+            pdf_d1 = _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1)
+            cdf_d1 = ndtr(d1)
+            disc_k = K * np.exp(-r * T)
+            decay = -(S * pdf_d1 * sigma) / (2 * sqrt_t)
+
+            delta = np.where(is_call, cdf_d1, cdf_d1 - 1)
+            theta = np.where(is_call, decay - r * disc_k * ndtr(d2), decay + r * disc_k * ndtr(-d2)) / 365
+            gamma = pdf_d1 / (S * sigma * sqrt_t)
+            vega = S * pdf_d1 * sqrt_t / 100
+
+        return {
+            'delta': np.where(live, np.round(delta, 4), 0.0),
+            'gamma': np.where(live, gamma, 0.0),
+            'theta': np.where(live, np.round(theta, 4), 0.0),
+            'vega': np.where(live, vega, 0.0)
+        }
+
     @staticmethod
     def get_smart_trend(price_change, oi_change):
         """
@@ -90,3 +213,22 @@ class MathEngine:
             if oi_change < 0: return "Unwinding"
 
         return "Neutral"
+
+    @staticmethod
+    def get_smart_trend_batch(price_change, oi_change):
+        """
+        Vectorized get_smart_trend; returns an array of trend labels.
+        """
+        price_change, oi_change = np.broadcast_arrays(np.asarray(price_change, dtype=float), np.asarray(oi_change, dtype=float))
+        return np.select(
+            [
+                (price_change > 0) & (oi_change > 0),
+                (price_change < 0) & (oi_change > 0),
+                (price_change < 0) & (oi_change < 0),
+                (price_change > 0) & (oi_change < 0),
+                (price_change == 0) & (oi_change > 0),
+                (price_change == 0) & (oi_change < 0),
+            ],
+            ["Long Buildup", "Short Buildup", "Long Unwinding", "Short Covering", "Buildup", "Unwinding"],
+            default="Neutral"
+        ).astype(object)
@@ -1,38 +1,50 @@
 import math
-import statistics
+import numpy as np
 
 def _extract_last_n(history, n, field):
+    # BarHistory exposes its columns as NumPy views; plain lists of bars are
+    # still accepted so ad-hoc callers keep working.
+    if hasattr(history, 'column'):
+        values = history.column(field, n)
+        if values is None:
+            return np.zeros(len(history[-n:]))
+        return values
     sub_list = history[-n:]
-    return [getattr(bar, field.lower(), 0.0) for bar in sub_list]
+    return np.array([getattr(bar, field.lower(), 0.0) for bar in sub_list], dtype=float)
+
+def _extract_all(history, field):
+    if hasattr(history, 'column'):
+        return history.column(field)
+    return np.array([getattr(bar, field) for bar in history], dtype=float)
 
 def stdev(history, period, field):
     if len(history) < 2:
         return 0.0
     values = _extract_last_n(history, period, field)
-    return statistics.stdev(values) if len(values) > 1 else 0.0
+    return float(values.std(ddof=1)) if len(values) > 1 else 0.0
 
 def highest(history, period, field):
     if not history:
         return 0.0
     values = _extract_last_n(history, period, field)
-    return max(values) if values else 0.0
+    return float(values.max()) if len(values) else 0.0
 
 def lowest(history, period, field):
     if not history:
         return 0.0
     values = _extract_last_n(history, period, field)
-    return min(values) if values else 0.0
+    return float(values.min()) if len(values) else 0.0
 
 def moving_avg(history, period, field):
     if not history:
         return 0.0
     values = _extract_last_n(history, period, field)
-    return statistics.mean(values) if values else 0.0
+    return float(values.mean()) if len(values) else 0.0
 
 def ema(history, period, field):
     if not history:
         return 0.0
-    values = _extract_last_n(history, min(len(history), period * 2), field)
+    values = _extract_last_n(history, min(len(history), period * 2), field).tolist()
     if not values:
         return 0.0
     alpha = 2 / (period + 1)
@@ -44,34 +56,23 @@ def ema(history, period, field):
 def vwap(history):
     if not history:
         return 0.0
-    total_pv = 0.0
-    total_v = 0.0
     # VWAP is usually reset daily, but for historical context we can calculate over window
     # Assuming history passed is for the current day
-    for bar in history:
-        tp = (bar.high + bar.low + bar.close) / 3.0
-        total_pv += tp * bar.volume
-        total_v += bar.volume
-    return total_pv / total_v if total_v > 0 else history[-1].close
+    high, low, close = _extract_all(history, 'high'), _extract_all(history, 'low'), _extract_all(history, 'close')
+    volume = _extract_all(history, 'volume')
+    total_v = float(volume.sum())
+    if total_v <= 0:
+        return float(close[-1])
+    return float((((high + low + close) / 3.0) * volume).sum() / total_v)
 
 def rsi(history, period=14):
     if len(history) < period:
         return 50.0
     closes = _extract_last_n(history, period + 1, 'close')
-    gains = []
-    losses = []
-    for i in range(1, len(closes)):
-        diff = closes[i] - closes[i-1]
-        if diff > 0:
-            gains.append(diff)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(abs(diff))
-    
-    avg_gain = statistics.mean(gains)
-    avg_loss = statistics.mean(losses)
-    
+    diffs = np.diff(closes)
+    avg_gain = float(np.where(diffs > 0, diffs, 0.0).mean())
+    avg_loss = float(np.where(diffs > 0, 0.0, -diffs).mean())
+
     if avg_loss == 0:
         return 100.0
     rs = avg_gain / avg_loss
@@ -0,0 +1,368 @@
+import math
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from python_engine.models.data_models import VolumeBar
+from python_engine.utils import mvel_functions
+from python_engine.utils.bar_history import BarHistory
+
+# Running sums are rebuilt from their window every this many updates so
+# floating point drift cannot accumulate over a long session.
+_RESYNC_INTERVAL = 4096
+
+IndicatorKey = Tuple[str, str, Any, str]
+
+
+def _field_value(bar: VolumeBar, field: str) -> float:
+    return getattr(bar, field, 0.0)
+
+
+class _WindowMean:
+    """Simple moving average over the last `window` values using a running sum."""
+
+    def __init__(self, window: int, field: str):
+        self._field = field
+        self._values: Deque[float] = deque(maxlen=window)
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, bar: VolumeBar):
+        value = _field_value(bar, self._field)
+        if len(self._values) == self._values.maxlen:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+        self._updates += 1
+        if self._updates % _RESYNC_INTERVAL == 0:
+            self._sum = math.fsum(self._values)
+
+    @property
+    def value(self) -> float:
+        return self._sum / len(self._values) if self._values else 0.0
+
+
+class _WindowStdev:
+    """Sample standard deviation over the last `window` values (windowed Welford)."""
+
+    def __init__(self, window: int, field: str):
+        self._field = field
+        self._values: Deque[float] = deque(maxlen=window)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def update(self, bar: VolumeBar):
+        value = _field_value(bar, self._field)
+        n = len(self._values)
+        if n == self._values.maxlen:
+            # Replace the oldest value; the count stays the same
+            dropped = self._values[0]
+            old_mean = self._mean
+            self._mean += (value - dropped) / n
+            self._m2 += (value - dropped) * (value - self._mean + dropped - old_mean)
+        else:
+            n += 1
+            delta = value - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (value - self._mean)
+        self._values.append(value)
+        self._updates += 1
+        if self._updates % _RESYNC_INTERVAL == 0:
+            self._mean = math.fsum(self._values) / len(self._values)
+            self._m2 = math.fsum((v - self._mean) ** 2 for v in self._values)
+
+    @property
+    def value(self) -> float:
+        n = len(self._values)
+        if n < 2:
+            return 0.0
+        return math.sqrt(max(self._m2, 0.0) / (n - 1))
+
+
+class _WindowExtreme:
+    """Highest or lowest value over the last `window` bars using a monotonic deque."""
+
+    def __init__(self, window: int, field: str, highest: bool):
+        self._field = field
+        self._window = window
+        self._highest = highest
+        self._candidates: Deque[Tuple[int, float]] = deque()
+        self._index = -1
+
+    def update(self, bar: VolumeBar):
+        value = _field_value(bar, self._field)
+        self._index += 1
+        candidates = self._candidates
+        if self._highest:
+            while candidates and candidates[-1][1] <= value:
+                candidates.pop()
+        else:
+            while candidates and candidates[-1][1] >= value:
+                candidates.pop()
+        candidates.append((self._index, value))
+        if candidates[0][0] <= self._index - self._window:
+            candidates.popleft()
+
+    @property
+    def value(self) -> float:
+        return self._candidates[0][1] if self._candidates else 0.0
+
+
+class _Ema:
+    """Recursive exponential moving average seeded with the first value."""
+
+    def __init__(self, period: int, field: str):
+        self._field = field
+        self._alpha = 2 / (period + 1)
+        self._value: Optional[float] = None
+
+    def update(self, bar: VolumeBar):
+        value = _field_value(bar, self._field)
+        if self._value is None:
+            self._value = value
+        else:
+            self._value = value * self._alpha + self._value * (1 - self._alpha)
+
+    @property
+    def value(self) -> float:
+        return self._value if self._value is not None else 0.0
+
+
+class _WilderRsi:
+    """
+    RSI with Wilder smoothing. The first `period` changes are averaged simply,
+    later ones are smoothed as avg = (avg * (period - 1) + change) / period.
+    """
+
+    def __init__(self, period: int):
+        self._period = period
+        self._prev_close: Optional[float] = None
+        self._changes = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, bar: VolumeBar):
+        close = bar.close
+        if self._prev_close is not None:
+            diff = close - self._prev_close
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else 0.0
+            self._changes += 1
+            if self._changes <= self._period:
+                self._avg_gain += (gain - self._avg_gain) / self._changes
+                self._avg_loss += (loss - self._avg_loss) / self._changes
+            else:
+                self._avg_gain = (self._avg_gain * (self._period - 1) + gain) / self._period
+                self._avg_loss = (self._avg_loss * (self._period - 1) + loss) / self._period
+        self._prev_close = close
+
+    @property
+    def value(self) -> float:
+        if self._avg_loss == 0:
+            return 100.0
+        rs = self._avg_gain / self._avg_loss
+        return 100.0 - (100.0 / (1.0 + rs))
+
+
+class _WindowVwap:
+    """Volume weighted average of the typical price over the last `window` bars."""
+
+    def __init__(self, window: int):
+        self._bars: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._pv = 0.0
+        self._v = 0.0
+        self._last_close = 0.0
+        self._updates = 0
+
+    def update(self, bar: VolumeBar):
+        tp = (bar.high + bar.low + bar.close) / 3.0
+        pv = tp * bar.volume
+        if len(self._bars) == self._bars.maxlen:
+            old_pv, old_v = self._bars[0]
+            self._pv -= old_pv
+            self._v -= old_v
+        self._bars.append((pv, bar.volume))
+        self._pv += pv
+        self._v += bar.volume
+        self._last_close = bar.close
+        self._updates += 1
+        if self._updates % _RESYNC_INTERVAL == 0:
+            self._pv = math.fsum(b[0] for b in self._bars)
+            self._v = math.fsum(b[1] for b in self._bars)
+
+    @property
+    def value(self) -> float:
+        if not self._bars:
+            return 0.0
+        return self._pv / self._v if self._v > 0 else self._last_close
+
+
+class IndicatorRegistry:
+    """
+    Streaming indicator state keyed by (symbol, indicator, period, field).
+
+    Indicators are created the first time a strategy asks for them, seeded
+    from the symbol's BarHistory, and then advanced in O(1) on every candle
+    passed to update(). The bound functions returned by
+    functions_for() replace the MVEL_FUNCTIONS entries of the same name, so
+    strategy expressions such as `ema(history, 9, 'close')` are unchanged.
+    """
+
+    def __init__(self, max_history: int = 200):
+        """
+        Args:
+            max_history (int): Longest window an indicator may use, matching the
+                capacity of the BarHistory a PatternStateMachine sees.
+        """
+        self._max_history = max_history
+        self._bars: Dict[str, BarHistory] = {}
+        self._indicators: Dict[str, Dict[IndicatorKey, Any]] = {}
+
+    def update(self, candle: VolumeBar, history: BarHistory):
+        """
+        Advances every indicator registered for the candle's symbol.
+
+        Args:
+            candle (VolumeBar): The new candle.
+            history (BarHistory): The symbol's history, already containing `candle`.
+                Used to seed indicators registered later.
+        """
+        self._bars[candle.symbol] = history
+        indicators = self._indicators.get(candle.symbol)
+        if indicators is None:
+            self._indicators[candle.symbol] = {}
+            return
+        for indicator in indicators.values():
+            indicator.update(candle)
+
+    def bar_count(self, symbol: str) -> int:
+        """Returns the number of bars currently buffered for a symbol."""
+        bars = self._bars.get(symbol)
+        return len(bars) if bars is not None else 0
+
+    def get(self, symbol: str, indicator: str, period: Any = None, field: str = 'close') -> float:
+        """
+        Returns the current value of an indicator, registering it on first use.
+
+        Args:
+            symbol (str): Candle symbol.
+            indicator (str): One of 'sma', 'stdev', 'highest', 'lowest', 'ema', 'rsi', 'vwap'.
+            period (Any): Lookback period (ignored for 'vwap').
+            field (str): VolumeBar attribute the indicator reads.
+
+        Returns:
+            float: The indicator value.
+        """
+        field = field.lower()
+        key = (symbol, indicator, period, field)
+        indicators = self._indicators.setdefault(symbol, {})
+        state = indicators.get(key)
+        if state is None:
+            state = self._create(indicator, period, field)
+            for bar in self._bars.get(symbol, ()):
+                state.update(bar)
+            indicators[key] = state
+        return state.value
+
+    def _create(self, indicator: str, period: Any, field: str):
+        window = min(period, self._max_history) if period is not None else self._max_history
+        if indicator == 'sma':
+            return _WindowMean(window, field)
+        if indicator == 'stdev':
+            return _WindowStdev(window, field)
+        if indicator == 'highest':
+            return _WindowExtreme(window, field, highest=True)
+        if indicator == 'lowest':
+            return _WindowExtreme(window, field, highest=False)
+        if indicator == 'ema':
+            return _Ema(period, field)
+        if indicator == 'rsi':
+            return _WilderRsi(period)
+        if indicator == 'vwap':
+            return _WindowVwap(window)
+        raise ValueError(f"Unknown streaming indicator '{indicator}'")
+
+    def functions_for(self, symbol: str, history: BarHistory) -> Dict[str, Callable]:
+        """
+        Builds MVEL function overrides bound to one symbol.
+
+        Calls made with the symbol's shared `history` and a positive integer
+        period are answered from the registry. Any other sequence (a slice,
+        for example) falls back to the stateless function in mvel_functions.
+
+        Args:
+            symbol (str): Symbol the machine evaluates.
+            history (BarHistory): The symbol's shared history.
+
+        Returns:
+            Dict[str, Callable]: Functions keyed by their MVEL name.
+        """
+        get = self.get
+
+        def streaming(series, period) -> bool:
+            return series is history and isinstance(period, int) and period > 0
+
+        def stdev(series, period, field):
+            if not streaming(series, period):
+                return mvel_functions.stdev(series, period, field)
+            return get(symbol, 'stdev', period, field)
+
+        def highest(series, period, field):
+            if not streaming(series, period):
+                return mvel_functions.highest(series, period, field)
+            return get(symbol, 'highest', period, field)
+
+        def lowest(series, period, field):
+            if not streaming(series, period):
+                return mvel_functions.lowest(series, period, field)
+            return get(symbol, 'lowest', period, field)
+
+        def moving_avg(series, period, field):
+            if not streaming(series, period):
+                return mvel_functions.moving_avg(series, period, field)
+            return get(symbol, 'sma', period, field)
+
+        def ema(series, period, field):
+            if not streaming(series, period):
+                return mvel_functions.ema(series, period, field)
+            return get(symbol, 'ema', period, field)
+
+        def vwap(series):
+            if series is not history:
+                return mvel_functions.vwap(series)
+            return get(symbol, 'vwap')
+
+        def rsi(series, period=14):
+            if not streaming(series, period):
+                return mvel_functions.rsi(series, period)
+            if self.bar_count(symbol) < period:
+                return 50.0
+            return get(symbol, 'rsi', period)
+
+        def bb_upper(series, period=20, mult=2.0):
+            if not streaming(series, period):
+                return mvel_functions.bb_upper(series, period, mult)
+            if self.bar_count(symbol) < period:
+                return 0.0
+            return get(symbol, 'sma', period, 'close') + (mult * get(symbol, 'stdev', period, 'close'))
+
+        def bb_lower(series, period=20, mult=2.0):
+            if not streaming(series, period):
+                return mvel_functions.bb_lower(series, period, mult)
+            if self.bar_count(symbol) < period:
+                return 0.0
+            return get(symbol, 'sma', period, 'close') - (mult * get(symbol, 'stdev', period, 'close'))
+
+        return {
+            "stdev": stdev,
+            "highest": highest,
+            "max": highest,
+            "lowest": lowest,
+            "min": lowest,
+            "moving_avg": moving_avg,
+            "sma": moving_avg,
+            "ema": ema,
+            "vwap": vwap,
+            "rsi": rsi,
+            "bb_upper": bb_upper,
+            "bb_lower": bb_lower,
+        }
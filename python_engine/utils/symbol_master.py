@@ -2,7 +2,9 @@ import os
 import requests
 import gzip
 import io
+import numpy as np
 import pandas as pd
+import pickle
 import time
 import threading
 from data_sourcing.database_manager import DatabaseManager
@@ -13,6 +15,7 @@ class SymbolMaster:
     _reverse_mappings = {}  # { "BROKER_KEY": ("STANDARD_SYMBOL", "SEGMENT") }
     _initialized = False
     _lock = threading.Lock()
+    INDEX_VERSION = 1  # Bump when the mapping rules change to invalidate persisted indexes
 
     def __new__(cls):
         if cls._instance is None:
@@ -21,21 +24,47 @@ class SymbolMaster:
         return cls._instance
 
     def initialize(self):
+        """
+        Loads the symbol mappings once per process (thread-safe).
+
+        Lookups call this lazily, so explicit calls are only needed to pay the
+        cost up front. The persisted index is used while its instrument_master
+        signature still matches; otherwise the mappings are rebuilt from the
+        SQLite master (or the Upstox instrument file) and the index is rewritten.
+        """
+        if self._initialized:
+            return
         with self._lock:
             if self._initialized:
                 return
+            self._load()
+
+    @property
+    def index_path(self):
+        """Persisted mappings, kept next to the database file."""
+        return f"{os.path.splitext(self.db_manager.db_name)[0]}.symbols.pkl"
+
+    def _load(self):
+        print("[SymbolMaster] Initializing Instrument Keys...")
+        start = time.perf_counter()
+        signature = self.db_manager.get_instrument_master_signature()
+        if signature and self._load_index(signature):
+            print(f"  [INFO] Loaded symbol index ({len(self._reverse_mappings)} instruments) in {time.perf_counter() - start:.3f}s")
+            self._initialized = True
+            return
 
-            print("[SymbolMaster] Initializing Instrument Keys...")
         cache_file = "upstox_instruments.json.gz"
         cache_age_seconds = 24 * 60 * 60
 
         try:
-            df_cache = self.db_manager.get_instrument_master()
-            if not df_cache.empty:
-                print(f"  [INFO] Loading from SQLite cache")
-                self._populate_mappings(df_cache)
-                self._initialized = True
-                return
+            if signature:
+                df_cache = self.db_manager.get_instrument_master()
+                if not df_cache.empty:
+                    print(f"  [INFO] Loading from SQLite cache")
+                    self._populate_mappings(df_cache)
+                    self._save_index(signature)
+                    self._initialized = True
+                    return
         except Exception as e:
             print(f"  [WARN] SQLite cache load failed: {e}")
 
@@ -58,45 +87,88 @@ class SymbolMaster:
                     df = pd.read_json(f)
                 self.db_manager.store_instrument_master(df)
                 self._populate_mappings(df)
+                self._save_index(self.db_manager.get_instrument_master_signature())
                 self._initialized = True
             except Exception as e:
                 print(f"  [ERROR] SymbolMaster initialization failed: {e}")
 
-    def _populate_mappings(self, df):
-        for _, row in df.iterrows():
-            tradingsymbol = row['trading_symbol'].upper()
-            instrument_key = row['instrument_key']
-            segment = row['segment']
-            name = row.get('name', '')
-
-            # Standardize based on OpenAlgo inspiration
-            std_symbol = self._standardize(row)
-
-            self._mappings[std_symbol] = instrument_key
-            self._mappings[tradingsymbol] = instrument_key # Support legacy/direct lookups
-            self._reverse_mappings[instrument_key] = (std_symbol, segment)
+    def _load_index(self, signature):
+        try:
+            with open(self.index_path, "rb") as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        if not isinstance(payload, dict) or payload.get('version') != self.INDEX_VERSION or payload.get('signature') != signature:
+            return False
+        keys, std_symbols, segments, segment_codes = payload['keys'], payload['std_symbols'], payload['segments'], payload['segment_codes']
+        mappings = dict(zip(std_symbols, keys))
+        mappings.update(payload['extra_mappings'])
+        SymbolMaster._mappings = mappings
+        SymbolMaster._reverse_mappings = dict(zip(keys, zip(std_symbols, map(segments.__getitem__, segment_codes))))
+        return True
+
+    def _save_index(self, signature):
+        """
+        Persists the mappings compactly: parallel key / std-symbol lists, one byte
+        per segment, and only the forward mappings that {std_symbol: key} misses.
+        """
+        if not signature:
+            return
+        keys = list(self._reverse_mappings)
+        std_symbols = [std for std, _ in self._reverse_mappings.values()]
+        segments = sorted({segment for _, segment in self._reverse_mappings.values()}, key=str)
+        if len(segments) > 255:
+            return
+        codes = {segment: i for i, segment in enumerate(segments)}
+        base = dict(zip(std_symbols, keys))
+        payload = {'version': self.INDEX_VERSION, 'signature': signature,
+                   'keys': keys, 'std_symbols': std_symbols, 'segments': segments,
+                   'segment_codes': bytes(codes[segment] for _, segment in self._reverse_mappings.values()),
+                   'extra_mappings': {s: k for s, k in self._mappings.items() if base.get(s) != k}}
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            # Read-only deployments just rebuild next time
+            print(f"  [WARN] Could not persist symbol index: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
-            # Special Index Mappings
-            if segment == 'NSE_INDEX':
-                if name == "Nifty 50":
-                    self._mappings["NIFTY"] = instrument_key
-                    self._mappings["NSE|INDEX|NIFTY"] = instrument_key
-                elif name == "Nifty Bank":
-                    self._mappings["BANKNIFTY"] = instrument_key
-                    self._mappings["NSE|INDEX|BANKNIFTY"] = instrument_key
-
-    def _standardize(self, row):
-        """Standardizes symbol format: [BASE][EXPIRY][STRIKE][TYPE]"""
-        segment = row['segment']
-        tradingsymbol = row['trading_symbol'].upper()
-
-        if segment == 'NSE_INDEX':
-            if row['name'] == "Nifty 50": return "NIFTY"
-            if row['name'] == "Nifty Bank": return "BANKNIFTY"
-            return tradingsymbol
-
-        # For Options/Futures, we could parse further, but for now tradingsymbol is close to standard
-        return tradingsymbol
+    def _populate_mappings(self, df):
+        """
+        Builds both mappings from the instrument master in a few column operations.
+
+        Mirrors a row-by-row pass: each row maps its standardized and raw
+        trading symbols (plus the NIFTY/BANKNIFTY aliases for the two index
+        rows) to its key, and later rows win on duplicate symbols.
+        """
+        if df.empty:
+            return
+        tradingsymbol = df['trading_symbol'].astype(str).str.upper().to_numpy(dtype=object)
+        instrument_key = df['instrument_key'].to_numpy(dtype=object)
+        segment = df['segment'].to_numpy(dtype=object)
+        name = (df['name'] if 'name' in df.columns else pd.Series('', index=df.index)).to_numpy(dtype=object)
+
+        is_index = segment == 'NSE_INDEX'
+        nifty = is_index & (name == "Nifty 50")
+        banknifty = is_index & (name == "Nifty Bank")
+        std_symbol = tradingsymbol.copy()
+        std_symbol[nifty] = "NIFTY"
+        std_symbol[banknifty] = "BANKNIFTY"
+        alias = np.full(len(df), None, dtype=object)
+        alias[nifty] = "NSE|INDEX|NIFTY"
+        alias[banknifty] = "NSE|INDEX|BANKNIFTY"
+
+        # Per row, in assignment order: std symbol, trading symbol, index aliases
+        symbols = np.column_stack([std_symbol, tradingsymbol, std_symbol, alias]).ravel()
+        keys = np.repeat(instrument_key, 4)
+        keep = np.tile([True, True, False, False], len(df))
+        keep[2::4] = nifty | banknifty
+        keep[3::4] = nifty | banknifty
+        self._mappings.update(zip(symbols[keep].tolist(), keys[keep].tolist()))
+        self._reverse_mappings.update(zip(instrument_key.tolist(), zip(std_symbol.tolist(), segment.tolist())))
 
     def get_upstox_key(self, symbol):
         if not self._initialized: self.initialize()
@@ -1,27 +1,35 @@
 import argparse
 import asyncio
 from python_engine.main import run_backtest
+from python_engine.backtest_runner import run_parallel_backtest
 from python_engine.live_main import run_live
-from python_engine.utils.symbol_master import MASTER as SymbolMaster
+
+def _resolve_symbol(symbol):
+    return "NSE|INDEX|NIFTY" if symbol == "NIFTY" else ("NSE|INDEX|BANKNIFTY" if symbol == "BANKNIFTY" else symbol)
 
 def main():
     parser = argparse.ArgumentParser(description="Python Trading Engine")
     parser.add_argument('--mode', type=str, choices=['backtest', 'live'], required=True, help='The mode to run the engine in.')
-    parser.add_argument('--symbol', type=str, help='The symbol to run the backtest for (required for backtest mode).')
+    parser.add_argument('--symbol', type=str, help='The symbol to run the backtest for (required for backtest mode). Comma-separated with --workers.')
     parser.add_argument('--from-date', type=str, help='The start date for the backtest (YYYY-MM-DD).')
     parser.add_argument('--to-date', type=str, help='The end date for the backtest (YYYY-MM-DD).')
     parser.add_argument('--no-backfill', action='store_true', help='Disable automatic data backfilling during backtest.')
+    parser.add_argument('--row-loop', action='store_true', help='Use the legacy row-by-row backtest loop instead of the columnar one.')
+    parser.add_argument('--workers', type=int, help='Shard (symbol, trading day) units across this many processes. Requires --from-date and --to-date. Never backfills, as with --no-backfill; data must already be ingested.')
 
 
     args = parser.parse_args()
 
-    SymbolMaster.initialize()
-
     if args.mode == 'backtest':
-        symbol = "NSE|INDEX|NIFTY" if args.symbol == "NIFTY" else ("NSE|INDEX|BANKNIFTY" if args.symbol == "BANKNIFTY" else args.symbol)
-        if not symbol:
+        if not args.symbol:
             parser.error("--symbol is required for backtest mode.")
-        run_backtest(symbol, args.from_date, args.to_date, auto_backfill=not args.no_backfill)
+        if args.workers:
+            if not (args.from_date and args.to_date):
+                parser.error("--workers requires --from-date and --to-date.")
+            symbols = [_resolve_symbol(s.strip()) for s in args.symbol.split(',') if s.strip()]
+            run_parallel_backtest(symbols, args.from_date, args.to_date, workers=args.workers, columnar=not args.row_loop)
+        else:
+            run_backtest(_resolve_symbol(args.symbol), args.from_date, args.to_date, auto_backfill=not args.no_backfill, columnar=not args.row_loop)
     elif args.mode == 'live':
         asyncio.run(run_live())
 
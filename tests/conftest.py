@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_sourcing.database_manager import DatabaseManager
+from data_sourcing.nse_client import NSEClient
+from python_engine.utils.symbol_master import SymbolMaster, MASTER
+
+MARKET_DAY = '2026-01-19'
+MARKET_EXPIRY = '2026-01-20'
+MARKET_STRIKES = range(25000, 26050, 50)
+
+
+def _option_symbol(strike, option_type):
+    return f"NIFTY {strike} {option_type} 20 JAN 26"
+
+
+def _option_key(strike, option_type):
+    return f"NSE_FO|{strike}{1 if option_type == 'CE' else 2}"
+
+
+def isolate_market(monkeypatch, db_dir):
+    """
+    Points the process-wide singletons at the database in `db_dir`.
+
+    Runs from `db_dir` (the engine opens 'sos_master_data.db' relative to the
+    working directory), starts SymbolMaster with empty mappings and keeps
+    NSEClient off the network.
+    """
+    from python_engine.data.repository import DataRepository
+    monkeypatch.chdir(db_dir)
+    monkeypatch.setattr(SymbolMaster, '_mappings', {})
+    monkeypatch.setattr(SymbolMaster, '_reverse_mappings', {})
+    monkeypatch.setattr(MASTER, '_initialized', False)
+    monkeypatch.setattr(NSEClient, '_init_session', lambda self: None)
+    DataRepository().clear_cache()
+
+
+def store_market_instruments(db):
+    """Writes the instrument master for the NIFTY index and the MARKET_STRIKES options."""
+    master = [{'trading_symbol': 'NIFTY 50', 'instrument_key': 'NSE_INDEX|Nifty 50', 'segment': 'NSE_INDEX',
+               'name': 'Nifty 50', 'exchange_token': 26000},
+              {'trading_symbol': 'NIFTY BANK', 'instrument_key': 'NSE_INDEX|Nifty Bank', 'segment': 'NSE_INDEX',
+               'name': 'Nifty Bank', 'exchange_token': 26009}]
+    for strike in MARKET_STRIKES:
+        for option_type in ('CE', 'PE'):
+            master.append({'trading_symbol': _option_symbol(strike, option_type), 'instrument_key': _option_key(strike, option_type),
+                           'segment': 'NSE_FO', 'name': 'NIFTY', 'exchange_token': int(_option_key(strike, option_type).split('|')[1])})
+    db.store_instrument_master(pd.DataFrame(master))
+
+
+def build_market_db(seed=7, days=(MARKET_DAY,)):
+    """
+    Writes synthetic NIFTY sessions to sos_master_data.db in the working
+    directory: per day, index candles, market stats, 5-minute option chains
+    and option candles, plus a matching instrument master.
+    """
+    db = DatabaseManager('sos_master_data.db')
+    db.initialize_database()
+    rng = np.random.default_rng(seed)
+    store_market_instruments(db)
+    for day in days:
+        _store_market_day(db, rng, day)
+
+
+def _store_market_day(db, rng, day):
+    ts = pd.date_range(f'{day} 09:15', f'{day} 15:29', freq='1min')
+    close = 25500.0 * np.exp(rng.normal(0, 0.0009, len(ts)).cumsum())
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.gamma(2, 4, len(ts))
+    low = np.minimum(open_, close) - rng.gamma(2, 4, len(ts))
+    volume = rng.integers(1000, 20000, len(ts)) * (1 + (rng.random(len(ts)) < 0.08) * 4)
+    db.store_historical_candles('NSE|INDEX|NIFTY', 'NSE', '1m', pd.DataFrame(
+        {'timestamp': ts, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume, 'oi': 0}))
+
+    trends = ['Long Buildup', 'Short Covering', 'Neutral', 'Short Buildup', 'Long Unwinding', None]
+    stats_ts = ts[::2]
+    db.store_market_stats('NSE|INDEX|NIFTY', pd.DataFrame({
+        'timestamp': stats_ts.strftime('%Y-%m-%d %H:%M:%S'), 'pcr': rng.uniform(0.6, 1.4, len(stats_ts)),
+        'pcr_velocity': rng.normal(0, .01, len(stats_ts)), 'advances': 0, 'declines': 0,
+        'oi_wall_above': 25700.0, 'oi_wall_below': 25300.0, 'call_oi': 1e6, 'put_oi': 1e6,
+        'smart_trend': [trends[i] for i in rng.integers(0, len(trends), len(stats_ts))]}))
+
+    for t in ts[::5]:
+        db.store_option_chain('NSE|INDEX|NIFTY', pd.DataFrame([{
+            'timestamp': t.strftime('%Y-%m-%d %H:%M:%S'), 'strike': float(strike), 'expiry': MARKET_EXPIRY,
+            'call_oi_chg': 0, 'put_oi_chg': 0,
+            'call_instrument_key': _option_key(strike, 'CE'), 'put_instrument_key': _option_key(strike, 'PE'),
+            'call_oi': float(rng.integers(1e4, 1e6)), 'put_oi': float(rng.integers(1e4, 1e6)),
+            'call_ltp': 100.0, 'put_ltp': 100.0, 'call_delta': 0.5, 'put_delta': -0.5,
+        } for strike in MARKET_STRIKES]))
+
+    option_frames = []
+    for strike in MARKET_STRIKES:
+        for option_type in ('CE', 'PE'):
+            intrinsic = np.maximum(close - strike, 0) if option_type == 'CE' else np.maximum(strike - close, 0)
+            price = intrinsic + 60 + rng.normal(0, 2, len(ts))
+            option_frames.append((_option_key(strike, option_type), pd.DataFrame({
+                'timestamp': ts, 'open': price, 'high': price + rng.gamma(2, 2, len(ts)),
+                'low': price - rng.gamma(2, 2, len(ts)), 'close': price + rng.normal(0, 1, len(ts)),
+                'volume': rng.integers(100, 5000, len(ts)), 'oi': 0})))
+    db.store_historical_candles_batch([(key, 'NSE', '1m', frame) for key, frame in option_frames])
+
+
+@pytest.fixture(scope='session')
+def market_dir(tmp_path_factory):
+    """Directory holding a synthetic one-day NIFTY database, built once per session."""
+    db_dir = tmp_path_factory.mktemp('market')
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        isolate_market(monkeypatch, db_dir)
+        build_market_db()
+    return db_dir
+
+
+@pytest.fixture
+def market(market_dir, monkeypatch):
+    """Runs the test against the synthetic market database."""
+    isolate_market(monkeypatch, market_dir)
+    return market_dir
@@ -0,0 +1,162 @@
+"""
+Local HTTP stand-ins for the remote data providers.
+
+Each stub serves one provider's endpoints from a deterministic synthetic
+session (SyntheticSession) on 127.0.0.1, so ingestion code can run end to
+end through the real clients by pointing "upstox_base_url",
+"trendlyne_base_url" and "tvdatafeed_base_url" at them.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+import numpy as np
+import pandas as pd
+from tests.conftest import MARKET_DAY, MARKET_EXPIRY, MARKET_STRIKES, _option_key
+
+INDEX_KEY = 'NSE_INDEX|Nifty 50'
+NIFTY_STOCK_ID = 1887
+
+
+class SyntheticSession:
+    """One NIFTY trading day: index bars, option bars and cumulative open interest per minute."""
+
+    def __init__(self, day: str = MARKET_DAY, seed: int = 11):
+        rng = np.random.default_rng(seed)
+        self.day = day
+        self.minutes = pd.date_range(f'{day} 09:15', f'{day} 15:30', freq='1min')
+        close = 25500.0 * np.exp(rng.normal(0, 0.0007, len(self.minutes)).cumsum())
+        self.index = self._bars(close, rng, volume=rng.integers(1000, 20000, len(close)))
+        self.options: Dict[str, pd.DataFrame] = {}
+        for strike in MARKET_STRIKES:
+            for option_type in ('CE', 'PE'):
+                intrinsic = np.maximum(close - strike, 0) if option_type == 'CE' else np.maximum(strike - close, 0)
+                price = intrinsic + 40 + rng.gamma(2, 3, len(close))
+                self.options[_option_key(strike, option_type)] = self._bars(price, rng, volume=rng.integers(100, 5000, len(close)))
+        # OI only changes every few minutes, as it does on the exchange
+        steps = (rng.random((len(self.minutes), len(MARKET_STRIKES), 2)) < 0.3) * rng.integers(-2000, 6000, (len(self.minutes), len(MARKET_STRIKES), 2))
+        self.oi = 200_000 + np.cumsum(steps, axis=0)
+
+    @staticmethod
+    def _bars(close, rng, volume) -> pd.DataFrame:
+        open_ = np.r_[close[0], close[:-1]]
+        return pd.DataFrame({'open': open_.round(2), 'high': (np.maximum(open_, close) + rng.gamma(2, 1, len(close))).round(2),
+                             'low': (np.minimum(open_, close) - rng.gamma(2, 1, len(close))).round(2),
+                             'close': close.round(2), 'volume': volume})
+
+    def bars(self, instrument_key: str) -> pd.DataFrame:
+        """Bars of an instrument key with a 'timestamp' column; empty for unknown keys."""
+        frame = self.index if instrument_key == INDEX_KEY else self.options.get(instrument_key)
+        if frame is None:
+            return pd.DataFrame(columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        return frame.assign(timestamp=self.minutes)[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+
+    def oi_data(self, max_time: str) -> Dict[str, Dict[str, int]]:
+        """Trendlyne's cumulative oiData as of max_time ("HH:MM")."""
+        k = int(self.minutes.searchsorted(pd.Timestamp(f'{self.day} {max_time}'), side='right')) - 1
+        if k < 0:
+            return {}
+        return {f'{strike}': {'callOi': int(self.oi[k, i, 0]), 'putOi': int(self.oi[k, i, 1]),
+                              'callOiChange': int(self.oi[k, i, 0] - self.oi[0, i, 0]),
+                              'putOiChange': int(self.oi[k, i, 1] - self.oi[0, i, 1])}
+                for i, strike in enumerate(MARKET_STRIKES)}
+
+
+class StubServer:
+    """
+    Threaded HTTP server dispatching GET requests to `route`.
+
+    Subclasses implement route(path, params) -> (status, JSON-able body).
+    Every request is recorded in `requests` as (path, params); `fail_next`
+    makes that many following requests answer 500.
+    """
+
+    def __init__(self, session: SyntheticSession):
+        self.session = session
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self.fail_next = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                path = unquote(parts.path)
+                stub.requests.append((path, params))
+                if stub.fail_next:
+                    stub.fail_next -= 1
+                    status, body = 500, {'error': 'stub failure'}
+                else:
+                    status, body = stub.route(path, params)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def route(self, path: str, params: Dict[str, str]) -> Tuple[int, object]:
+        raise NotImplementedError
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class UpstoxStub(StubServer):
+    """Upstox v3 historical candles: /v3/historical-candle/{key}/minutes/1/{to_date}/{from_date}."""
+
+    def route(self, path, params):
+        parts = path.split('/')
+        if len(parts) == 8 and parts[1:3] == ['v3', 'historical-candle']:
+            key, to_date, from_date = parts[3], parts[6], parts[7]
+            bars = self.session.bars(key)
+            day = bars['timestamp'].dt.strftime('%Y-%m-%d')
+            bars = bars[(day >= from_date) & (day <= to_date)]
+            candles = [[ts.strftime('%Y-%m-%dT%H:%M:%S+05:30'), o, h, l, c, int(v), 0]
+                       for ts, o, h, l, c, v in bars.itertuples(index=False)]
+            # Upstox lists the newest candle first
+            return 200, {'status': 'success', 'data': {'candles': candles[::-1]}}
+        return 404, {'status': 'error'}
+
+
+class TrendlyneStub(StubServer):
+    """Trendlyne SmartOptions: stock search, expiry dates and cumulative live OI."""
+
+    def route(self, path, params):
+        if path.endswith('/search-contract-stock/'):
+            return 200, {'head': {'status': '0'}, 'body': {'data': [{'stock_code': 'NIFTY', 'stock_id': NIFTY_STOCK_ID}]}}
+        if path.endswith('/fno/get-expiry-dates/'):
+            return 200, {'head': {'status': '0'}, 'body': {'expiryDates': [MARKET_EXPIRY]}}
+        if path.endswith('/live-oi-data/'):
+            return 200, {'head': {'status': '0'},
+                         'body': {'inputData': {'tradingDate': params.get('tradingDate', self.session.day)},
+                                  'oiData': self.session.oi_data(params['maxTime'])}}
+        return 404, {'head': {'status': '1'}}
+
+
+class TvDatafeedStub(StubServer):
+    """The /history endpoint tvdatafeed_client._HttpHistoryFeed reads in place of the websocket."""
+
+    def route(self, path, params):
+        if path == '/history' and params.get('symbol') == 'NIFTY':
+            bars = self.session.bars(INDEX_KEY).tail(int(params['n_bars']))
+            bars = bars.assign(datetime=bars['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')).drop(columns='timestamp')
+            return 200, bars.to_dict('records')
+        return 200, []
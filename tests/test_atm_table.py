@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from data_sourcing.database_manager import DatabaseManager
+from python_engine.data.atm_table import AtmOptionTable
+from tests.conftest import MARKET_EXPIRY, _option_key, isolate_market, store_market_instruments
+
+SYMBOL = 'NSE|INDEX|NIFTY'
+FRIDAY, MONDAY, TUESDAY = '2026-01-16', '2026-01-19', '2026-01-20'
+
+
+def _chain(timestamp, strikes, keys=True):
+    return pd.DataFrame([{
+        'timestamp': timestamp, 'strike': float(strike), 'expiry': MARKET_EXPIRY, 'call_oi': 1.0, 'put_oi': 1.0,
+        'call_oi_chg': 0, 'put_oi_chg': 0,
+        'call_instrument_key': _option_key(strike, 'CE') if keys else None,
+        'put_instrument_key': _option_key(strike, 'PE') if keys else None,
+    } for strike in strikes])
+
+
+def _minute(timestamp):
+    return DatabaseManager.to_epoch_minute(timestamp)
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    """Friday has a full chain; Monday's starts at 09:30 and lists 25600 from 11:00; Tuesday has none."""
+    isolate_market(monkeypatch, tmp_path)
+    db = DatabaseManager('sos_master_data.db')
+    db.initialize_database()
+    store_market_instruments(db)
+    db.store_option_chain(SYMBOL, _chain(f'{FRIDAY} 09:15:00', range(25000, 26050, 50)), date=FRIDAY)
+    db.store_option_chain(SYMBOL, _chain(f'{MONDAY} 09:30:00', range(25300, 25550, 50)), date=MONDAY)
+    # Keys missing from the chain are resolved through the instrument master
+    db.store_option_chain(SYMBOL, _chain(f'{MONDAY} 11:00:00', range(25300, 25650, 50), keys=False), date=MONDAY)
+    return AtmOptionTable(db)
+
+
+def test_resolves_the_rounded_strike_for_each_side(table):
+    assert table.lookup('NIFTY', 'BUY', 25412, MONDAY) == (_option_key(25400, 'CE'), 'NIFTY 25400 CE 20 JAN 26')
+    assert table.lookup('NIFTY', 'SELL', 25438, MONDAY) == (_option_key(25450, 'PE'), 'NIFTY 25450 PE 20 JAN 26')
+    assert table.lookup('NIFTY', 'BUY', 25600, MONDAY) == (_option_key(25600, 'CE'), 'NIFTY 25600 CE 20 JAN 26')
+    assert table.lookup('NIFTY', 'BUY', 0, MONDAY) == (None, None)
+
+
+def test_only_strikes_stored_by_the_trade_time_are_considered(table):
+    before, after = _minute(f'{MONDAY} 10:00'), _minute(f'{MONDAY} 11:00')
+    # 25600 is only listed from 11:00; before that the closest listed strike is 25500
+    assert table.lookup('NIFTY', 'BUY', 25610, MONDAY, at_min=before)[0] == _option_key(25500, 'CE')
+    assert table.lookup('NIFTY', 'BUY', 25610, MONDAY, at_min=after)[0] == _option_key(25600, 'CE')
+    assert table.lookup('NIFTY', 'BUY', 25610, MONDAY)[0] == _option_key(25600, 'CE')
+
+
+def test_falls_back_to_the_previous_stored_day(table):
+    # Before Monday's first snapshot the chain stored on Friday applies, with its wider strike range
+    assert table.lookup('NIFTY', 'BUY', 25910, MONDAY, at_min=_minute(f'{MONDAY} 09:15'))[0] == _option_key(25900, 'CE')
+    # A day without any chain uses the most recent earlier one (Monday)
+    assert table.lookup('NIFTY', 'SELL', 25910, TUESDAY, at_min=_minute(f'{TUESDAY} 10:00'))[0] == _option_key(25600, 'PE')
+    assert table.lookup('NIFTY', 'SELL', 25910, TUESDAY)[0] == _option_key(25600, 'PE')
+    # Nothing stored before Friday
+    assert table.lookup('NIFTY', 'BUY', 25400, FRIDAY, at_min=_minute(f'{FRIDAY} 09:00')) == (None, None)
+    assert not len(table.day('NIFTY', TUESDAY))
+
+
+def test_invalidate_drops_stale_fallbacks(table):
+    assert table.lookup('NIFTY', 'BUY', 25910, TUESDAY)[0] == _option_key(25600, 'CE')
+    table._db.store_option_chain(SYMBOL, _chain(f'{MONDAY} 15:00:00', [25900]), date=MONDAY)
+    table.invalidate('NIFTY', MONDAY)
+    assert table.lookup('NIFTY', 'BUY', 25910, TUESDAY)[0] == _option_key(25900, 'CE')
+
+
+def test_day_tables_are_cached(table):
+    table.lookup('NIFTY', 'BUY', 25400, MONDAY)
+    table.lookup('NIFTY', 'SELL', 25400, MONDAY)
+    assert (table.misses, table.hits) == (1, 1)
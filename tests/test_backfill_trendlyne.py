@@ -0,0 +1,65 @@
+import pytest
+import backfill_trendlyne
+from data_sourcing import rate_limiter
+from data_sourcing.database_manager import DatabaseManager
+from python_engine.engine_config import Config
+from tests.conftest import MARKET_DAY, MARKET_EXPIRY, isolate_market, store_market_instruments
+from tests.stub_servers import SyntheticSession, TrendlyneStub
+
+SYMBOL = 'NSE|INDEX|NIFTY'
+SLOTS = backfill_trendlyne.generate_time_intervals('09:15', '10:15')
+
+
+@pytest.fixture
+def trendlyne(tmp_path, monkeypatch):
+    isolate_market(monkeypatch, tmp_path)
+    db = DatabaseManager('sos_master_data.db')
+    db.initialize_database()
+    store_market_instruments(db)
+    with TrendlyneStub(SyntheticSession()) as stub:
+        monkeypatch.setattr(Config, '_config', {'trendlyne_base_url': stub.url, 'rate_limits': {'trendlyne': 0}})
+        monkeypatch.setattr(rate_limiter, '_limiters', {})
+        monkeypatch.setattr(backfill_trendlyne, 'STOCK_ID_CACHE', {})
+        yield stub, db
+
+
+def _oi_requests(stub):
+    return [params['maxTime'] for path, params in stub.requests if path.endswith('/live-oi-data/')]
+
+
+def test_default_cadence_stores_every_minute_as_served(trendlyne):
+    stub, db = trendlyne
+    written = backfill_trendlyne.backfill_options_day(db, ['NIFTY'], MARKET_DAY, SLOTS)
+
+    assert written == {SYMBOL: len(SLOTS)}
+    assert _oi_requests(stub) == SLOTS
+    chain = db.get_option_chain(SYMBOL, MARKET_DAY)
+    for slot in SLOTS:
+        rows = chain[chain['timestamp'] == f'{MARKET_DAY} {slot}:00'].set_index('strike')
+        served = stub.session.oi_data(slot)
+        assert {float(k): v['callOi'] for k, v in served.items()} == rows['call_oi'].to_dict()
+    assert db.get_backfill_checkpoints(SYMBOL, MARKET_DAY) == {MARKET_EXPIRY: SLOTS[-1]}
+
+
+def test_failed_chain_write_leaves_the_checkpoint_for_a_rerun(trendlyne, monkeypatch):
+    stub, db = trendlyne
+    store = db.store_option_chain
+    monkeypatch.setattr(db, 'store_option_chain', lambda *args, **kwargs: False)
+
+    assert backfill_trendlyne.backfill_options_day(db, ['NIFTY'], MARKET_DAY, SLOTS) == {}
+    assert db.get_backfill_checkpoints(SYMBOL, MARKET_DAY) == {}
+    assert db.get_market_stats(SYMBOL, MARKET_DAY, MARKET_DAY).empty
+
+    monkeypatch.setattr(db, 'store_option_chain', store)
+    stub.requests.clear()
+    assert backfill_trendlyne.backfill_options_day(db, ['NIFTY'], MARKET_DAY, SLOTS) == {SYMBOL: len(SLOTS)}
+    assert _oi_requests(stub) == SLOTS  # Nothing was skipped on resume
+    assert db.get_backfill_checkpoints(SYMBOL, MARKET_DAY) == {MARKET_EXPIRY: SLOTS[-1]}
+
+
+def test_failed_stats_write_also_blocks_the_checkpoint(trendlyne, monkeypatch):
+    _, db = trendlyne
+    monkeypatch.setattr(db, 'store_market_stats', lambda *args, **kwargs: False)
+
+    assert backfill_trendlyne.backfill_options_day(db, ['NIFTY'], MARKET_DAY, SLOTS) == {}
+    assert db.get_backfill_checkpoints(SYMBOL, MARKET_DAY) == {}
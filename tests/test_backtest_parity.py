@@ -0,0 +1,42 @@
+import os
+import shutil
+import pytest
+from data_sourcing.data_manager import DataManager
+from python_engine.core.order_orchestrator import OrderOrchestrator
+from python_engine.core.trade_logger import TradeLog
+from python_engine.core.trading_engine import TradingEngine
+from python_engine.data.repository import DataRepository
+from tests.conftest import MARKET_DAY
+
+REPO_STRATEGIES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'strategies')
+# Strategies that trade on the synthetic session, covering BUY/SELL entries, SL/TP and time exits
+STRATEGIES = ('BB_MEAN_REVERSION_LONG', 'BB_MEAN_REVERSION_SHORT', 'SNAP_REVERSAL_LONG', 'SNAP_REVERSAL_SHORT',
+              'VOLUME_SPIKE_SCALPER_LONG')
+
+
+@pytest.fixture
+def strategies_dir(tmp_path):
+    for name in STRATEGIES:
+        shutil.copy(os.path.join(REPO_STRATEGIES, f"{name}.json"), tmp_path)
+    return str(tmp_path)
+
+
+def _run(strategies_dir, columnar):
+    repository = DataRepository()
+    repository.clear_cache()
+    data_manager = DataManager()
+    trade_log = TradeLog('backtest.csv', persist=False)
+    engine = TradingEngine(OrderOrchestrator(trade_log, data_manager, 'backtest'), data_manager, strategies_dir)
+    candles = repository.get_historical_candles('NSE|INDEX|NIFTY', from_date=MARKET_DAY, to_date=MARKET_DAY)
+    candles = candles.set_index('timestamp').sort_index()
+    engine.run_backtest('NSE|INDEX|NIFTY', candles, columnar=columnar)
+    return sorted((t.entry_time, t.pattern_id, t.symbol, round(t.entry_price, 6), t.exit_time,
+                   None if t.exit_price is None else round(t.exit_price, 6), t.outcome.value, t.exit_reason,
+                   round(t.stop_loss, 6)) for t in trade_log.get_trades())
+
+
+def test_columnar_loop_matches_row_loop(market, strategies_dir):
+    columnar = _run(strategies_dir, columnar=True)
+    rows = _run(strategies_dir, columnar=False)
+    assert columnar, "synthetic session should trigger trades"
+    assert columnar == rows
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import pytest
+from data_sourcing.database_manager import DatabaseManager
+from data_sourcing.nse_client import NSEClient
+from python_engine import backtest_runner, main
+from python_engine.backtest_runner import trading_days
+from python_engine.core.trade_logger import TradeLog
+from python_engine.data.repository import DataRepository
+from tests.conftest import MARKET_DAY, build_market_db, isolate_market
+from tests.test_backtest_parity import REPO_STRATEGIES, STRATEGIES
+
+SYMBOL = 'NSE|INDEX|NIFTY'
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+def _refuse(*args, **kwargs):
+    raise AssertionError("workers must not call NSE or write to the database")
+
+
+def test_trading_days_skips_weekends_and_holidays():
+    assert trading_days('2026-01-23', '2026-01-27', ['2026-01-26']) == ['2026-01-23', '2026-01-27']
+
+
+def test_worker_uses_parent_holidays_without_network_or_writes(market, monkeypatch):
+    monkeypatch.setattr(DatabaseManager, 'default_read_only', False)
+    monkeypatch.setattr(NSEClient, '_init_session', _refuse)
+    monkeypatch.setattr(NSEClient, 'get_holiday_list', _refuse)
+    monkeypatch.setattr(DatabaseManager, 'store_holidays', _refuse)
+    monkeypatch.setattr(backtest_runner, '_worker_state', {})
+
+    backtest_runner._init_worker(CONFIG_FILE, ['2026-01-26'])
+
+    data_manager = backtest_runner._worker_state['data_manager']
+    assert DatabaseManager.default_read_only
+    assert data_manager.db_manager.read_only
+    assert data_manager.holidays == ['2026-01-26']
+
+
+DAYS = ('2026-01-16', MARKET_DAY)
+
+
+@pytest.fixture(scope='module')
+def two_day_dir(tmp_path_factory):
+    """Synthetic sessions on a Friday and the following Monday, plus a config pointing at the parity strategies."""
+    db_dir = tmp_path_factory.mktemp('two_days')
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        isolate_market(monkeypatch, db_dir)
+        build_market_db(seed=3, days=DAYS)
+    strategies_dir = db_dir / 'strategies'
+    strategies_dir.mkdir()
+    for name in STRATEGIES:
+        shutil.copy(os.path.join(REPO_STRATEGIES, f"{name}.json"), strategies_dir)
+    (db_dir / 'config.json').write_text(json.dumps({'strategies_dir': str(strategies_dir), 'use_tvdatafeed': False}))
+    return db_dir
+
+
+@pytest.fixture
+def two_days(two_day_dir, monkeypatch):
+    isolate_market(monkeypatch, two_day_dir)
+    monkeypatch.setattr(NSEClient, 'get_holiday_list', lambda self: ['2026-01-26'])
+    return two_day_dir
+
+
+def _outcome(trade):
+    return (trade.entry_time, trade.pattern_id, trade.symbol, trade.instrument_key, round(trade.entry_price, 6),
+            trade.exit_time, None if trade.exit_price is None else round(trade.exit_price, 6), trade.outcome.value,
+            trade.exit_reason, round(trade.stop_loss, 6))
+
+
+def test_parallel_backtest_merges_days_like_serial_runs(two_days, monkeypatch):
+    config_file = str(two_days / 'config.json')
+    first = backtest_runner.run_parallel_backtest([SYMBOL], DAYS[0], DAYS[-1], workers=2, config_file=config_file)[SYMBOL]
+    second = backtest_runner.run_parallel_backtest([SYMBOL], DAYS[0], DAYS[-1], workers=2, config_file=config_file)[SYMBOL]
+    assert [t.trade_id for t in first] == [t.trade_id for t in second]
+    assert [_outcome(t) for t in first] == [_outcome(t) for t in second]
+    rows = backtest_runner.run_parallel_backtest([SYMBOL], DAYS[0], DAYS[-1], workers=2, config_file=config_file,
+                                                 columnar=False)[SYMBOL]
+    assert [_outcome(t) for t in rows] == [_outcome(t) for t in first]
+
+    logs = []
+
+    class RecordingTradeLog(TradeLog):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            logs.append(self)
+
+    monkeypatch.setattr(main, 'TradeLog', RecordingTradeLog)
+    serial = []
+    for day in DAYS:
+        DataRepository().clear_cache()
+        main.run_backtest(SYMBOL, day, day, auto_backfill=False)
+        day_trades = sorted(logs[-1].get_trades(), key=backtest_runner._trade_sort_key)
+        assert day_trades, f"synthetic session on {day} should trigger trades"
+        serial.extend(day_trades)
+
+    assert [_outcome(t) for t in first] == [_outcome(t) for t in serial]
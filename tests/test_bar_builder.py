@@ -0,0 +1,92 @@
+import pandas as pd
+from python_engine.data.bar_builder import BarBuilder, BarGap, BuiltBar
+
+KEY = 'NSE_FO|255001'
+MINUTE = 60_000
+T0 = int(pd.Timestamp('2026-01-19 09:15', tz='Asia/Kolkata').value // 10**6)
+
+
+def _minute(n: int) -> int:
+    return T0 + n * MINUTE
+
+
+def _feed(n: int, ltp: float = 100.0, second: int = 30, i1=()):
+    """A full feed at minute n: one ltpc tick plus I1 candles for the given minutes."""
+    ohlc = [{'interval': 'I1', 'ts': str(_minute(m)), 'open': 10 + m, 'high': 12 + m, 'low': 9 + m, 'close': 11 + m, 'vol': 5}
+            for m in i1]
+    return {'fullFeed': {'marketFF': {'ltpc': {'ltp': ltp, 'ltt': str(_minute(n) + second * 1000), 'ltq': '3'},
+                                      'marketOHLC': {'ohlc': ohlc}}}}
+
+
+def _summary(items):
+    return [(type(item).__name__, (item.minute_ms - T0) // MINUTE, getattr(item, 'source', None)) for item in items]
+
+
+def test_closes_minutes_from_ticks_or_exchange_candles():
+    builder = BarBuilder()
+    out = []
+    for n, kwargs in [(0, {}), (1, {'ltp': 101}), (1, {'ltp': 103, 'second': 50}), (2, {'i1': (1,)}), (3, {})]:
+        out += builder.update(KEY, _feed(n, **kwargs))
+
+    # Minute 0 was joined midway and has no candle; minute 1 uses the exchange candle; minute 2 its ticks
+    assert _summary(out) == [('BarGap', 0, None), ('BuiltBar', 1, 'feed'), ('BuiltBar', 2, 'ticks')]
+    assert out[1] == BuiltBar(KEY, _minute(1), 11.0, 13.0, 10.0, 12.0, 5, 'feed')
+
+
+def test_every_skipped_minute_is_reported():
+    builder = BarBuilder()
+    out = []
+    for n in (0, 1, 2, 6, 7):
+        out += builder.update(KEY, _feed(n))
+
+    assert _summary(out) == [('BarGap', 0, None), ('BuiltBar', 1, 'ticks'), ('BuiltBar', 2, 'ticks'),
+                             ('BarGap', 3, None), ('BarGap', 4, None), ('BarGap', 5, None), ('BuiltBar', 6, 'ticks')]
+
+
+def test_skipped_minutes_use_candles_carried_by_the_feed():
+    builder = BarBuilder()
+    builder.update(KEY, _feed(0))
+    out = builder.update(KEY, _feed(4, i1=(2, 4)))
+    assert _summary(out) == [('BarGap', 0, None), ('BarGap', 1, None), ('BuiltBar', 2, 'feed'), ('BarGap', 3, None)]
+
+
+def test_reconnect_reports_the_minutes_it_missed():
+    builder = BarBuilder()
+    for n in (0, 1, 2):
+        builder.update(KEY, _feed(n))
+    builder.reset()
+
+    # Minute 2 was in progress at the disconnect; 3 and 4 passed while disconnected
+    out = builder.update(KEY, _feed(5, i1=(4, 5)))
+    assert _summary(out) == [('BarGap', 2, None), ('BarGap', 3, None), ('BuiltBar', 4, 'feed')]
+    # The first minute after reconnecting was joined midway
+    assert _summary(builder.update(KEY, _feed(6))) == [('BuiltBar', 5, 'feed')]
+
+
+def test_late_messages_are_ignored():
+    builder = BarBuilder()
+    for n in (0, 1, 2):
+        builder.update(KEY, _feed(n))
+    assert builder.update(KEY, _feed(1)) == []
+    builder.reset()
+    assert builder.update(KEY, _feed(0)) == []
+    assert _summary(builder.update(KEY, _feed(3))) == [('BarGap', 2, None)]
+
+
+def test_no_gaps_across_trading_days():
+    builder = BarBuilder()
+    for n in (374, 375):  # 15:29 and 15:30
+        builder.update(KEY, _feed(n))
+    builder.reset()
+    next_day = 24 * 60
+    assert builder.update(KEY, _feed(next_day)) == []
+    assert _summary(builder.update(KEY, _feed(next_day + 1))) == [('BarGap', next_day, None)]
+
+
+def test_instruments_are_independent():
+    builder = BarBuilder()
+    builder.update(KEY, _feed(0))
+    builder.update('NSE_FO|255002', _feed(0))
+    assert _summary(builder.update(KEY, _feed(2))) == [('BarGap', 0, None), ('BarGap', 1, None)]
+    assert all(isinstance(item, BarGap) and item.key == 'NSE_FO|255002'
+               for item in builder.update('NSE_FO|255002', _feed(1)))
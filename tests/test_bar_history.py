@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from python_engine.models.data_models import VolumeBar
+from python_engine.utils.bar_history import BarHistory
+
+
+def _bar(i: int) -> VolumeBar:
+    return VolumeBar('NSE_INDEX|Nifty 50', 1_700_000_000 + 60 * i, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10 * i, atr=0.1 * i)
+
+
+def _filled(capacity: int, count: int) -> BarHistory:
+    history = BarHistory(capacity)
+    for i in range(count):
+        history.append(_bar(i))
+    return history
+
+
+@pytest.mark.parametrize("count", [0, 1, 4, 5, 6, 13])
+def test_matches_a_bounded_list(count):
+    history = _filled(5, count)
+    expected = [_bar(i) for i in range(count)][-5:]
+
+    assert len(history) == len(expected)
+    assert list(history) == expected
+    assert history[:] == expected
+    assert history[-2:] == expected[-2:]
+    for field in BarHistory.FIELDS:
+        np.testing.assert_array_equal(history.column(field), [getattr(b, field) for b in expected])
+
+
+def test_indexing_follows_chronological_order_after_wrap():
+    history = _filled(3, 7)
+    assert history[0] == _bar(4)
+    assert history[-1] == _bar(6)
+    with pytest.raises(IndexError):
+        history[3]
+
+
+def test_column_tail_uses_slice_semantics():
+    history = _filled(4, 10)
+    np.testing.assert_array_equal(history.column('close', 2), [108.5, 109.5])
+    np.testing.assert_array_equal(history.column('close', 10), history.column('close'))
+
+
+def test_column_is_a_read_only_view_with_case_insensitive_lookup():
+    history = _filled(4, 6)
+    view = history.column('CLOSE')
+    assert view.base is not None
+    assert history.column('timestamp').dtype == np.int64
+    with pytest.raises(ValueError):
+        view[0] = 0.0
+    assert history.column('symbol') is None
@@ -0,0 +1,34 @@
+from data_sourcing.database_manager import DatabaseManager
+
+
+def _db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'pool.db'))
+    db._execute_query("CREATE TABLE t (v INTEGER)", commit=True)
+    return db
+
+
+def _count(db):
+    with db.reader() as conn:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+def test_inner_manager_does_not_roll_back_the_outer_transaction(tmp_path):
+    outer, inner = _db(tmp_path), DatabaseManager(str(tmp_path / 'pool.db'))
+    with outer:
+        outer.conn.execute("INSERT INTO t VALUES (1)")
+        with inner:
+            assert inner.conn is outer.conn
+        assert outer.conn.in_transaction
+        outer.conn.commit()
+    assert _count(outer) == 1
+
+
+def test_outermost_exit_still_discards_uncommitted_work(tmp_path):
+    outer, inner = _db(tmp_path), DatabaseManager(str(tmp_path / 'pool.db'))
+    with outer:
+        with inner:
+            inner.conn.execute("INSERT INTO t VALUES (1)")
+        with outer:
+            pass
+    assert _count(outer) == 0
+
@@ -0,0 +1,95 @@
+import math
+import pytest
+from asteval import Interpreter
+from python_engine.models.data_models import Execution, PatternDefinition, Phase
+from python_engine.utils.dot_dict import DotDict
+from python_engine.utils.expression_compiler import CompiledExpression, compile_phases, new_namespace
+
+SYMBOLS = {
+    'close': 101.5,
+    'open': 100.0,
+    'high': 103.0,
+    'low': 99.0,
+    'vars': DotDict({'lower_band': 100.5, 'levels': [99, 100, 101]}),
+    'sentiment': DotDict({'pcr': 0.9, 'smart_trend': 'Neutral'}),
+    'highest': lambda values: max(values),
+    'math': math,
+}
+
+EXPRESSIONS = [
+    "close > vars.lower_band",
+    "close > open and high - low > 3",
+    "sentiment.smart_trend in ['Long Buildup', 'Short Covering', 'Neutral']",
+    "sentiment.pcr > 0.8 or close < 50",
+    "(close - low) * 2 + 1",
+    "close if close > open else open",
+    "highest(vars.levels) ** 2",
+    "[x * 2 for x in vars.levels if x > 99]",
+    "not (close < open)",
+    "'ab' * 3",
+]
+
+
+@pytest.mark.parametrize("source", EXPRESSIONS)
+def test_evaluates_like_asteval(source):
+    interpreter = Interpreter(symtable=dict(SYMBOLS))
+    expected = interpreter.eval(source)
+    assert not interpreter.error
+    assert CompiledExpression(source).evaluate(new_namespace(SYMBOLS)) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "__import__('os')",
+    "_private",
+    "open.__class__",
+    "(lambda: 1)()",
+    "f'{close}'",
+    "(x for x in vars.levels)",
+    "close; open",
+])
+def test_rejects_what_the_sandbox_forbids(source):
+    expression = CompiledExpression(source)
+    assert expression.error is not None
+    with pytest.raises(Exception):
+        expression.evaluate(new_namespace(SYMBOLS))
+
+
+def test_builtins_are_not_reachable():
+    with pytest.raises(NameError):
+        CompiledExpression("len(vars.levels)").evaluate(new_namespace(SYMBOLS))
+
+
+def test_module_attributes_are_refused_at_runtime():
+    # 'math' itself is exposed, but no attribute may hand out a module
+    namespace = new_namespace(dict(SYMBOLS, holder=DotDict({'mod': math})))
+    assert CompiledExpression("math.floor(close)").evaluate(namespace) == 101
+    with pytest.raises(AttributeError):
+        CompiledExpression("holder.mod").evaluate(namespace)
+
+
+def test_guarded_operators_keep_asteval_limits():
+    with pytest.raises(Exception):
+        CompiledExpression("10 ** 100000").evaluate(new_namespace(SYMBOLS))
+    with pytest.raises(Exception):
+        CompiledExpression("'a' * 10**9").evaluate(new_namespace(SYMBOLS))
+
+
+def test_overlong_source_is_rejected():
+    assert CompiledExpression("1 + " * 20000 + "1").error is not None
+
+
+def test_compile_phases_compiles_conditions_and_captures():
+    definition = PatternDefinition(
+        pattern_id='P',
+        regime_config={},
+        phases=[Phase(id='A', conditions=["close > open"], capture={'band': "low + 1"}, timeout=0),
+                Phase(id='B', conditions=None, capture=None, timeout=5)],
+        execution=Execution(side='BUY', entry='close', sl='low', tp='high', option_selection='ATM'),
+    )
+    phases = compile_phases(definition)
+    namespace = new_namespace(SYMBOLS)
+
+    assert set(phases) == {'A', 'B'}
+    assert [c.evaluate(namespace) for c in phases['A'].conditions] == [True]
+    assert [(name, c.evaluate(namespace)) for name, c in phases['A'].captures] == [('band', 100.0)]
+    assert phases['B'].conditions == () and phases['B'].captures == ()
@@ -0,0 +1,151 @@
+import threading
+import pandas as pd
+import pytest
+from data_sourcing import rate_limiter
+from data_sourcing.data_manager import DataManager
+from data_sourcing.database_manager import DatabaseManager
+from data_sourcing.ingestion_pipeline import IngestionPipeline
+from python_engine.engine_config import Config
+from tests.conftest import MARKET_DAY, isolate_market, store_market_instruments
+from tests.stub_servers import INDEX_KEY, SyntheticSession, TrendlyneStub, TvDatafeedStub, UpstoxStub
+
+SYMBOL = 'NSE|INDEX|NIFTY'
+
+
+@pytest.fixture(scope='module')
+def session():
+    return SyntheticSession()
+
+
+@pytest.fixture
+def stubs(session, tmp_path, monkeypatch):
+    """An empty database (instrument master only) and the three provider stubs behind the real clients."""
+    isolate_market(monkeypatch, tmp_path)
+    db = DatabaseManager('sos_master_data.db')
+    db.initialize_database()
+    store_market_instruments(db)
+
+    with UpstoxStub(session) as upstox, TrendlyneStub(session) as trendlyne, TvDatafeedStub(session) as tv:
+        monkeypatch.setattr(Config, '_config', {
+            'upstox_access_token': 'stub-token',
+            'upstox_base_url': upstox.url,
+            'trendlyne_base_url': trendlyne.url,
+            'tvdatafeed_base_url': tv.url,
+            'use_tvdatafeed': False,
+            'rate_limits': {'upstox': 0, 'trendlyne': 0, 'tvdatafeed': 0},
+        })
+        monkeypatch.setattr(rate_limiter, '_limiters', {})
+        yield {'upstox': upstox, 'trendlyne': trendlyne, 'tv': tv}
+
+
+def _pipeline(**kwargs):
+    data_manager = DataManager(holidays=[])
+    return IngestionPipeline(data_manager, fetch_workers=4, enrich_workers=0, write_batch_size=8, **kwargs)
+
+
+def test_pipeline_fetches_enriches_and_writes_a_day(stubs, session):
+    pipeline = _pipeline()
+    counts = pipeline.run(SYMBOL, MARKET_DAY, MARKET_DAY, full_options=True)
+    db = pipeline.db_manager
+
+    option_keys = {params_path.split('/')[3] for params_path, _ in stubs['upstox'].requests} - {INDEX_KEY}
+    assert counts['days'] == 1 and counts['enriched_days'] == 1
+    assert counts['candle_sets'] == len(option_keys) > 0
+    assert counts['write_failures'] == counts['lost_candle_sets'] == counts['lost_enriched_days'] == 0
+    assert any(path == '/history' for path, _ in stubs['tv'].requests)
+
+    # Index candles as the provider served them
+    index = db.get_historical_candles(SYMBOL, 'NSE', '1m', MARKET_DAY, MARKET_DAY).sort_values('timestamp')
+    expected = session.bars(INDEX_KEY)
+    assert len(index) == len(expected)
+    assert index['close'].tolist() == expected['close'].tolist()
+    assert index['volume'].tolist() == expected['volume'].tolist()
+
+    # Every downloaded contract landed in the batched writes
+    for key in option_keys:
+        stored = db.get_historical_candles(key, 'NSE', '1m', MARKET_DAY, MARKET_DAY).sort_values('timestamp')
+        assert stored['close'].tolist() == session.bars(key)['close'].tolist()
+
+    # Chain snapshots carry the provider's OI at the last slot and the enrichment columns
+    chain = db.get_option_chain(SYMBOL, MARKET_DAY)
+    last = chain[chain['timestamp'] == f'{MARKET_DAY} 15:30:00'].set_index('strike')
+    for strike, row in session.oi_data('15:30').items():
+        assert last.loc[float(strike), 'call_oi'] == row['callOi']
+        assert last.loc[float(strike), 'put_oi'] == row['putOi']
+    enriched = chain[chain['timestamp'] < f'{MARKET_DAY} 15:30:00']
+    assert enriched['call_iv'].notna().all() and enriched['call_trend'].notna().all()
+
+    stats = db.get_market_stats(SYMBOL, MARKET_DAY, MARKET_DAY)
+    assert len(stats) == len(session.minutes)
+    assert stats['smart_trend'].notna().all()
+
+
+def _is_index(batch):
+    return all(symbol == SYMBOL for symbol, *_ in batch)
+
+
+def test_every_write_runs_on_the_writer_thread(stubs, monkeypatch):
+    pipeline = _pipeline()
+    db = pipeline.db_manager
+    threads = []
+    for name in ('store_historical_candles_batch', 'store_option_chain', 'store_market_stats',
+                 'store_backfill_checkpoints', 'copy_option_chain'):
+        def recording(*args, _store=getattr(db, name), **kwargs):
+            threads.append(threading.current_thread().name)
+            return _store(*args, **kwargs)
+        monkeypatch.setattr(db, name, recording)
+
+    pipeline.run(SYMBOL, MARKET_DAY, MARKET_DAY, full_options=True)
+
+    assert threads and set(threads) == {'ingestion-writer'}
+
+
+def test_chain_copy_is_limited_to_the_day(stubs):
+    db = _pipeline().db_manager
+    for day in ('2026-01-16', MARKET_DAY):
+        row = {'timestamp': f'{day} 09:15:00', 'strike': 25500, 'expiry': '2026-01-20', 'call_oi': 1, 'put_oi': 2}
+        assert db.store_option_chain('NIFTY', pd.DataFrame([row]), date=day)
+
+    assert db.copy_option_chain('NIFTY', SYMBOL, MARKET_DAY)
+    with db.reader() as conn:
+        copied = conn.execute("SELECT timestamp FROM option_chain_data WHERE symbol = ?", (SYMBOL,)).fetchall()
+    assert copied == [(f'{MARKET_DAY} 09:15:00',)]
+
+
+def test_writer_keeps_and_retries_a_failed_batch(stubs, monkeypatch):
+    pipeline = _pipeline()
+    monkeypatch.setattr(IngestionPipeline, 'WRITE_RETRY_DELAY', 0)
+    store = pipeline.db_manager.store_historical_candles_batch
+    calls = []
+
+    def flaky_store(batch):
+        if _is_index(batch):
+            return store(batch)
+        calls.append(len(batch))
+        if len(calls) == 1:
+            return False  # Rolled back, like a locked database
+        return store(batch)
+
+    monkeypatch.setattr(pipeline.db_manager, 'store_historical_candles_batch', flaky_store)
+    counts = pipeline.run(SYMBOL, MARKET_DAY, MARKET_DAY, full_options=True)
+
+    assert counts['write_failures'] == 1 and counts['lost_candle_sets'] == 0
+    assert calls[1] == calls[0]  # The failed batch was retried whole
+    assert counts['candle_sets'] == sum(calls[1:]) > 0
+    with pipeline.db_manager.reader() as conn:
+        stored = conn.execute("SELECT COUNT(DISTINCT symbol) FROM historical_candles WHERE symbol != ?", (INDEX_KEY,)).fetchone()[0]
+    assert stored == counts['candle_sets']
+
+
+def test_writer_counts_what_it_gives_up_on(stubs, monkeypatch):
+    pipeline = _pipeline()
+    monkeypatch.setattr(IngestionPipeline, 'WRITE_RETRY_DELAY', 0)
+    store = pipeline.db_manager.store_historical_candles_batch
+    monkeypatch.setattr(pipeline.db_manager, 'store_historical_candles_batch',
+                        lambda batch: _is_index(batch) and store(batch))
+
+    counts = pipeline.run(SYMBOL, MARKET_DAY, MARKET_DAY, full_options=True)
+
+    assert counts['candle_sets'] == 0
+    assert counts['lost_candle_sets'] > 0
+    assert counts['write_failures'] >= IngestionPipeline.WRITE_ATTEMPTS
@@ -0,0 +1,66 @@
+import threading
+import numpy as np
+import pytest
+from python_engine.utils.latency import LatencyHistogram
+
+
+def test_empty_histogram_reports_zeros():
+    assert LatencyHistogram('idle').snapshot() == {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p90_ms': 0.0,
+                                                    'p99_ms': 0.0, 'max_ms': 0.0}
+
+
+@pytest.mark.parametrize("q", [1, 50, 90, 99, 100])
+def test_percentiles_never_understate(q):
+    samples_ms = np.random.default_rng(5).lognormal(2.0, 1.2, 2000)
+    hist = LatencyHistogram('stage')
+    for ms in samples_ms:
+        hist.record(ms / 1000.0)
+
+    exact = np.percentile(samples_ms, q, method='inverted_cdf')
+    reported = hist.percentile(q)
+    assert reported >= exact - 1e-9
+    # ... and stay within the bucket holding the exact value
+    bound = next((b for b in hist.bounds if b >= exact), samples_ms.max())
+    assert reported <= bound
+
+
+def test_bucket_edges_and_open_ended_bucket():
+    hist = LatencyHistogram('edges', buckets_ms=(1, 10))
+    for ms in (1.0, 1.5, 10.0, 250.0):
+        hist.record(ms / 1000.0)
+    assert hist.counts == [1, 2, 1]
+    assert hist.percentile(25) == 1
+    assert hist.percentile(75) == 10
+    assert hist.percentile(100) == pytest.approx(250.0)
+
+
+def test_percentile_is_capped_by_the_maximum():
+    hist = LatencyHistogram('fast')
+    hist.record(0.0034)
+    assert hist.percentile(50) == pytest.approx(3.4)
+
+
+def test_snapshot_and_report():
+    hist = LatencyHistogram('handlers')
+    for ms in (2, 4, 6):
+        hist.record(ms / 1000.0)
+    snapshot = hist.snapshot()
+    assert snapshot['count'] == 3
+    assert snapshot['mean_ms'] == pytest.approx(4.0)
+    assert snapshot['max_ms'] == pytest.approx(6.0)
+    assert str(hist).startswith('handlers') and 'n=3' in str(hist)
+
+
+def test_concurrent_records_are_all_counted():
+    hist = LatencyHistogram('threads')
+
+    def worker():
+        for _ in range(2000):
+            hist.record(0.003)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert hist.total == sum(hist.counts) == 8000
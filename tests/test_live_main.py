@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pandas as pd
+from python_engine.data.bar_builder import BarGap, BuiltBar
+from python_engine.data.sentiment_service import SentimentService
+from python_engine.live_main import LiveTradingEngine
+from python_engine.utils.latency import LatencyHistogram
+
+KEY = 'NSE_FO|255001'
+OTHER_KEY = 'NSE_FO|255002'
+MINUTE = 60_000
+T0 = int(pd.Timestamp('2026-01-19 09:15', tz='Asia/Kolkata').value // 10**6)
+
+
+def _minute(n: int) -> int:
+    return T0 + n * MINUTE
+
+
+class IntradayStub:
+    """Upstox intraday endpoint serving minutes 0-9 for any key, after an optional delay."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_intra_day_candle_data(self, key, interval):
+        with self._lock:
+            self.calls.append(key)
+        time.sleep(self.delay)
+        candles = [[pd.Timestamp(_minute(n), unit='ms', tz='UTC').tz_convert('Asia/Kolkata').isoformat(), 10 + n, 12 + n, 9 + n, 11 + n, 5, 0]
+                   for n in range(10)]
+        return SimpleNamespace(data=SimpleNamespace(candles=candles))
+
+
+class DbWriterStub:
+    async def submit_candles(self, *args):
+        pass
+
+    async def submit_market_stats(self, *args):
+        pass
+
+
+def _engine(loop, upstox_client, io_workers=4):
+    """A LiveTradingEngine wired to stubs from the raw queues to the event queue, without the websocket or engine."""
+    engine = LiveTradingEngine.__new__(LiveTradingEngine)
+    engine.loop = loop
+    engine.io_workers = io_workers
+    engine.raw_queues = [asyncio.Queue(maxsize=10) for _ in range(io_workers)]
+    engine.event_queue = asyncio.Queue()
+    engine._executor = ThreadPoolExecutor(max_workers=io_workers)
+    engine.latency = {stage: LatencyHistogram(stage) for stage in LiveTradingEngine.STAGES}
+    engine._received = {}
+    engine._gap_candles = {}
+    engine.db_writer = DbWriterStub()
+    engine.data_manager = SimpleNamespace(upstox_client=upstox_client)
+    engine.sentiment_service = SentimentService(None, [])
+    return engine
+
+
+async def _run(engine, items, expected_events):
+    workers = [asyncio.create_task(engine._enrich_worker(raw_queue)) for raw_queue in engine.raw_queues]
+    try:
+        for item in items:
+            await engine._dispatch(item, time.perf_counter())
+        events = [await asyncio.wait_for(engine.event_queue.get(), 5) for _ in range(expected_events)]
+    finally:
+        for task in workers:
+            task.cancel()
+        engine._executor.shutdown(wait=False)
+    return [(event.symbol, (event.timestamp * 1000 - T0) // MINUTE) for event in events]
+
+
+def test_bars_of_one_instrument_stay_in_order_behind_a_slow_gap():
+    async def scenario():
+        engine = _engine(asyncio.get_running_loop(), IntradayStub(delay=0.2))
+        # As after a reconnect: gaps for the missed minutes, then the next feed bar
+        items = [BarGap(KEY, _minute(1)), BarGap(KEY, _minute(2)),
+                 BuiltBar(KEY, _minute(3), 1.0, 2.0, 0.5, 1.5, 10, 'feed'),
+                 BuiltBar(KEY, _minute(4), 1.0, 2.0, 0.5, 1.5, 10, 'feed'),
+                 BuiltBar(OTHER_KEY, _minute(3), 1.0, 2.0, 0.5, 1.5, 10, 'feed')]
+        return await _run(engine, items, len(items))
+
+    events = asyncio.run(scenario())
+
+    assert [minute for symbol, minute in events if symbol == KEY] == [1, 2, 3, 4]
+    assert [minute for symbol, minute in events if symbol == OTHER_KEY] == [3]
+
+
+def test_gaps_of_one_instrument_share_one_intraday_request():
+    upstox = IntradayStub()
+
+    async def scenario():
+        engine = _engine(asyncio.get_running_loop(), upstox)
+        items = [BarGap(KEY, _minute(n)) for n in (1, 2, 3)] + [BarGap(OTHER_KEY, _minute(1))]
+        events = await _run(engine, items, len(items))
+        return engine, events
+
+    engine, events = asyncio.run(scenario())
+
+    assert sorted(upstox.calls) == [KEY, OTHER_KEY]
+    assert [minute for symbol, minute in events if symbol == KEY] == [1, 2, 3]
+
+    # A minute the cached response does not cover, or a stale response, is fetched again
+    assert engine._fetch_gap_bar(BarGap(KEY, _minute(12))) is None
+    assert upstox.calls.count(KEY) == 2
+    engine._gap_candles[KEY] = (engine._gap_candles[KEY][0] - LiveTradingEngine.GAP_CACHE_SECS - 1, engine._gap_candles[KEY][1])
+    assert engine._fetch_gap_bar(BarGap(KEY, _minute(4))) == BuiltBar(KEY, _minute(4), 14.0, 16.0, 13.0, 15.0, 5, 'rest')
+    assert upstox.calls.count(KEY) == 3
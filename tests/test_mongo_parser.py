@@ -0,0 +1,98 @@
+import json
+import time
+from pathlib import Path
+import pytest
+from data_sourcing.database_manager import DatabaseManager
+from data_sourcing.mongo_parser import MongoParser
+from tests.conftest import isolate_market, store_market_instruments
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'raw_ticks.jsonl'
+EXPECTED = Path(__file__).parent / 'fixtures' / 'raw_ticks_expected.json'
+
+
+@pytest.fixture
+def utc():
+    """Storage timestamps are local wall-clock minutes; the expected rows were written for UTC."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('TZ', 'UTC')
+        time.tzset()
+        yield
+    time.tzset()
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch, utc):
+    """The instrument master, plus two empty databases to replay the fixture into."""
+    isolate_market(monkeypatch, tmp_path)
+    master = DatabaseManager('sos_master_data.db')
+    master.initialize_database()
+    store_market_instruments(master)
+    dbs = [DatabaseManager(name) for name in ('bulk.db', 'per_snapshot.db')]
+    for db in dbs:
+        db.initialize_database()
+    return dbs
+
+
+def _snapshots():
+    with open(FIXTURE) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _stored(db):
+    """Every stored candle and chain row, in key order and without the derived and write-time columns."""
+    stored = {}
+    with db.reader() as conn:
+        for table, query in [
+            ('candles', """SELECT symbol, exchange, interval, timestamp, open, high, low, close, volume, oi
+                           FROM historical_candles ORDER BY symbol, ts_min"""),
+            ('chain', """SELECT symbol, timestamp, strike, expiry, call_instrument_key, put_instrument_key,
+                                call_oi, put_oi, call_ltp, put_ltp, call_iv, put_iv, call_delta, put_delta,
+                                call_theta, put_theta, call_oi_chg, put_oi_chg, call_trend, put_trend
+                         FROM option_chain_data ORDER BY symbol, ts_min, strike""")]:
+            cursor = conn.execute(query)
+            columns = [column[0] for column in cursor.description]
+            stored[table] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return stored
+
+
+def test_replay_stores_the_expected_rows(databases):
+    bulk, per_snapshot = databases
+    snapshots = _snapshots()
+    with open(EXPECTED) as f:
+        expected = json.load(f)
+
+    stored = MongoParser(flush_every=3, db_manager=bulk).ingest_from_file(str(FIXTURE))
+    parser = MongoParser(db_manager=per_snapshot)
+    per_snapshot_stored = sum(parser.parse_snapshot(snapshot) for snapshot in snapshots)
+
+    assert stored == per_snapshot_stored == len(snapshots) - 1  # One snapshot has no usable currentTs
+    # Minute-floored rows holding each minute's last snapshot; the unknown contract is skipped
+    assert _stored(bulk) == expected
+    assert _stored(per_snapshot) == expected
+
+    # The last snapshot at 03:48 lacks the 25550 put: its key carries over from earlier in the minute, its values do not
+    last = expected['chain'][-1]
+    assert (last['timestamp'], last['strike']) == ('2026-01-19 03:48:00', 25550.0)
+    assert last['put_instrument_key'] == 'NSE_FO|255502' and last['put_oi'] == 0.0
+
+
+def test_failed_flushes_are_not_reported_as_stored(databases, monkeypatch):
+    bulk, _ = databases
+    store = bulk.store_option_chain
+    calls = []
+
+    def flaky_store(*args, **kwargs):
+        calls.append(1)
+        return len(calls) != 2 and store(*args, **kwargs)
+
+    monkeypatch.setattr(bulk, 'store_option_chain', flaky_store)
+    parser = MongoParser(flush_every=3, db_manager=bulk)
+
+    # 12 usable snapshots in four flushes of 3: the second flush is rolled back
+    assert parser.ingest(_snapshots()) == 9
+
+    def broken_store(*args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(bulk, 'store_option_chain', broken_store)
+    assert parser.ingest(_snapshots()) == 0
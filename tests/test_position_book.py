@@ -0,0 +1,94 @@
+from python_engine.core.execution_handler import ExecutionHandler
+from python_engine.core.order_orchestrator import OrderOrchestrator
+from python_engine.core.position_book import PositionBook
+from python_engine.core.trade_logger import TradeLog
+from python_engine.models.data_models import MarketEvent, MessageType, VolumeBar
+from python_engine.models.trade import Position, Trade, TradeSide
+
+T0 = 1768794300  # 2026-01-19 09:15 IST
+INDEX = 'NSE|INDEX|NIFTY'
+
+
+def _position(symbol, pattern_id, entry_time, underlying=INDEX):
+    return Position(underlying_symbol=underlying, instrument_key=f'key:{symbol}', symbol=symbol, pattern_id=pattern_id,
+                    side=TradeSide.BUY, entry_price=100.0, entry_time=entry_time, stop_loss=90.0, take_profit=120.0,
+                    trade_id=f'{symbol}_{pattern_id}')
+
+
+def _book(*positions):
+    book = PositionBook()
+    for position in positions:
+        book[f"{position.symbol}_{position.pattern_id}"] = position
+    return book
+
+
+def test_indexes_follow_the_book():
+    a, b = _position('CE1', 'p1', T0 + 120), _position('PE1', 'p1', T0)
+    c = _position('CE1', 'p2', T0 + 60, underlying='NSE|INDEX|BANKNIFTY')
+    book = _book(a, b, c)
+
+    assert book.for_symbol('CE1') == [a, c]
+    assert book.for_underlying(INDEX) == [a, b]
+    assert book.for_underlying(INDEX, exclude_symbol='CE1') == [b]
+    assert book.has_pattern('p1', INDEX) and not book.has_pattern('p2', INDEX)
+
+    assert book.pop('CE1_p1') is a and book.pop('CE1_p1', 'gone') == 'gone'
+    assert book.for_symbol('CE1') == [c] and book.for_underlying(INDEX) == [b]
+    assert book.has_pattern('p1', INDEX)  # PE1 still holds it
+    del book['PE1_p1']
+    assert not book.has_pattern('p1', INDEX) and list(book) == ['CE1_p2']
+
+
+def test_lookups_keep_opening_order():
+    positions = [_position(f'CE{n}', 'p1', T0 + 60 * (5 - n)) for n in range(5)]
+    book = _book(*positions)
+    # Entered in reverse time order; every lookup still lists them as they were opened
+    assert [key for key, _ in book.affected_by('CE2', entered_by=T0 + 120)] == ['CE2_p1', 'CE3_p1', 'CE4_p1']
+    assert [p.symbol for p in book.for_underlying(INDEX)] == [p.symbol for p in positions]
+
+
+def test_entered_by_keeps_due_positions_until_removed():
+    old, new = _position('CE1', 'p1', T0), _position('CE2', 'p1', T0 + 600)
+    book = _book(old, new)
+
+    assert list(book.entered_by(T0 + 300)) == ['CE1_p1']
+    assert list(book.entered_by(T0 + 300)) == ['CE1_p1']  # Still due on the next bar
+    book.pop('CE1_p1')
+    assert book.entered_by(T0 + 300) == {}
+    # Re-opening the same key does not resurrect the old heap entry
+    book['CE1_p1'] = _position('CE1', 'p1', T0 + 900)
+    assert list(book.entered_by(T0 + 600)) == ['CE2_p1']
+
+
+class _OptionPrices:
+    """Data manager stand-in serving one flat option candle per request."""
+
+    def __init__(self, price):
+        self.price = price
+
+    def get_historical_candle_for_timestamp(self, symbol, timestamp):
+        return VolumeBar(symbol, timestamp, self.price, self.price, self.price, self.price, 100)
+
+
+def test_time_exit_closes_a_position_once_and_frees_its_slot():
+    trade_log = TradeLog('trades.csv', persist=False)
+    data = _OptionPrices(105.0)
+    orchestrator = OrderOrchestrator(trade_log, data, 'backtest')
+    handler = ExecutionHandler(orchestrator, data)
+    position = _position('CE1', 'p1', T0)
+    trade_log.log_trade(Trade(position.trade_id, 'p1', 'CE1', position.instrument_key, TradeSide.BUY, T0, 100.0,
+                              stop_loss=90.0, take_profit=120.0, underlying_symbol=INDEX))
+    orchestrator.restore_positions(trade_log.get_trades())
+
+    closes = []
+    update = trade_log.update_trade
+    trade_log.update_trade = lambda trade: (closes.append(trade.exit_time), update(trade))
+    for minute in range(29, 34):
+        timestamp = T0 + 60 * minute
+        handler._check_active_exits(MarketEvent(MessageType.CANDLE_UPDATE, timestamp, INDEX,
+                                                VolumeBar(INDEX, timestamp, 1, 1, 1, 1, 0)))
+
+    assert closes == [T0 + 60 * 31]  # Closed on the first bar past the limit and not re-closed later
+    assert len(orchestrator._open_positions) == 0
+    assert not orchestrator._open_positions.has_pattern('p1', INDEX)
+    assert trade_log.get_trade(position.trade_id).status == 'CLOSED'
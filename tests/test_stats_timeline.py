@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from python_engine.data.stats_timeline import StatsTimeline
+
+
+def _stats(timestamps, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'symbol': 'NSE|INDEX|NIFTY',
+        'timestamp': [str(t) for t in timestamps],
+        'pcr': rng.uniform(0.5, 1.5, len(timestamps)).round(4),
+        'smart_trend': rng.choice(['Long Buildup', 'Short Covering', 'Neutral'], len(timestamps)),
+        'advances': rng.integers(0, 50, len(timestamps)),
+    })
+
+
+def _reference(stats: pd.DataFrame, timestamp: pd.Timestamp):
+    """The historical get_closest_stats rule, one bar at a time."""
+    ts = pd.to_datetime(stats['timestamp'])
+    day_start = timestamp.normalize()
+    if timestamp == day_start:
+        upper = day_start + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    else:
+        upper = timestamp.floor('min') + pd.Timedelta(seconds=59)
+    window = stats[(ts >= day_start) & (ts <= upper)]
+    if window.empty:
+        return None
+    distance = (pd.to_datetime(window['timestamp']) - timestamp).abs()
+    # Earlier snapshot wins a tie
+    best = distance[distance == distance.min()].index
+    return window.loc[min(best, key=lambda i: ts[i])].to_dict()
+
+
+SNAPSHOTS = pd.to_datetime(['2026-01-19 09:15:30', '2026-01-19 09:17:00', '2026-01-19 09:19:00',
+                            '2026-01-19 12:00:10', '2026-01-20 09:16:00'])
+
+
+@pytest.mark.parametrize("bar", ['2026-01-19 09:14', '2026-01-19 09:15', '2026-01-19 09:16', '2026-01-19 09:18',
+                                 '2026-01-19 09:18:00.5', '2026-01-19 11:59', '2026-01-19 15:29',
+                                 '2026-01-19 00:00', '2026-01-20 09:15', '2026-01-21 09:15'])
+def test_closest_matches_the_historical_rule(bar):
+    stats = _stats(SNAPSHOTS)
+    timeline = StatsTimeline(stats.sample(frac=1, random_state=1))
+    expected = _reference(stats, pd.Timestamp(bar))
+    got = timeline.closest(pd.Timestamp(bar).to_pydatetime())
+    if expected is None:
+        assert got is None
+    else:
+        assert got == {k: (v.item() if hasattr(v, 'item') else v) for k, v in expected.items()}
+
+
+def test_join_matches_single_lookups_and_applies_defaults():
+    stats = _stats(pd.date_range('2026-01-19 09:16', '2026-01-19 10:00', freq='2min'))
+    bars = pd.date_range('2026-01-19 09:15', '2026-01-19 10:30', freq='1min')
+    timeline = StatsTimeline(stats)
+
+    joined = timeline.join(bars)
+
+    assert list(joined.index) == list(bars)
+    for bar, row in joined.iterrows():
+        record = timeline.closest(bar.to_pydatetime())
+        if record is None:
+            assert not row['has_stats'] and row['pcr'] == 1.0 and row['smart_trend'] == 'Neutral'
+        else:
+            assert row['has_stats'] and row['pcr'] == record['pcr'] and row['smart_trend'] == record['smart_trend']
+    assert not joined['has_stats'].iloc[0] and joined['has_stats'].iloc[1:].all()
+    # Columns market_stats did not have fall back to their defaults
+    assert (joined['pcr_velocity'] == 0.0).all() and (joined['declines'] == 0).all()
+
+
+def test_empty_timeline_yields_defaults():
+    joined = StatsTimeline().join(pd.date_range('2026-01-19 09:15', periods=3, freq='1min'))
+    assert not joined['has_stats'].any()
+    assert (joined['pcr'] == 1.0).all() and (joined['smart_trend'] == 'Neutral').all()
+    assert StatsTimeline(pd.DataFrame()).closest(pd.Timestamp('2026-01-19 09:15')) is None
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from python_engine.models.data_models import VolumeBar
+from python_engine.utils import mvel_functions
+from python_engine.utils.bar_history import BarHistory
+from python_engine.utils.streaming_indicators import IndicatorRegistry
+
+SYMBOL = 'NSE_INDEX|Nifty 50'
+BARS = 1500
+
+
+def _bars(count=BARS, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 25500.0 * np.exp(rng.normal(0, 0.001, count).cumsum())
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.gamma(2, 3, count)
+    low = np.minimum(open_, close) - rng.gamma(2, 3, count)
+    volume = rng.integers(0, 20000, count) * (rng.random(count) > 0.05)  # Some bars carry no volume
+    return [VolumeBar(SYMBOL, 1_768_794_300 + 60 * i, float(o), float(h), float(l), float(c), int(v))
+            for i, (o, h, l, c, v) in enumerate(zip(open_, high, low, close, volume))]
+
+
+def _stream(bars, calls, register_at=0):
+    """Feeds bars the way PatternMatcherHandler does and yields (bar index, functions, history) after each."""
+    history = BarHistory(200)
+    registry = IndicatorRegistry(200)
+    functions = registry.functions_for(SYMBOL, history)
+    for i, bar in enumerate(bars):
+        history.append(bar)
+        registry.update(bar, history)
+        if i >= register_at:
+            for call in calls:
+                call(functions, history)
+            yield i, functions, history
+
+
+WINDOWED = [
+    ('moving_avg', (20, 'close')), ('sma', (50, 'volume')), ('stdev', (20, 'close')), ('stdev', (200, 'high')),
+    ('highest', (14, 'high')), ('max', (60, 'close')), ('lowest', (14, 'low')), ('min', (300, 'low')),
+    ('bb_upper', (20, 2.0)), ('bb_lower', (30, 1.5)),
+]
+
+
+@pytest.mark.parametrize("register_at", [0, 700])
+def test_windowed_indicators_match_the_stateless_functions(register_at):
+    # Registered on the first bar, or late and seeded from the history
+    calls = [lambda f, h, name=name, args=args: f[name](h, *args) for name, args in WINDOWED]
+    calls.append(lambda f, h: f['vwap'](h))
+    for i, functions, history in _stream(_bars(), calls, register_at):
+        for name, args in WINDOWED:
+            expected = mvel_functions.MVEL_FUNCTIONS[name](history, *args)
+            assert functions[name](history, *args) == pytest.approx(expected, rel=1e-9, abs=1e-9), (i, name, args)
+        assert functions['vwap'](history) == pytest.approx(mvel_functions.vwap(history), rel=1e-9), i
+
+
+def _wilder_rsi(closes, period):
+    diffs = np.diff(closes)
+    gains, losses = np.maximum(diffs, 0), np.maximum(-diffs, 0)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def test_rsi_uses_wilder_smoothing_over_every_bar():
+    bars = _bars(400)
+    closes = np.array([bar.close for bar in bars])
+    for i, functions, history in _stream(bars, [lambda f, h: f['rsi'](h, 14)]):
+        value = functions['rsi'](history, 14)
+        if i + 1 < 14:
+            assert value == 50.0
+        elif i >= 14:
+            assert value == pytest.approx(_wilder_rsi(closes[:i + 1], 14), rel=1e-9)
+    # The stateless function averages only the last 14 changes, so the two differ
+    assert value != pytest.approx(mvel_functions.rsi(history, 14), rel=1e-3)
+
+
+def test_ema_is_recursive_from_the_first_bar():
+    bars = _bars(400)
+    alpha = 2 / (9 + 1)
+    expected = None
+    for i, functions, history in _stream(bars, [lambda f, h: f['ema'](h, 9, 'close')]):
+        expected = bars[i].close if expected is None else bars[i].close * alpha + expected * (1 - alpha)
+        assert functions['ema'](history, 9, 'close') == pytest.approx(expected, rel=1e-12)
+    # Beyond the 200-bar history, unlike the stateless function's 2*period restart
+    assert functions['ema'](history, 9, 'close') != mvel_functions.ema(history, 9, 'close')
+
+
+def test_other_sequences_fall_back_to_the_stateless_functions():
+    history = BarHistory(200)
+    registry = IndicatorRegistry(200)
+    functions = registry.functions_for(SYMBOL, history)
+    for bar in _bars(120):
+        history.append(bar)
+        registry.update(bar, history)
+
+    window = history[-30:]
+    assert functions['moving_avg'](window, 20, 'close') == mvel_functions.moving_avg(window, 20, 'close')
+    assert functions['ema'](window, 9, 'close') == mvel_functions.ema(window, 9, 'close')
+    assert functions['rsi'](window, 14) == mvel_functions.rsi(window, 14)
+    assert functions['vwap'](window) == mvel_functions.vwap(window)
+    assert registry._indicators[SYMBOL] == {}
@@ -0,0 +1,103 @@
+import json
+import pytest
+from data_sourcing.database_manager import DatabaseManager
+from python_engine.core.trade_journal import TradeJournal
+from python_engine.models.trade import Trade, TradeOutcome, TradeSide
+from tests.conftest import isolate_market
+
+T0 = 1768794300  # 2026-01-19 09:15 IST
+
+
+def _trade(n, closed=False):
+    trade = Trade(f't{n}', 'p1', 'NIFTY 25500 CE 20 JAN 26', 'NSE_FO|255001', TradeSide.BUY, T0 + 60 * n, 100.0 + n,
+                  stop_loss=90.0, take_profit=120.0, underlying_symbol='NSE|INDEX|NIFTY')
+    if closed:
+        trade.status, trade.exit_time, trade.exit_price = 'CLOSED', T0 + 60 * n + 300, 110.0 + n
+        trade.exit_reason, trade.outcome = 'TP', TradeOutcome.WIN
+    return trade
+
+
+class FlakyStore:
+    """Lets the first `failures` store_trades calls raise, like a locked database."""
+
+    def __init__(self, db, failures):
+        self.store, self.failures, self.calls = db.store_trades, failures, 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError('database is locked')
+        return self.store(rows)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    isolate_market(monkeypatch, tmp_path)
+    db = DatabaseManager('sos_master_data.db')
+    db.initialize_database()
+    return db
+
+
+def _stored(db):
+    with db.reader() as conn:
+        return dict(conn.execute("SELECT trade_id, status FROM trades").fetchall())
+
+
+def _wal_ids(path):
+    with open(path) as f:
+        return [json.loads(line)['trade_id'] for line in f]
+
+
+def _journal(db, path, **kwargs):
+    journal = TradeJournal(db, str(path), batch_size=2, flush_interval=0.01, **kwargs)
+    journal.start()
+    return journal
+
+
+def test_wal_is_compacted_after_a_failed_commit_is_retried(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(TradeJournal, 'COMPACT_AFTER', 4)
+    monkeypatch.setattr(db, 'store_trades', FlakyStore(db, failures=1))
+    journal = _journal(db, tmp_path / 'trades.jsonl')
+
+    journal.record(_trade(1))
+    journal.flush()  # Fails; held for the next batch
+    for trade in (_trade(1, closed=True), _trade(2), _trade(3, closed=True)):
+        journal.record(trade)
+    journal.flush()
+
+    assert _stored(db) == {'t1': 'CLOSED', 't2': 'OPEN', 't3': 'CLOSED'}
+    # Every journalled line counts as committed, so the WAL shrinks to the open trade
+    assert _wal_ids(tmp_path / 'trades.jsonl') == ['t2']
+    journal.close()
+
+
+def test_close_retries_a_failed_commit(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'store_trades', FlakyStore(db, failures=1))
+    journal = _journal(db, tmp_path / 'trades.jsonl')
+    journal.record(_trade(1))
+    journal.record(_trade(2, closed=True))
+    journal.flush()
+    assert _stored(db) == {}
+
+    journal.close()
+    assert _stored(db) == {'t1': 'OPEN', 't2': 'CLOSED'}
+    assert _wal_ids(tmp_path / 'trades.jsonl') == ['t1']
+
+
+def test_uncommitted_trades_are_recovered_from_the_wal(db, tmp_path, monkeypatch):
+    path = tmp_path / 'trades.jsonl'
+    monkeypatch.setattr(db, 'store_trades', FlakyStore(db, failures=10))
+    journal = _journal(db, path)
+    for trade in (_trade(1), _trade(2), _trade(2, closed=True)):
+        journal.record(trade)
+    journal.close()
+    assert _stored(db) == {}
+    assert _wal_ids(path) == ['t1', 't2', 't2']  # Kept whole for the next run
+
+    monkeypatch.undo()
+    isolate_market(monkeypatch, tmp_path)
+    recovered = TradeJournal(db, str(path)).recover()
+    assert [trade.trade_id for trade in recovered] == ['t1']
+    assert recovered[0].side is TradeSide.BUY and recovered[0].entry_time == T0 + 60
+    assert _stored(db) == {'t1': 'OPEN', 't2': 'CLOSED'}
+    assert _wal_ids(path) == ['t1']
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import threading
+import time
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from python_engine.utils.event_bus import BUS, TRADE_OPEN, TRADE_CLOSE, SL_MOVE
+from python_engine.utils.symbol_master import MASTER as SymbolMaster
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TtlCache:
+    """
+    Small LRU cache whose entries expire after a per-entry time-to-live.
+
+    Thread-safe, so both the event loop and bus callbacks (UDP listener
+    thread) can use it.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted.
+        """
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the cached value, or _MISSING if absent or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drops the entries whose key matches `predicate` (all of them if None)."""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+
+def _is_today(date: str) -> bool:
+    return date == datetime.now().strftime('%Y-%m-%d')
+
+
+def _unix(values: pd.Series) -> list:
+    """Stored wall-clock times as unix seconds read as UTC (what the charts use); None for missing."""
+    ts = pd.to_datetime(values)
+    seconds = (ts - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return [None if pd.isna(s) else int(s) for s in seconds]
+
+
+class DashboardData:
+    """
+    Async data access for ui/server.py.
+
+    Every query is parameterized and runs on a small thread pool through
+    one shared DatabaseManager (each worker thread reuses its pooled
+    read-only connection), so handlers never block the event loop. ATM
+    resolution and trades-by-day are cached per (symbol, day). Entries
+    for today live for seconds; past days, which no longer change, for
+    minutes. Concurrent misses on one key share a single query. Trade
+    events on the event bus drop the cached trades of their day.
+    """
+
+    TODAY_TTL = 5.0
+    PAST_DAY_TTL = 300.0
+
+    def __init__(self, db_manager, data_manager, max_workers: int = 4):
+        """
+        Args:
+            db_manager (DatabaseManager): Shared manager for all dashboard queries.
+            data_manager (DataManager): ATM tables, instrument loader and live candle backfill.
+            max_workers (int): Threads running blocking queries.
+        """
+        self.db = db_manager
+        self.dm = data_manager
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-db")
+        self.atm_cache = TtlCache()
+        self.trades_cache = TtlCache()
+        self._pending: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        BUS.subscribe(self._on_event)
+
+    def close(self) -> None:
+        BUS.unsubscribe(self._on_event)
+        self._executor.shutdown(wait=False)
+
+    def _ttl(self, date: str) -> float:
+        return self.TODAY_TTL if _is_today(date) else self.PAST_DAY_TTL
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        if event['type'] not in (TRADE_OPEN, TRADE_CLOSE, SL_MOVE):
+            return
+        day = str((event.get('data') or {}).get('entry_time') or '')[:10]
+        # Keys are (symbol, date); date None means "all days"
+        self.trades_cache.invalidate(lambda key: key[1] in (day, None) or not day)
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _cached(self, name: str, cache: TtlCache, key: Hashable, ttl: float, fn: Callable, *args) -> Any:
+        value = cache.get(key)
+        if value is not _MISSING:
+            return value
+        pending_key = (name, key)
+        task = self._pending.get(pending_key)
+        if task is None:
+            task = self._pending[pending_key] = asyncio.ensure_future(self._run(fn, *args))
+
+            def _done(t):
+                self._pending.pop(pending_key, None)
+                if not t.cancelled() and t.exception() is None:
+                    cache.put(key, t.result(), ttl)
+
+            task.add_done_callback(_done)
+        # Shielded so a viewer disconnecting does not cancel the query others are waiting on
+        return await asyncio.shield(task)
+
+    # --- Candles ---
+
+    def _load_candles(self, canonical: str, date: str, since_min: Optional[int], mode: str) -> Dict[str, np.ndarray]:
+        arrays = self.db.get_candle_arrays(canonical, date, since_min=since_min)
+        if not len(arrays['ts_min']) and since_min is None and mode == 'live':
+            # Nothing stored for the day yet; let DataManager backfill it, then read it back
+            self.dm.get_historical_candles(canonical, from_date=date, to_date=date, mode=mode, n_bars=1000)
+            arrays = self.db.get_candle_arrays(canonical, date)
+        return arrays
+
+    async def candles(self, canonical: str, date: str, since_min: Optional[int] = None, mode: str = 'backtest') -> Dict[str, np.ndarray]:
+        """One day of candles as columns (see DatabaseManager.get_candle_arrays); not cached, deltas are tiny."""
+        return await self._run(self._load_candles, canonical, date, since_min, mode)
+
+    # --- ATM options ---
+
+    def _load_spot(self, canonical: str, date: str) -> Optional[float]:
+        query = """
+            SELECT close FROM historical_candles WHERE symbol = ? AND ts_min BETWEEN ? AND ?
+            ORDER BY ts_min DESC, timestamp DESC LIMIT 1
+        """
+        with self.db.reader() as conn:
+            row = conn.execute(query, (canonical, *self.db._day_minute_range(date))).fetchone()
+        if row is not None:
+            return row[0]
+        if _is_today(date):
+            # Try to fetch one candle if today
+            df = self.dm.get_historical_candles(canonical, from_date=date, to_date=date, mode='live', n_bars=1)
+            if df is not None and not df.empty:
+                return df.iloc[-1]['close']
+        return None
+
+    def _resolve_atm(self, symbol: str, date: str) -> Optional[Dict[str, Any]]:
+        spot = self._load_spot(SymbolMaster.get_upstox_key(symbol), date)
+        if spot is None:
+            return None
+
+        # Same per-day ATM table the backtest resolves trades with; the instrument
+        # master is only consulted for days without a stored option chain
+        if len(self.dm.atm_table.day(symbol, date)):
+            ce_key, ce_name = self.dm.atm_table.lookup(symbol, 'BUY', spot, date)
+            pe_key, pe_name = self.dm.atm_table.lookup(symbol, 'SELL', spot, date)
+        else:
+            prefix = "BANKNIFTY" if "BANK" in symbol.upper() else "NIFTY"
+            # Centred on this spot; no LTP calls and no shared fno_instruments state
+            mapping = self.dm.instrument_loader.get_upstox_instruments([prefix], {prefix: spot}, target_date=date).get(prefix)
+            if mapping and mapping['options']:
+                atm = min(mapping['options'], key=lambda x: abs(x['strike'] - spot))
+                ce_key, ce_name, pe_key, pe_name = atm['ce'], atm['ce_trading_symbol'], atm['pe'], atm['pe_trading_symbol']
+            else:
+                ce_key = ce_name = pe_key = pe_name = None
+
+        return {
+            "ce": {"key": ce_key, "name": ce_name},
+            "pe": {"key": pe_key, "name": pe_name},
+            "spot": float(spot)
+        }
+
+    async def atm_options(self, symbol: str, date: str) -> Optional[Dict[str, Any]]:
+        """ATM CE/PE at the day's latest spot, or None when there is no spot price."""
+        return await self._cached('atm', self.atm_cache, (symbol, date), self._ttl(date), self._resolve_atm, symbol, date)
+
+    # --- Trades ---
+
+    def _load_trades(self, canonical: Optional[str], date: Optional[str]) -> list:
+        query = "SELECT * FROM trades"
+        conditions, params = [], []
+        if canonical:
+            conditions.append("(symbol = ? OR instrument_key = ?)")
+            params += [canonical, canonical]
+        if date:
+            # Range on the raw column so idx_trades_entry_time can serve it
+            conditions.append("entry_time BETWEEN ? AND ?")
+            params += [f"{date} 00:00:00", f"{date} 23:59:59"]
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY entry_time DESC"
+
+        with self.db.reader() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        if df.empty:
+            return []
+
+        entry_unix, exit_unix = _unix(df['entry_time']), _unix(df['exit_time'])
+        trades = df.astype(object).where(df.notna(), None).to_dict('records')
+        for trade, entry, exit_ in zip(trades, entry_unix, exit_unix):
+            trade['entry_time_unix'] = entry
+            trade['exit_time_unix'] = exit_
+        return trades
+
+    async def trades(self, symbol: Optional[str] = None, date: Optional[str] = None) -> list:
+        """Trades on an instrument and/or day, newest entry first, shaped for the dashboard."""
+        canonical = (SymbolMaster.get_upstox_key(symbol) or symbol) if symbol else None
+        ttl = self._ttl(date) if date else self.TODAY_TTL
+        return await self._cached('trades', self.trades_cache, (canonical, date), ttl, self._load_trades, canonical, date)
@@ -1,8 +1,10 @@
 import os
-import pandas as pd
-from datetime import datetime
+import asyncio
+import json
+import hashlib
+import orjson
 from fastapi import FastAPI, Request, Query
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from python_engine.utils.symbol_master import MASTER as SymbolMaster
@@ -12,6 +14,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data_sourcing.data_manager import DataManager
 from data_sourcing.database_manager import DatabaseManager
+from python_engine.engine_config import Config
+from python_engine.utils.event_bus import BUS, UdpListener, DEFAULT_HOST, DEFAULT_PORT
+from ui.dashboard_data import DashboardData
 
 app = FastAPI()
 templates = Jinja2Templates(directory="ui/templates")
@@ -20,127 +25,110 @@ templates = Jinja2Templates(directory="ui/templates")
 SymbolMaster.initialize()
 dm = DataManager()
 DB_PATH = 'sos_master_data.db'
+# Blocking queries run on a thread pool against one shared manager; ATM and trades are TTL-cached
+dashboard = DashboardData(DatabaseManager(DB_PATH), dm, max_workers=Config.get('ui_db_workers') or 4)
+
+# Live engine events (bars, trade open/close, SL moves) arrive over local UDP and are fanned out to /api/stream
+STREAM_QUEUE_SIZE = 1000
+STREAM_HEARTBEAT_SECS = 15
+event_listener = UdpListener(BUS, Config.get('ui_event_host') or DEFAULT_HOST, Config.get('ui_event_port') or DEFAULT_PORT)
+
+@app.on_event("startup")
+async def start_event_listener():
+    event_listener.start()
+
+@app.on_event("shutdown")
+async def stop_event_listener():
+    event_listener.stop()
+    dashboard.close()
 
 @app.get("/", response_class=HTMLResponse)
 async def get_dashboard(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+def _candle_payload(symbol: str, arrays: dict) -> bytes:
+    """Columnar candle JSON: time (unix seconds) plus one array per OHLCV field."""
+    return orjson.dumps({
+        "symbol": symbol,
+        "time": arrays['ts_min'] * 60,
+        "open": arrays['open'],
+        "high": arrays['high'],
+        "low": arrays['low'],
+        "close": arrays['close'],
+        "volume": arrays['volume'],
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+
 @app.get("/api/candles")
 async def get_candles(
+    request: Request,
     symbol: str,
     date: str,
-    mode: str = 'backtest'
+    mode: str = 'backtest',
+    since: int = Query(None, description="Unix time of the last bar the client has; that bar and newer ones are returned")
 ):
     try:
         # Resolve canonical key if needed
         canonical = SymbolMaster.get_upstox_key(symbol) or symbol
+        since_min = since // 60 if since is not None else None
+
+        arrays = await dashboard.candles(canonical, date, since_min=since_min, mode=mode)
 
-        df = dm.get_historical_candles(
-            canonical,
-            from_date=date,
-            to_date=date,
-            mode=mode,
-            n_bars=1000
-        )
-
-        if df is None or df.empty:
-            return JSONResponse(content={"data": []})
-
-        # Convert to records for JS
-        df = df.copy()
-        df['time'] = pd.to_datetime(df['timestamp']).view('int64') // 10**9
-        # Lightweight charts expects time as unix timestamp (int) or string
-
-        records = []
-        for _, row in df.iterrows():
-            records.append({
-                "time": int(row['time']),
-                "open": float(row['open']),
-                "high": float(row['high']),
-                "low": float(row['low']),
-                "close": float(row['close']),
-                "volume": float(row.get('volume', 0))
-            })
-
-        return JSONResponse(content={"data": records, "symbol": canonical})
+        body = _candle_payload(canonical, arrays)
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 @app.get("/api/atm_options")
 async def get_atm_options(symbol: str, date: str):
     try:
-        canonical = SymbolMaster.get_upstox_key(symbol)
-        db_manager = DatabaseManager(DB_PATH)
-
-        query = f"SELECT close FROM historical_candles WHERE symbol = '{canonical}' AND DATE(timestamp) = '{date}' ORDER BY timestamp DESC LIMIT 1"
-        with db_manager as db:
-            df = pd.read_sql(query, db.conn)
-
-        if df.empty:
-            # Try to fetch one candle if today
-            if date == datetime.now().strftime('%Y-%m-%d'):
-                temp_df = dm.get_historical_candles(canonical, from_date=date, to_date=date, mode='live', n_bars=1)
-                if temp_df is not None and not temp_df.empty:
-                    spot = temp_df.iloc[-1]['close']
-                else:
-                    return JSONResponse(content={"error": "No spot price found"}, status_code=404)
-            else:
-                return JSONResponse(content={"error": "No spot price found"}, status_code=404)
-        else:
-            spot = df.iloc[0]['close']
-
-        dm.load_and_cache_fno_instruments(target_date=date)
-        ce_key, ce_name = dm.get_atm_option_details(symbol, 'BUY', spot, target_date=date)
-        pe_key, pe_name = dm.get_atm_option_details(symbol, 'SELL', spot, target_date=date)
-
-        return JSONResponse(content={
-            "ce": {"key": ce_key, "name": ce_name},
-            "pe": {"key": pe_key, "name": pe_name},
-            "spot": float(spot)
-        })
+        atm = await dashboard.atm_options(symbol, date)
+        if atm is None:
+            return JSONResponse(content={"error": "No spot price found"}, status_code=404)
+        return JSONResponse(content=atm)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 @app.get("/api/trades")
 async def get_trades(symbol: str = None, date: str = None):
-    db_manager = DatabaseManager(DB_PATH)
-    query = "SELECT * FROM trades"
-    conditions = []
-    if symbol:
-        canonical = SymbolMaster.get_upstox_key(symbol) or symbol
-        conditions.append(f"(symbol = '{canonical}' OR instrument_key = '{canonical}')")
-    if date:
-        conditions.append(f"DATE(entry_time) = '{date}'")
-
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-
-    query += " ORDER BY entry_time DESC"
-
-    with db_manager as db:
-        df = pd.read_sql(query, db.conn)
-
-    # Convert timestamps for JSON and handle NaN
-    trades = []
-
-    for _, row in df.iterrows():
-        trade = {}
-        for k, v in row.to_dict().items():
-            if pd.isna(v):
-                trade[k] = None
-            elif isinstance(v, (pd.Timestamp, datetime)):
-                trade[k] = str(v)
-            else:
-                trade[k] = v
-
-        trade['entry_time_unix'] = int(pd.to_datetime(row['entry_time']).timestamp())
-        if row['exit_time'] and not pd.isna(row['exit_time']):
-            trade['exit_time_unix'] = int(pd.to_datetime(row['exit_time']).timestamp())
-        else:
-            trade['exit_time_unix'] = None
-        trades.append(trade)
-
-    return JSONResponse(content={"trades": trades})
+    trades = await dashboard.trades(symbol, date)
+    return Response(content=orjson.dumps({"trades": trades}, option=orjson.OPT_SERIALIZE_NUMPY), media_type="application/json")
+
+@app.get("/api/stream")
+async def stream_events(request: Request):
+    """Server-sent events: one `event: <type>` message per engine event, JSON data."""
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+    def enqueue(event):
+        # Called on the UDP listener thread
+        loop.call_soon_threadsafe(_offer, event)
+
+    def _offer(event):
+        if events.full():
+            # A stalled client loses its oldest events rather than growing memory
+            events.get_nowait()
+        events.put_nowait(event)
+
+    async def messages():
+        BUS.subscribe(enqueue)
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=STREAM_HEARTBEAT_SECS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+        finally:
+            BUS.unsubscribe(enqueue)
+
+    return StreamingResponse(messages(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__ == "__main__":
     import uvicorn
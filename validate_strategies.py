@@ -2,6 +2,7 @@ import json
 import os
 from jsonschema import validate
 from asteval import Interpreter
+from python_engine.utils.expression_compiler import CompiledExpression
 
 def validate_expressions(strategy_file, strategy_data):
     """
@@ -17,11 +18,17 @@ def validate_expressions(strategy_file, strategy_data):
                 asteval.parse(condition)
             except Exception as e:
                 errors.append(f"    - Invalid condition in phase {i}, condition {j} ('{condition}'): {e}")
+            compiled = CompiledExpression(condition)
+            if compiled.error:
+                errors.append(f"    - Condition in phase {i}, condition {j} ('{condition}') cannot be compiled: {compiled.error}")
         for name, expression in phase.get('capture', {}).items():
             try:
                 asteval.parse(expression)
             except Exception as e:
                 errors.append(f"    - Invalid capture expression for '{name}' in phase {i} ('{expression}'): {e}")
+            compiled = CompiledExpression(expression)
+            if compiled.error:
+                errors.append(f"    - Capture expression for '{name}' in phase {i} ('{expression}') cannot be compiled: {compiled.error}")
 
     # Check execution expressions
     execution = strategy_data.get('execution', {})